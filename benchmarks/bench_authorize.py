@@ -0,0 +1,95 @@
+# benchmarks/bench_authorize.py
+"""Concurrent spending-limit authorizations against a single account.
+
+    DATABASE_URL=postgres://... python -m benchmarks.bench_authorize --requests 20000 --concurrency 200
+
+Fires authorizations at one hot account (a share of them retried with the
+same Idempotency-Key), then checks that utilised_limit never exceeds
+spending_limit and equals the sum of approved amounts.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import HTTPException
+from tortoise import Tortoise, run_async
+
+from db.settings import TORTOISE_ORM
+from models.account import AccountDetails
+from models.authorization import AccountAuthorization
+from routes.account_details import authorize_idempotent
+
+ACCOUNT = "BENCH-AUTH-1"
+
+
+async def main(args):
+    await Tortoise.init(config=TORTOISE_ORM)
+    await AccountAuthorization.filter(account_number=ACCOUNT).delete()
+    await AccountDetails.filter(account_number=ACCOUNT).delete()
+    await AccountDetails.create(
+        account_number=ACCOUNT, iban_number="SA00BENCH", account_balance=0,
+        account_type="current", status="active", spending_limit=args.limit,
+        utilised_limit=0, account_holder_name="Bench", swift_code="BENCHSAR",
+        account_currency="SAR",
+    )
+
+    rnd = random.Random(1)
+    keys = [uuid.uuid4().hex for _ in range(args.requests)]
+    # Re-send some keys, as a retrying client would
+    keys += rnd.sample(keys, int(args.requests * args.retry_ratio))
+    rnd.shuffle(keys)
+    amounts = {k: rnd.randint(1, args.max_amount) for k in keys}
+
+    queue = asyncio.Queue()
+    for k in keys:
+        queue.put_nowait(k)
+    approved, declined, replayed, errors = {}, 0, 0, 0
+
+    async def worker():
+        nonlocal declined, replayed, errors
+        while not queue.empty():
+            key = queue.get_nowait()
+            try:
+                result = await authorize_idempotent(ACCOUNT, amounts[key], key)
+            except HTTPException:
+                errors += 1
+                continue
+            if result.replayed:
+                replayed += 1
+            elif result.approved:
+                approved[key] = result.amount
+            else:
+                declined += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    account = await AccountDetails.get(account_number=ACCOUNT)
+    print(json.dumps({
+        "benchmark": "authorize",
+        "requests": len(keys),
+        "concurrency": args.concurrency,
+        "authorizations_per_s": round(len(keys) / elapsed),
+        "approved": len(approved),
+        "declined": declined,
+        "replayed": replayed,
+        "errors": errors,
+        "spending_limit": account.spending_limit,
+        "utilised_limit": account.utilised_limit,
+        "overspent": account.utilised_limit > account.spending_limit,
+        "consistent": account.utilised_limit == sum(approved.values()),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=1_000_000)
+    parser.add_argument("--max-amount", type=int, default=100)
+    parser.add_argument("--retry-ratio", type=float, default=0.1)
+    run_async(main(parser.parse_args()))
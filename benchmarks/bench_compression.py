@@ -0,0 +1,151 @@
+# benchmarks/bench_compression.py
+"""Bytes on the wire and CPU per request, before and after the response pipeline.
+
+    python -m benchmarks.bench_compression --requests 200
+
+`before` is a stock FastAPI app (JSONResponse, jsonable_encoder for plain
+rows, no compression); `after` uses FastJSONResponse as the default class
+and CompressionMiddleware. Both serve the same synthetic payloads straight
+through ASGI (no sockets, no DB):
+
+  transactions  a 200-item /api/transactions page (response_model)
+  onboarded     2000 rows shaped like /customers/onboarded
+  export_csv    a 20000-row CSV streamed in 64 KB chunks
+
+CPU is process time per request, so it includes encoding and compression.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import random
+import time
+from datetime import date, datetime, time as time_of_day, timedelta
+from decimal import Decimal
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from routes.transactions import TransactionListOut
+from utils import compression
+from utils.compression import CompressionMiddleware
+from utils.responses import FastJSONResponse
+
+
+def payloads(seed: int = 7):
+    rnd = random.Random(seed)
+    today = date.today()
+    items = [{
+        "transaction_id": n, "account_number": 1_000_000 + n % 50, "transaction_type": rnd.choice(["Debit", "Credit"]),
+        "transaction_date": today - timedelta(days=n % 90), "transaction_amount": Decimal(f"{rnd.uniform(1, 3000):.2f}"),
+        "available_balance": Decimal(f"{rnd.uniform(0, 200000):.2f}"), "time_of_transaction": time_of_day(n % 24, n % 60),
+        "merchant": rnd.choice(["Jarir", "Panda", "Tamimi", "Nahdi"]), "reference_number": f"BD042{n:011d}",
+        "location_of_transaction": rnd.choice(["Riyadh", "Jeddah", "Dammam"]), "address": None,
+        "transaction_category": rnd.choice(["Shopping", "Groceries", "Dining"]),
+    } for n in range(200)]
+    page = {"total": 5000, "limit": 200, "offset": 0, "from_date": today - timedelta(days=90), "to_date": today, "items": items}
+    onboarded = [{
+        "full_name": f"Bench Customer {i}", "iqama_id": f"2{i:09d}", "mobile_number": f"05{i:08d}",
+        "device_id": f"bench-device-{i}", "dep_reference_number": f"DEP{i + 1:07d}",
+        "created_at": datetime(2026, 1, 1) + timedelta(minutes=i), "status": "Account Successfully Created",
+        "current_step": "completed",
+    } for i in range(2000)]
+    rows = [{**items[n % 200], "transaction_id": n} for n in range(20_000)]
+    return page, onboarded, rows
+
+
+def csv_chunks(rows, chunk_bytes: int = 64 * 1024):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=list(rows[0]))
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= chunk_bytes:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode()
+
+
+def make_app(optimized: bool) -> FastAPI:
+    page, onboarded, rows = payloads()
+    app = FastAPI(default_response_class=FastJSONResponse) if optimized else FastAPI()
+
+    @app.get("/transactions", response_model=TransactionListOut)
+    async def transactions():
+        return page
+
+    @app.get("/onboarded")
+    async def onboarded_customers():
+        return FastJSONResponse(onboarded) if optimized else onboarded
+
+    @app.get("/export")
+    async def export_csv():
+        return StreamingResponse(csv_chunks(rows), media_type="text/csv; charset=utf-8")
+
+    if optimized:
+        app.add_middleware(CompressionMiddleware)
+    return app
+
+
+async def request(app, path: str, accept_encoding: str) -> dict:
+    result = {"bytes": 0, "chunks": 0, "encoding": None}
+    requested, done = [], asyncio.Event()
+
+    async def receive():
+        if requested:
+            await done.wait()  # StreamingResponse listens for a disconnect meanwhile
+            return {"type": "http.disconnect"}
+        requested.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            headers = dict(message["headers"])
+            result["encoding"] = headers.get(b"content-encoding", b"identity").decode()
+        else:
+            result["bytes"] += len(message.get("body", b""))
+            result["chunks"] += 1
+            if not message.get("more_body"):
+                done.set()
+
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": headers, "server": ("bench", 80), "client": ("127.0.0.1", 1),
+    }
+    await app(scope, receive, send)
+    return result
+
+
+async def measure(app, path: str, accept_encoding: str, requests: int) -> dict:
+    await request(app, path, accept_encoding)  # warm up
+    started = time.process_time()
+    for _ in range(requests):
+        last = await request(app, path, accept_encoding)
+    cpu = time.process_time() - started
+    return {**last, "cpu_ms_per_request": round(cpu / requests * 1000, 3)}
+
+
+async def main(args):
+    results = {"benchmark": "compression", "requests": args.requests, "brotli_installed": compression.brotli is not None}
+    before, after = make_app(False), make_app(True)
+    accept = "gzip, deflate, br"  # what browsers and okhttp send
+    for path in ("/transactions", "/onboarded", "/export"):
+        name = path.strip("/") if path != "/export" else "export_csv"
+        results[name] = {
+            "before": await measure(before, path, accept, args.requests),
+            "after_identity": await measure(after, path, "", args.requests),
+            "after": await measure(after, path, accept, args.requests),
+        }
+        saved = 1 - results[name]["after"]["bytes"] / results[name]["before"]["bytes"]
+        results[name]["bytes_saved"] = f"{saved:.0%}"
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
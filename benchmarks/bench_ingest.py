@@ -0,0 +1,77 @@
+# benchmarks/bench_ingest.py
+"""Throughput of the transaction ingest path (parse, validate, write).
+
+    DATABASE_URL=postgres://... python -m benchmarks.bench_ingest --rows 500000
+
+Reports rows/second for parsing+validation alone and for the full load,
+then re-loads the same batch to show the idempotent (all skipped) path.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from tortoise import Tortoise, run_async
+
+from db.settings import TORTOISE_ORM
+from utils.ingest import SCHEMAS, parse_batch, ingest_rows
+
+MERCHANTS = ["Jarir", "Panda", "Tamimi", "Danube", "Extra", "Nahdi", "STC", "Careem"]
+
+
+def make_payload(rows: int, seed: int = 7) -> bytes:
+    rnd = random.Random(seed)
+    start = date(2024, 1, 1)
+    lines = []
+    for i in range(rows):
+        lines.append(json.dumps({
+            "account_number": 1_000_000 + rnd.randrange(5_000),
+            "transaction_type": rnd.choice(["Debit", "Credit"]),
+            "transaction_date": (start + timedelta(days=rnd.randrange(730))).isoformat(),
+            "transaction_amount": f"{rnd.uniform(1, 5000):.2f}",
+            "available_balance": f"{rnd.uniform(0, 100000):.2f}",
+            "time_of_transaction": f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}:00",
+            "merchant": rnd.choice(MERCHANTS),
+            "reference_number": f"BENCH{seed:02d}{i:010d}",
+            "location_of_transaction": "Riyadh",
+            "transaction_category": "Shopping",
+        }))
+    return "\n".join(lines).encode()
+
+
+async def main(args):
+    await Tortoise.init(config=TORTOISE_ORM)
+    schema = SCHEMAS["domestic"]
+    payload = make_payload(args.rows, args.seed)
+
+    started = time.perf_counter()
+    rows = parse_batch(payload, "ndjson", schema)
+    parse_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    first = await ingest_rows(schema, rows)
+    load_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    replay = await ingest_rows(schema, rows)
+    replay_s = time.perf_counter() - started
+
+    print(json.dumps({
+        "benchmark": "ingest",
+        "rows": args.rows,
+        "method": first["method"],
+        "parse_rows_per_s": round(args.rows / parse_s),
+        "load_rows_per_s": round(args.rows / load_s),
+        "end_to_end_rows_per_s": round(args.rows / (parse_s + load_s)),
+        "inserted": first["inserted"],
+        "replay_rows_per_s": round(args.rows / replay_s),
+        "replay_inserted": replay["inserted"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=7, help="change to load a fresh batch")
+    run_async(main(parser.parse_args()))
@@ -0,0 +1,111 @@
+# benchmarks/bench_logging.py
+"""Event-loop blocking caused by logging, before and after utils.logging_setup.
+
+    python -m benchmarks.bench_logging --requests 20000 --sink-latency-ms 0.2
+
+Simulates requests that each log like validate_iqama used to (an f-string
+logger.info plus a print). `before` writes straight to a stream handler and
+stdout on the loop, `after` uses the queue pipeline. The sink sleeps a
+little per write to stand in for a container log pipe under backpressure.
+A probe task measures how late the loop wakes it (time blocked).
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import time
+
+from utils import logging_setup
+
+
+class SlowSink(io.TextIOBase):
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.writes = 0
+
+    def write(self, text):
+        time.sleep(self.latency)  # a blocking write(2) on a full pipe
+        self.writes += 1
+        return len(text)
+
+
+async def probe(stop: asyncio.Event, samples: list):
+    interval = 0.001
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - started - interval))
+
+
+async def workload(mode: str, requests: int, concurrency: int):
+    logger = logging.getLogger("bench.iqama")
+    queue = asyncio.Queue()
+    for n in range(requests):
+        queue.put_nowait(n)
+
+    async def worker():
+        while not queue.empty():
+            n = queue.get_nowait()
+            iqama_id, age = f"2{n:09d}", 30 + n % 40
+            if mode == "before":
+                logger.info(f"IQAMA VALIDATION: id={iqama_id}, expiry=2027-01-01, issue=2022-01-01, age={age}")
+                print(f"[DEBUG] Expiry Date: 2027-01-01, Today: 2026-10-19, Age: {age}")
+            else:
+                logger.info("Iqama validated", extra={"iqama_id": iqama_id, "age": age})
+                logger.debug("Iqama dates", extra={"expiry_date": "2027-01-01", "issue_date": "2022-01-01"})
+            await asyncio.sleep(0)  # the rest of the request
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def measure(mode: str, args) -> dict:
+    sink = SlowSink(args.sink_latency_ms / 1000)
+    root = logging.getLogger()
+    if mode == "before":
+        handler = logging.StreamHandler(sink)
+        root.handlers = [handler]
+        root.setLevel(logging.INFO)
+    else:
+        with contextlib.redirect_stdout(sink):
+            logging_setup.setup_logging()  # the listener thread keeps this sink
+
+    stop, samples = asyncio.Event(), []
+    probe_task = asyncio.create_task(probe(stop, samples))
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sink):
+        await workload(mode, args.requests, args.concurrency)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+
+    drain_started = time.perf_counter()
+    logging_setup.stop_logging()  # flush the queue before counting lines
+    drain = time.perf_counter() - drain_started
+    root.handlers = []
+
+    samples.sort()
+    return {
+        "requests_per_s": round(args.requests / elapsed),
+        "loop_blocked_ms_total": round(sum(samples) * 1000, 1),
+        "loop_lag_p99_ms": round(samples[int(len(samples) * 0.99)] * 1000, 3) if samples else None,
+        "loop_lag_max_ms": round(samples[-1] * 1000, 3) if samples else None,
+        "sink_writes": sink.writes,
+        "drain_after_s": round(drain, 3),
+    }
+
+
+async def main(args):
+    results = {"benchmark": "logging", "requests": args.requests, "sink_latency_ms": args.sink_latency_ms}
+    for mode in ("before", "after"):
+        results[mode] = await measure(mode, args)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--sink-latency-ms", type=float, default=0.2)
+    asyncio.run(main(parser.parse_args()))
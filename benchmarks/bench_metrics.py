@@ -0,0 +1,78 @@
+# benchmarks/bench_metrics.py
+"""Overhead of MetricsMiddleware and the per-query hook.
+
+    python -m benchmarks.bench_metrics --requests 50000
+
+Drives a trivial FastAPI route straight through ASGI (no sockets) with and
+without the middleware, so the difference is the middleware's own cost.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+
+from utils.metrics import MetricsMiddleware, record_query, render_prometheus
+
+
+def make_app(instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        record_query(0.0001)  # what the DB client would report
+        return {"item_id": item_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+async def drive(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for i in range(requests):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/items/{i}", "raw_path": f"/items/{i}".encode(),
+            "root_path": "", "query_string": b"", "headers": [], "server": ("bench", 80),
+            "client": ("127.0.0.1", 1),
+        }
+        await app(scope, receive, send)
+    return time.perf_counter() - started
+
+
+async def main(args):
+    results = {"benchmark": "metrics", "requests": args.requests}
+    for name, instrumented in (("plain", False), ("instrumented", True)):
+        app = make_app(instrumented)
+        await drive(app, 1000)  # warm up routing and pydantic
+        best = min([await drive(app, args.requests) for _ in range(args.rounds)])
+        results[f"{name}_us_per_request"] = round(best / args.requests * 1e6, 2)
+    results["overhead_us_per_request"] = round(
+        results["instrumented_us_per_request"] - results["plain_us_per_request"], 2
+    )
+
+    started = time.perf_counter()
+    for _ in range(args.requests):
+        record_query(0.001)
+    results["record_query_ns"] = round((time.perf_counter() - started) / args.requests * 1e9)
+
+    render_prometheus()  # first call imports the DB backend
+    started = time.perf_counter()
+    render_prometheus()
+    results["render_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
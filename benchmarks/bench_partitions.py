@@ -0,0 +1,119 @@
+# benchmarks/bench_partitions.py
+"""Heap vs monthly-partitioned transaction history on a synthetic dataset.
+
+    DATABASE_URL=postgres://... python -m benchmarks.bench_partitions --rows 50000000
+
+Builds two scratch tables (``bench_txn_heap`` and ``bench_txn_part``) with the
+same generated rows and indexes, then times the queries the transaction
+routes issue: a bounded account range query and the daily summary.
+Needs migration 5 (``ensure_monthly_partitions``). Pass ``--reuse`` to skip the (slow) load on repeat runs.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from tortoise import Tortoise, run_async
+
+from db.settings import TORTOISE_ORM
+
+COLUMNS = """
+    transaction_id BIGINT NOT NULL,
+    account_number BIGINT NOT NULL,
+    "Transaction Date" DATE NOT NULL,
+    "Transaction amount" DECIMAL(14,2) NOT NULL,
+    "Merchant" TEXT
+"""
+
+RANGE_SQL = """
+    SELECT * FROM {table}
+    WHERE account_number = $1 AND "Transaction Date" >= $2 AND "Transaction Date" <= $3
+    ORDER BY "Transaction Date" DESC LIMIT 50
+"""
+
+SUMMARY_SQL = """
+    SELECT "Transaction Date" AS day, COUNT(*) AS txn_count, SUM("Transaction amount") AS total_amount
+    FROM {table}
+    WHERE account_number = $1 AND "Transaction Date" >= $2 AND "Transaction Date" <= $3
+    GROUP BY day ORDER BY day DESC
+"""
+
+
+async def load(conn, rows: int, accounts: int, days: int):
+    await conn.execute_script(f"""
+        DROP TABLE IF EXISTS bench_txn_heap;
+        DROP TABLE IF EXISTS bench_txn_part;
+        CREATE TABLE bench_txn_heap ({COLUMNS}, PRIMARY KEY (transaction_id));
+        CREATE TABLE bench_txn_part ({COLUMNS}, PRIMARY KEY (transaction_id, "Transaction Date"))
+            PARTITION BY RANGE ("Transaction Date");
+        CREATE TABLE bench_txn_part_default PARTITION OF bench_txn_part DEFAULT;
+    """)
+    # Partitions first, then the data, so nothing lands in DEFAULT
+    await conn.execute_query(
+        "SELECT ensure_monthly_partitions('bench_txn_part', CURRENT_DATE - $1::int, CURRENT_DATE)",
+        [days],
+    )
+    for table in ("bench_txn_heap", "bench_txn_part"):
+        await conn.execute_query(
+            f"""
+            INSERT INTO {table}
+            SELECT g, 1000000 + (g % $2), CURRENT_DATE - ((g * 7919) % $3)::int,
+                   round((random() * 5000)::numeric, 2), 'Merchant ' || (g % 100)
+            FROM generate_series(1, $1::bigint) AS g
+            """,
+            [rows, accounts, days],
+        )
+        await conn.execute_script(
+            f'CREATE INDEX ON {table} (account_number, "Transaction Date"); ANALYZE {table};'
+        )
+
+
+async def time_query(conn, sql: str, samples: int, accounts: int, window: int, days: int):
+    rnd = random.Random(42)
+    latencies = []
+    today = date.today()
+    for _ in range(samples):
+        end_offset = rnd.randrange(days - window)
+        params = [
+            1000000 + rnd.randrange(accounts),
+            today - timedelta(days=end_offset + window),
+            today - timedelta(days=end_offset),
+        ]
+        started = time.perf_counter()
+        await conn.execute_query(sql, params)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+    }
+
+
+async def main(args):
+    await Tortoise.init(config=TORTOISE_ORM)
+    conn = Tortoise.get_connection("default")
+    if not args.reuse:
+        started = time.perf_counter()
+        await load(conn, args.rows, args.accounts, args.days)
+        print(f"loaded {args.rows} rows x2 in {time.perf_counter() - started:.1f}s")
+
+    results = {"benchmark": "partitions", "rows": args.rows, "window_days": args.window}
+    for name, sql in (("range", RANGE_SQL), ("daily_summary", SUMMARY_SQL)):
+        for table in ("bench_txn_heap", "bench_txn_part"):
+            results[f"{name}_{table.rsplit('_', 1)[1]}"] = await time_query(
+                conn, sql.format(table=table), args.samples, args.accounts, args.window, args.days
+            )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--accounts", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=5 * 365, help="spread of generated dates")
+    parser.add_argument("--window", type=int, default=90, help="days covered by each query")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--reuse", action="store_true", help="reuse previously loaded tables")
+    run_async(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+# benchmarks/bench_pool.py
+"""Throughput under different pool sizes and statement-cache settings.
+
+    DATABASE_URL=postgres://... python -m benchmarks.bench_pool --concurrency 200 \
+        --pool-sizes 5,20,50 --statement-cache 0,512
+
+Runs the same mix of point lookups and a daily-summary aggregate for each
+combination and reports queries/second, latency and pool wait time.
+"""
+import argparse
+import asyncio
+import copy
+import itertools
+import json
+import random
+import time
+
+from tortoise import Tortoise, run_async
+
+from db.backend import POOL_STATS
+from db.settings import TORTOISE_ORM
+
+QUERIES = [
+    ("SELECT * FROM account_details WHERE account_number = $1", lambda r: [str(r.randrange(1000))]),
+    ("SELECT * FROM onboarded_customers WHERE iqama_id = $1", lambda r: [str(2_000_000_000 + r.randrange(1000))]),
+    (
+        'SELECT "Transaction Date" AS day, COUNT(*), SUM("Transaction amount") FROM transaction_history '
+        'WHERE account_number = $1 AND "Transaction Date" >= CURRENT_DATE - 30 GROUP BY day',
+        lambda r: [1_000_000 + r.randrange(1000)],
+    ),
+]
+
+
+async def run_case(maxsize: int, cache_size: int, concurrency: int, duration: float) -> dict:
+    config = copy.deepcopy(TORTOISE_ORM)
+    credentials = config["connections"]["default"]["credentials"]
+    credentials.update(minsize=maxsize, maxsize=maxsize, statement_cache_size=cache_size)
+    POOL_STATS.clear()
+    await Tortoise.init(config=config)
+    conn = Tortoise.get_connection("default")
+
+    latencies = []
+    deadline = time.perf_counter() + duration
+
+    async def worker(seed):
+        rnd = random.Random(seed)
+        while time.perf_counter() < deadline:
+            sql, params = rnd.choice(QUERIES)
+            started = time.perf_counter()
+            await conn.execute_query(sql, params(rnd))
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    stats = POOL_STATS["default"].snapshot()
+    await Tortoise.close_connections()
+
+    latencies.sort()
+    return {
+        "pool_size": maxsize,
+        "statement_cache_size": cache_size,
+        "queries_per_s": round(len(latencies) / duration),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+        "avg_pool_wait_ms": round(stats["wait_seconds_total"] / max(stats["acquires"], 1) * 1000, 3),
+        "max_pool_wait_ms": round(stats["wait_seconds_max"] * 1000, 3),
+    }
+
+
+async def main(args):
+    if TORTOISE_ORM["connections"]["default"].get("engine") != "db.backend":
+        raise SystemExit("bench_pool needs a Postgres DATABASE_URL")
+    sizes = [int(s) for s in args.pool_sizes.split(",")]
+    caches = [int(s) for s in args.statement_cache.split(",")]
+    results = []
+    for maxsize, cache_size in itertools.product(sizes, caches):
+        results.append(await run_case(maxsize, cache_size, args.concurrency, args.duration))
+        print(json.dumps(results[-1]))
+    print(json.dumps({"benchmark": "pool", "concurrency": args.concurrency, "cases": results}, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per case")
+    parser.add_argument("--pool-sizes", default="5,20,50")
+    parser.add_argument("--statement-cache", default="0,512")
+    run_async(main(parser.parse_args()))
@@ -0,0 +1,92 @@
+# benchmarks/bench_startup.py
+"""Cold-start time of one worker: generate_schemas vs the migration-version check.
+
+    DATABASE_URL=postgres://... python -m benchmarks.bench_startup --runs 10
+
+Each run is a fresh interpreter that imports `main` and enters the app
+lifespan (ORM init + startup handlers), like a new uvicorn worker would.
+`first_request_ms` is measured separately: from spawning a uvicorn process
+until `GET /` returns 200, which is what an autoscaler waits for.
+The `verify` mode needs a database already at the newest aerich migration.
+See also `python -m scripts.import_profile` for where the import time goes.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+from main import app
+imported = time.perf_counter()
+
+async def boot():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+ready = asyncio.run(boot())
+print(json.dumps({"import_s": imported - started, "startup_s": ready - imported, "total_s": ready - started}), file=sys.stderr)
+"""
+
+MODES = {
+    "generate_schemas": {"GENERATE_SCHEMAS": "1", "SCHEMA_CHECK": "off"},
+    "verify": {"GENERATE_SCHEMAS": "0", "SCHEMA_CHECK": "strict"},
+}
+
+
+def run_once(env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD], env={**os.environ, **env},
+        capture_output=True, text=True, check=True,
+    ).stderr  # stdout carries the app's own (JSON) log lines
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def first_request(env: dict, timeout: float = 30.0) -> float:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("GET", "/")
+                if conn.getresponse().status == 200:
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)  # not listening yet
+        raise RuntimeError(f"no 200 from GET / within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(args):
+    results = {"benchmark": "startup", "runs": args.runs}
+    for mode in args.modes.split(","):
+        runs = [run_once(MODES[mode]) for _ in range(args.runs)]
+        results[mode] = {
+            key.replace("_s", "_ms"): round(statistics.median(run[key] for run in runs) * 1000, 1)
+            for key in ("import_s", "startup_s", "total_s")
+        }
+        firsts = [first_request(MODES[mode]) for _ in range(args.runs)]
+        results[mode]["first_request_ms"] = round(statistics.median(firsts) * 1000, 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--modes", default="generate_schemas,verify")
+    main(parser.parse_args())
@@ -0,0 +1,211 @@
+# benchmarks/datagen.py
+"""Deterministic synthetic data for load tests and benchmarks.
+
+    DATABASE_URL=postgres://... python -m benchmarks.datagen --customers 10000 --transactions 2000000
+    DATABASE_URL=sqlite:///tmp/bench.db GENERATE_SCHEMAS=1 python -m benchmarks.datagen --customers 2000 --transactions 100000
+
+Customer i (0-based) always gets the same identifiers (see `iqama_id`,
+`account_number`, ...), so benchmarks/loadtest.py can address the data
+without a manifest as long as it is given the same --customers and --fresh.
+The last `--fresh` share of iqama records has no onboarded customer, for
+the onboarding flow to use. All onboarded customers share PASSWORD / MPIN.
+Re-running replaces the customer rows; transaction rows are keyed by a
+deterministic reference number, so ones already loaded are skipped.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, time as time_of_day, timedelta
+
+from tortoise import Tortoise, run_async
+
+from db.settings import TORTOISE_ORM
+from models.account import AccountDetails
+from models.card import CardDetails
+from models.customer import OnboardedCustomer
+from models.iqama import IqamaRecord
+from models.portfolio import PortfolioSummary
+from models.transaction import TransactionSummary
+from utils.ingest import SCHEMAS, TIME_ZONE, ingest_rows
+from utils.security import hash_mpin, hash_password
+
+PASSWORD = "Bench@12345"
+MPIN = "123456"
+BATCH = 1000
+CITIES = ["Riyadh", "Jeddah", "Dammam", "Makkah", "Madinah", "Khobar", "Tabuk", "Abha"]
+MERCHANTS = ["Jarir", "Panda", "Tamimi", "Danube", "Extra", "Nahdi", "STC", "Careem", "Hungerstation", "Noon"]
+CATEGORIES = ["Shopping", "Groceries", "Dining", "Transport", "Bills", "Health", "Travel"]
+
+
+def iqama_id(i: int) -> str:
+    return f"2{i:09d}"
+
+
+def mobile_number(i: int) -> str:
+    return f"05{i:08d}"
+
+
+def account_number(i: int) -> int:
+    return 1_000_000 + i
+
+
+def fresh_start(customers: int, fresh: float) -> int:
+    """Index of the first iqama record left un-onboarded."""
+    return customers - int(customers * fresh)
+
+
+async def _bulk(model, objects) -> None:
+    for start in range(0, len(objects), BATCH):
+        await model.bulk_create(objects[start:start + BATCH])
+
+
+async def _reset(customers: int) -> None:
+    ids = [iqama_id(i) for i in range(customers)]
+    accounts = [account_number(i) for i in range(customers)]
+    for start in range(0, customers, BATCH):
+        chunk_ids, chunk_accounts = ids[start:start + BATCH], accounts[start:start + BATCH]
+        await OnboardedCustomer.filter(iqama_id__in=chunk_ids).delete()
+        await IqamaRecord.filter(iqama_id__in=chunk_ids).delete()
+        await PortfolioSummary.filter(iqama_id__in=[int(x) for x in chunk_ids]).delete()
+        await AccountDetails.filter(account_number__in=[str(a) for a in chunk_accounts]).delete()
+        await CardDetails.filter(account_number__in=chunk_accounts).delete()
+        await TransactionSummary.filter(account_number__in=chunk_accounts).delete()
+
+
+def _people(rnd: random.Random, args):
+    today = date.today()
+    password, mpin = hash_password(PASSWORD), hash_mpin(MPIN)  # bcrypt once, shared by everyone
+    onboarded_until = fresh_start(args.customers, args.fresh)
+    iqamas, customers, accounts, cards, portfolios, summaries = [], [], [], [], [], []
+
+    for i in range(args.customers):
+        dob = today - timedelta(days=rnd.randrange(18 * 365, 70 * 365))
+        issue = today - timedelta(days=rnd.randrange(30, 5 * 365))
+        expiry = today + timedelta(days=rnd.randrange(-60, 3 * 365))
+        name = f"Bench Customer {i}"
+        person = dict(
+            iqama_id=iqama_id(i), full_name=name, date_of_birth=dob, issue_date=issue, expiry_date=expiry,
+            gender=rnd.choice(["Male", "Female"]), nationality=rnd.choice(["Indian", "Egyptian", "Pakistani", "Filipino"]),
+            city=rnd.choice(CITIES), building_number=str(rnd.randrange(1000, 9999)), street="King Fahd Road",
+            neighbourhood="Al Olaya", postal_code=str(rnd.randrange(11000, 14000)), mobile_number=mobile_number(i),
+        )
+        iqamas.append(IqamaRecord(**person, age=(today - dob).days // 365))
+        if i >= onboarded_until:
+            continue
+
+        acct = account_number(i)
+        customers.append(OnboardedCustomer(
+            **person, dep_reference_number=f"DEP{i + 1:07d}", status="Account Successfully Created",
+            current_step="completed", device_id=f"bench-device-{i}", device_type="android",
+            password=password, mpin=mpin,
+        ))
+        balance = rnd.randrange(1_000, 500_000)
+        limit = rnd.choice([10_000, 20_000, 50_000])
+        accounts.append(AccountDetails(
+            account_number=str(acct), iban_number=f"SA03800000000{acct:011d}", account_balance=balance,
+            account_type="current", status="active", spending_limit=limit, utilised_limit=rnd.randrange(limit),
+            account_holder_name=name, swift_code="BENCHSAR", account_currency="SAR",
+            account_creation_date=issue,
+        ))
+        cards.append(CardDetails(
+            account_number=acct, debit_card_last_four_digits_1=f"{rnd.randrange(10000):04d}",
+            valid_thru_1=today + timedelta(days=rnd.randrange(30, 1500)),
+            debit_card_last_four_digits_2=f"{rnd.randrange(10000):04d}",
+            valid_thru_2=today + timedelta(days=rnd.randrange(30, 1500)),
+        ))
+        recent = [(today - timedelta(days=d)).isoformat() for d in sorted(rnd.sample(range(60), 10))]
+        portfolios.append(PortfolioSummary(
+            iqama_id=int(iqama_id(i)), cif_id=9_000_000 + i,
+            account_number_1=acct, account_balance_1=balance, account_type_1="current", status_1="active",
+            recent_transaction_type_1="Debit", recent_transaction_date_1=recent[0], recent_transactions_amount_1=120,
+            recent_transaction_type_2="Credit", recent_transactions_date_2=recent[1], recent_transactions_amount_2=5000,
+            recent_transactions_transaction_type_3="Debit", recent_transactions_date_3=recent[2], recent_transactions_amount_3=75,
+            bill_transaction_type_1="Bill", bill_due_date_1=recent[3], bill_service_type_1="Electricity", bill_amount_1=310,
+            bill_transaction_type_2="Bill", bill_due_date_2=recent[4], bill_service_type_2="Mobile", bill_amount_2=99,
+            recent_transfers_date_1=today - timedelta(days=3), recent_transfers_beneficiary_name_1="Beneficiary A",
+            recent_transfers_bank_name_1="SNB", recent_transfers_amount_1=1500,
+            recent_transfers_date_2=today - timedelta(days=9), recent_transfers_beneficiary_name_2="Beneficiary B",
+            recent_transfers_bank_name_2="Al Rajhi", recent_transfers_amount_2=800,
+            account_number_2=acct + 50_000_000, account_balance_2=rnd.randrange(100_000), account_type_2="savings",
+            status_2="active",
+        ))
+        summary = {"account_number": acct}
+        for n in range(1, 11):
+            amount_key = "recent_transaction_amount_3" if n == 3 else f"recent_transactions_amount_{n}"
+            type_key = "recent_transactions_transaction_type_3" if n == 3 else f"recent_transaction_type_{n}"
+            date_key = {2: "recent_transactions_date_2", 3: "recent_transactions_date_3"}.get(n, f"recent_transaction_date_{n}")
+            summary[type_key] = rnd.choice(["Debit", "Credit"])
+            summary[date_key] = date.fromisoformat(recent[n - 1]) if n >= 8 else recent[n - 1]
+            summary[amount_key] = rnd.randrange(10, 5000)
+        summaries.append(TransactionSummary(**summary))
+
+    return iqamas, customers, accounts, cards, portfolios, summaries
+
+
+def _transactions(rnd: random.Random, args, accounts: int):
+    """Rows as tuples in the ingest schema's field order, ready for COPY."""
+    schema = SCHEMAS["domestic"]
+    today = date.today()
+    rows = []
+    for n in range(args.transactions):
+        # Skewed: a few busy accounts, a long tail of quiet ones
+        acct = account_number(min(int(rnd.paretovariate(1.2)) - 1, accounts - 1) if rnd.random() < 0.2 else rnd.randrange(accounts))
+        debit = rnd.random() < 0.8
+        values = {
+            "transaction_id": None,
+            "account_number": acct,
+            "transaction_type": "Debit" if debit else "Credit",
+            "transaction_date": today - timedelta(days=rnd.randrange(args.days)),
+            "transaction_amount": round(rnd.uniform(1, 3000 if debit else 15000), 2),
+            "available_balance": round(rnd.uniform(0, 200000), 2),
+            # Aware, like parsed ingest rows: the column is TIMETZ
+            "time_of_transaction": time_of_day(rnd.randrange(24), rnd.randrange(60), tzinfo=TIME_ZONE),
+            "merchant": rnd.choice(MERCHANTS) if debit else None,
+            "reference_number": f"BD{args.seed:03d}{n:011d}",
+            "location_of_transaction": rnd.choice(CITIES),
+            "address": None,
+            "transaction_category": rnd.choice(CATEGORIES) if debit else "Salary",
+        }
+        rows.append(tuple(values[field] for field in schema.fields))
+    return schema, rows
+
+
+async def main(args):
+    await Tortoise.init(config=TORTOISE_ORM)
+    if os.getenv("GENERATE_SCHEMAS", "").lower() in ("1", "true", "yes"):
+        await Tortoise.generate_schemas()  # throwaway DB without aerich migrations
+    rnd = random.Random(args.seed)
+    report = {"seed": args.seed, "customers": args.customers}
+
+    started = time.perf_counter()
+    await _reset(args.customers)
+    iqamas, customers, accounts, cards, portfolios, summaries = _people(rnd, args)
+    for model, objects in (
+        (IqamaRecord, iqamas), (OnboardedCustomer, customers), (AccountDetails, accounts),
+        (CardDetails, cards), (PortfolioSummary, portfolios), (TransactionSummary, summaries),
+    ):
+        await _bulk(model, objects)
+        report[model._meta.db_table] = len(objects)
+    report["people_seconds"] = round(time.perf_counter() - started, 1)
+
+    if args.transactions:
+        started = time.perf_counter()
+        schema, rows = _transactions(rnd, args, len(accounts))
+        loaded = await ingest_rows(schema, rows)
+        report["transaction_history"] = loaded["inserted"]
+        report["transactions_skipped"] = loaded["skipped"]
+        report["transactions_seconds"] = round(time.perf_counter() - started, 1)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=2 * 365, help="spread of transaction dates")
+    parser.add_argument("--fresh", type=float, default=0.2, help="share of iqama records left for onboarding")
+    parser.add_argument("--seed", type=int, default=42)
+    run_async(main(parser.parse_args()))
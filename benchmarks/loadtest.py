@@ -0,0 +1,297 @@
+# benchmarks/loadtest.py
+"""Scripted load test of the main user flows against a running server.
+
+    python -m benchmarks.datagen --customers 10000 --transactions 2000000
+    python serve.py &
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 --customers 10000 \
+        --users 100 --duration 60 --out benchmarks/results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.loadtest --compare benchmarks/results/abc123.json benchmarks/results/def456.json
+
+Virtual users loop over weighted flows (onboarding, login, dashboard,
+transaction search) with a seeded RNG, over plain asyncio keep-alive
+connections so the client itself stays cheap. Results are reported per
+route template with throughput and p50/p95/p99 latency; the JSON layout is
+versioned (RESULTS_VERSION) so files from different commits can be diffed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.datagen import MERCHANTS, MPIN, PASSWORD, account_number, fresh_start, iqama_id, mobile_number
+
+RESULTS_VERSION = 1
+
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client (JSON in, status + body out)."""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body=None, headers=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = b"" if body is None else json.dumps(body).encode()
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(payload)}"]
+        if body is not None:
+            head.append("Content-Type: application/json")
+        head += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + payload)
+        try:
+            return await self._response()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.close()
+            raise
+
+    async def _response(self):
+        status_line = await self.reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        length, chunked, close = 0, False, False
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding" and "chunked" in value:
+                chunked = True
+            elif name == "connection" and value == "close":
+                close = True
+        if chunked:
+            body = bytearray()
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readuntil(b"\r\n")  # end of (empty) trailers
+                    break
+                body += await self.reader.readexactly(size)
+                await self.reader.readexactly(2)
+            body = bytes(body)
+        else:
+            body = await self.reader.readexactly(length)
+        if close:
+            self.close()
+        return status, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}  # route -> [seconds]
+        self.errors = {}     # route -> count
+
+    def add(self, route: str, seconds: float, ok: bool):
+        self.latencies.setdefault(route, []).append(seconds)
+        if not ok:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+
+class User:
+    def __init__(self, uid: int, args, conn: Connection, recorder: Recorder):
+        self.rnd = random.Random(args.seed * 100_003 + uid)
+        self.args, self.conn, self.recorder = args, conn, recorder
+        self.onboarded = fresh_start(args.customers, args.fresh)
+
+    async def call(self, route: str, method: str, path: str, body=None, expect=(200,), headers=None):
+        started = time.perf_counter()
+        try:
+            status, payload = await self.conn.request(method, path, body, headers)
+        except (OSError, asyncio.IncompleteReadError):
+            status, payload = 0, b""
+        self.recorder.add(route, time.perf_counter() - started, status in expect)
+        return status, payload
+
+    def customer(self) -> int:
+        return self.rnd.randrange(self.onboarded)
+
+    async def onboarding(self):
+        # Customers beyond `onboarded` exist only in iqama_records
+        i = self.rnd.randrange(self.onboarded, self.args.customers) if self.onboarded < self.args.customers else self.customer()
+        iqama = iqama_id(i)
+        await self.call("POST /iqama/validate-iqama", "POST", "/iqama/validate-iqama",
+                        {"iqama_id": iqama, "mobile_number": mobile_number(i)}, expect=(200, 400))
+        device = f"load-{self.rnd.randrange(1 << 30)}"
+        await self.call("POST /customers/start", "POST", "/customers/start",
+                        {"iqama_id": iqama, "device_id": device, "device_type": "android",
+                         "location": "Riyadh", "current_step": "nafath"}, expect=(200, 400))
+        await self.call("PUT /customers/{iqama_id}", "PUT", f"/customers/{iqama}",
+                        {"city": "Riyadh", "current_step": "address", "pep_flag": "No"},
+                        expect=(200, 403, 404), headers={"device_id": device})
+
+    async def login(self):
+        i = self.customer()
+        await self.call("POST /customers/verify-password", "POST", "/customers/verify-password",
+                        {"iqama_id": iqama_id(i), "password": PASSWORD})
+        await self.call("POST /verify-mpin", "POST", "/verify-mpin", {"iqama_id": iqama_id(i), "mpin": MPIN})
+
+    async def dashboard(self):
+        i = self.customer()
+        acct = account_number(i)
+        await self.call("GET /theme-settings", "GET", "/theme-settings", expect=(200, 404))
+        await self.call("GET /api/portfolio-summary/{iqama_id}", "GET", f"/api/portfolio-summary/{iqama_id(i)}")
+        await self.call("GET /api/account-details/{account_number}", "GET", f"/api/account-details/{acct}")
+        await self.call("GET /api/card-details/{account_number}", "GET", f"/api/card-details/{acct}")
+        await self.call("GET /api/transaction-summary/{account_number}", "GET", f"/api/transaction-summary/{acct}")
+
+    async def transaction_search(self):
+        acct = account_number(self.customer())
+        to_date = date.today() - timedelta(days=self.rnd.randrange(180))
+        params = {"account_number": acct, "from_date": to_date - timedelta(days=90), "to_date": to_date, "limit": 20}
+        if self.rnd.random() < 0.3:
+            params["merchant"] = self.rnd.choice(MERCHANTS)
+        await self.call("GET /api/transactions", "GET", "/api/transactions?" + urlencode(params))
+        summary = {"from_date": to_date - timedelta(days=30), "to_date": to_date}
+        await self.call("GET /api/accounts/{account_number}/transactions/daily-summary", "GET",
+                        f"/api/accounts/{acct}/transactions/daily-summary?" + urlencode(summary))
+
+    async def run(self, deadline: float, flows, weights):
+        while time.perf_counter() < deadline:
+            flow = self.rnd.choices(flows, weights)[0]
+            await getattr(self, flow)()
+        self.conn.close()
+
+
+FLOWS = {"onboarding": 1, "login": 2, "dashboard": 5, "transaction_search": 3}
+
+
+def percentile(sorted_values, q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    routes = {}
+    for route in sorted(recorder.latencies):
+        values = sorted(recorder.latencies[route])
+        routes[route] = {
+            "requests": len(values),
+            "errors": recorder.errors.get(route, 0),
+            "rps": round(len(values) / elapsed, 1),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2),
+        }
+    everything = sorted(v for values in recorder.latencies.values() for v in values)
+    totals = {
+        "requests": len(everything),
+        "errors": sum(recorder.errors.values()),
+        "rps": round(len(everything) / elapsed, 1),
+        "p50_ms": round(percentile(everything, 0.50) * 1000, 2) if everything else None,
+        "p95_ms": round(percentile(everything, 0.95) * 1000, 2) if everything else None,
+        "p99_ms": round(percentile(everything, 0.99) * 1000, 2) if everything else None,
+    }
+    return {"totals": totals, "routes": routes}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+async def run(args) -> dict:
+    url = urlsplit(args.base_url)
+    flows = [f for f in args.flows.split(",")]
+    weights = [FLOWS[f] for f in flows]
+    recorder = Recorder()
+
+    probe = Connection(url.hostname, url.port or 80)
+    try:
+        status, _ = await probe.request("GET", "/")
+    except OSError as exc:
+        raise SystemExit(f"{args.base_url} is not reachable: {exc}")
+    probe.close()
+    if status != 200:
+        raise SystemExit(f"{args.base_url} answered {status} on GET /")
+
+    # Warm-up requests are not recorded
+    if args.warmup:
+        warm = [User(-1 - n, args, Connection(url.hostname, url.port or 80), Recorder()) for n in range(args.users)]
+        await asyncio.gather(*(u.run(time.perf_counter() + args.warmup, flows, weights) for u in warm))
+
+    users = [User(n, args, Connection(url.hostname, url.port or 80), recorder) for n in range(args.users)]
+    started = time.perf_counter()
+    await asyncio.gather(*(u.run(started + args.duration, flows, weights) for u in users))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "version": RESULTS_VERSION,
+        "benchmark": "loadtest",
+        "commit": _git_commit(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "host": {"python": platform.python_version(), "machine": platform.machine()},
+        "config": {
+            "base_url": args.base_url, "users": args.users, "duration": args.duration, "warmup": args.warmup,
+            "customers": args.customers, "fresh": args.fresh, "seed": args.seed, "flows": dict(zip(flows, weights)),
+        },
+        "elapsed_seconds": round(elapsed, 2),
+        **summarize(recorder, elapsed),
+    }
+
+
+def compare(old_path: str, new_path: str) -> None:
+    with open(old_path) as fh:
+        old = json.load(fh)
+    with open(new_path) as fh:
+        new = json.load(fh)
+    print(f"{'route':60} {'rps':>16} {'p50_ms':>18} {'p99_ms':>18}")
+    for route in sorted(set(old["routes"]) | set(new["routes"])) + ["<totals>"]:
+        a = old["totals"] if route == "<totals>" else old["routes"].get(route)
+        b = new["totals"] if route == "<totals>" else new["routes"].get(route)
+        if not a or not b:
+            print(f"{route:60} {'only in ' + ('new' if b else 'old'):>16}")
+            continue
+        cells = []
+        for key in ("rps", "p50_ms", "p99_ms"):
+            change = (b[key] - a[key]) / a[key] * 100 if a[key] else 0.0
+            cells.append(f"{b[key]:>9} ({change:+5.1f}%)")
+        print(f"{route:60} {cells[0]:>16} {cells[1]:>18} {cells[2]:>18}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=50, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unrecorded seconds before measuring")
+    parser.add_argument("--customers", type=int, default=10_000, help="same value given to datagen")
+    parser.add_argument("--fresh", type=float, default=0.2, help="same value given to datagen")
+    parser.add_argument("--flows", default=",".join(FLOWS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write the results JSON here")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="diff two results files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    results = asyncio.run(run(args))
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    print(text)
+    if results["totals"]["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
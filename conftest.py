@@ -0,0 +1,25 @@
+# conftest.py
+"""Test setup: a throwaway in-memory SQLite database and the query-budget plugin.
+
+    pip install pytest httpx    # not in requirements.txt: test-only
+    python -m pytest -q
+"""
+import os
+
+# Set before the app (and db/settings.py) is imported; never a real database
+os.environ["DATABASE_URL"] = "sqlite://:memory:"
+os.environ["GENERATE_SCHEMAS"] = "1"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pytest
+from fastapi.testclient import TestClient
+
+pytest_plugins = ["utils.pytest_plugin"]
+
+
+@pytest.fixture
+def client():
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
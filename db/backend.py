@@ -0,0 +1,128 @@
+# db/backend.py
+# asyncpg engine that records how long callers wait for a pool connection and
+# how long each query takes. Selected in db/settings.py via "engine": "db.backend".
+import time
+from typing import Dict
+
+from tortoise.backends.asyncpg.client import AsyncpgDBClient, TransactionWrapper
+from tortoise.backends.base.client import TransactionContextPooled, NestedTransactionContext
+
+from utils import metrics, query_trace
+
+
+class PoolStats:
+    def __init__(self):
+        self.pool = None
+        self.min_size = self.max_size = 0
+        self.waiting = 0
+        self.acquires = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def snapshot(self) -> dict:
+        size = self.pool.get_size() if self.pool else 0
+        idle = self.pool.get_idle_size() if self.pool else 0
+        return {
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "waiting": self.waiting,
+            "acquires": self.acquires,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+        }
+
+
+# connection name -> stats, read by the admin/metrics endpoints
+POOL_STATS: Dict[str, PoolStats] = {}
+
+
+class TimedPool:
+    """Proxy for asyncpg.Pool that times acquire(); everything else passes through."""
+
+    def __init__(self, pool, stats: PoolStats):
+        self._pool = pool
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+    async def acquire(self, *, timeout=None):
+        stats = self._stats
+        stats.waiting += 1
+        started = time.perf_counter()
+        try:
+            return await self._pool.acquire(timeout=timeout)
+        finally:
+            waited = time.perf_counter() - started
+            stats.waiting -= 1
+            stats.acquires += 1
+            stats.wait_seconds_total += waited
+            if waited > stats.wait_seconds_max:
+                stats.wait_seconds_max = waited
+
+
+class QueryTimingMixin:
+    """Reports every execute_* call to utils.metrics and utils.query_trace."""
+
+    def _record(self, query, values, seconds):
+        metrics.record_query(seconds)
+        query_trace.record(self, query, values, seconds)
+
+    async def execute_insert(self, query, values):
+        started = time.perf_counter()
+        try:
+            return await super().execute_insert(query, values)
+        finally:
+            self._record(query, values, time.perf_counter() - started)
+
+    async def execute_many(self, query, values):
+        started = time.perf_counter()
+        try:
+            return await super().execute_many(query, values)
+        finally:
+            # The first row's parameters are enough for a plan
+            self._record(query, values[0] if values else None, time.perf_counter() - started)
+
+    async def execute_query(self, query, values=None):
+        started = time.perf_counter()
+        try:
+            return await super().execute_query(query, values)
+        finally:
+            self._record(query, values, time.perf_counter() - started)
+
+    async def execute_query_dict(self, query, values=None):
+        started = time.perf_counter()
+        try:
+            return await super().execute_query_dict(query, values)
+        finally:
+            self._record(query, values, time.perf_counter() - started)
+
+    async def execute_script(self, query):
+        started = time.perf_counter()
+        try:
+            return await super().execute_script(query)
+        finally:
+            self._record(query, None, time.perf_counter() - started)
+
+
+class InstrumentedTransactionWrapper(QueryTimingMixin, TransactionWrapper):
+    def _in_transaction(self):
+        return NestedTransactionContext(InstrumentedTransactionWrapper(self))
+
+
+class InstrumentedAsyncpgDBClient(QueryTimingMixin, AsyncpgDBClient):
+    def _in_transaction(self):
+        return TransactionContextPooled(InstrumentedTransactionWrapper(self), self._pool_init_lock)
+
+    async def create_pool(self, **kwargs):
+        pool = await super().create_pool(**kwargs)
+        stats = POOL_STATS.setdefault(self.connection_name, PoolStats())
+        stats.pool = pool
+        stats.min_size, stats.max_size = self.pool_minsize, self.pool_maxsize
+        return TimedPool(pool, stats)
+
+
+client_class = InstrumentedAsyncpgDBClient
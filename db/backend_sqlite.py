@@ -0,0 +1,20 @@
+# db/backend_sqlite.py
+# SQLite engine (local dev) with the same per-query timing as db/backend.py.
+# Selected in db/settings.py via "engine": "db.backend_sqlite".
+from tortoise.backends.base.client import NestedTransactionContext
+from tortoise.backends.sqlite.client import SqliteClient, SqliteTransactionContext, SqliteTransactionWrapper
+
+from db.backend import QueryTimingMixin
+
+
+class InstrumentedSqliteTransactionWrapper(QueryTimingMixin, SqliteTransactionWrapper):
+    def _in_transaction(self):
+        return NestedTransactionContext(InstrumentedSqliteTransactionWrapper(self))
+
+
+class InstrumentedSqliteClient(QueryTimingMixin, SqliteClient):
+    def _in_transaction(self):
+        return SqliteTransactionContext(InstrumentedSqliteTransactionWrapper(self), self._lock)
+
+
+client_class = InstrumentedSqliteClient
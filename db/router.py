@@ -0,0 +1,184 @@
+# db/router.py
+"""Send read-only requests to the `replica` connection.
+
+Enabled by setting DATABASE_REPLICA_URL (see db/settings.py). Nothing changes
+for writes: they always use `default`. A GET/HEAD request reads from the
+replica unless
+
+  * the client wrote something in the last RYW_SECONDS (the `db_ryw` cookie
+    set by ReplicaRoutingMiddleware after any successful POST/PUT/PATCH/DELETE)
+    or sends `X-Read-Your-Writes: 1`,
+  * the endpoint is decorated with `@read_from_primary`,
+  * the query runs inside a transaction on `default`,
+  * the last health check failed or saw more than REPLICA_MAX_LAG_SECONDS lag.
+
+ORM reads are routed by ReplicaRouter (Tortoise "routers" config); raw SQL
+should take its connection from `read_connection()`.
+
+Two local databases are enough to try it out:
+
+    cp /tmp/primary.db /tmp/replica.db
+    DATABASE_URL=sqlite:///tmp/primary.db DATABASE_REPLICA_URL=sqlite:///tmp/replica.db python serve.py
+"""
+import asyncio
+import functools
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from tortoise import connections
+from tortoise.backends.base.client import TransactionalDBClient
+from tortoise.exceptions import DBConnectionError
+
+logger = logging.getLogger(__name__)
+
+PRIMARY, REPLICA = "default", "replica"
+RYW_COOKIE = "db_ryw"
+RYW_HEADER = b"x-read-your-writes"
+RYW_SECONDS = int(os.getenv("RYW_SECONDS", "10"))
+MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "5"))
+
+REPLICA_CONFIGURED = bool(os.getenv("DATABASE_REPLICA_URL"))
+
+# Connection name reads should use in the current request (None = primary)
+_read_target: ContextVar = ContextVar("read_target", default=None)
+
+# Last health check result, shown at /admin/db/replica
+replica_state = {"healthy": False, "lag_seconds": None, "checked_at": None, "error": None}
+
+
+def _target():
+    target = _read_target.get()
+    if target is None or not replica_state["healthy"]:
+        return None
+    # Reads inside a transaction must see its own uncommitted writes
+    if isinstance(connections.get(PRIMARY), TransactionalDBClient):
+        return None
+    return target
+
+
+class ReplicaRouter:
+    def db_for_read(self, model):
+        return _target()
+
+    def db_for_write(self, model):
+        return None  # falls back to the model's default connection
+
+
+def read_connection():
+    """Connection for raw read-only SQL in the current request."""
+    return connections.get(_target() or PRIMARY)
+
+
+@contextmanager
+def replica_reads():
+    """Let background jobs (no request, so no middleware) read from the replica."""
+    token = _read_target.set(REPLICA if REPLICA_CONFIGURED else None)
+    try:
+        yield
+    finally:
+        _read_target.reset(token)
+
+
+def read_from_primary(endpoint):
+    """For GET endpoints whose answer must never be stale (e.g. security checks)."""
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        token = _read_target.set(None)
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            _read_target.reset(token)
+    return wrapper
+
+
+def _mark_unhealthy(error: str) -> None:
+    if replica_state["healthy"]:
+        logger.warning("Replica unhealthy, reading from primary", extra={"error": error})
+    replica_state.update(healthy=False, error=error, checked_at=time.time())
+
+
+async def check_replica() -> dict:
+    """One round trip to the replica; on Postgres also measures replay lag."""
+    try:
+        conn = connections.get(REPLICA)
+        lag = None
+        if conn.capabilities.dialect == "postgres":
+            rows = await conn.execute_query_dict(
+                "SELECT CASE WHEN pg_is_in_recovery() "
+                "THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END AS lag"
+            )
+            lag = rows[0]["lag"]
+            lag = float(lag) if lag is not None else None
+        else:
+            await conn.execute_query("SELECT 1")
+    except Exception as exc:  # any failure means "don't read from it"
+        _mark_unhealthy(f"{type(exc).__name__}: {exc}")
+        return replica_state
+
+    if lag is not None and lag > MAX_LAG_SECONDS:
+        _mark_unhealthy(f"replication lag {lag:.1f}s > {MAX_LAG_SECONDS}s")
+        replica_state["lag_seconds"] = round(lag, 3)
+        return replica_state
+
+    if not replica_state["healthy"]:
+        logger.info("Replica healthy, routing reads to it", extra={"lag_seconds": lag})
+    replica_state.update(healthy=True, lag_seconds=round(lag, 3) if lag is not None else None,
+                         checked_at=time.time(), error=None)
+    return replica_state
+
+
+async def run_replica_health_job() -> None:
+    while True:
+        await check_replica()
+        await asyncio.sleep(HEALTH_INTERVAL)
+
+
+def _wants_primary(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == RYW_HEADER and value not in (b"", b"0"):
+            return True
+        if name == b"cookie" and RYW_COOKIE.encode() in value:
+            for part in value.decode("latin-1").split(";"):
+                key, _, expires = part.strip().partition("=")
+                if key == RYW_COOKIE:
+                    try:
+                        return float(expires) > time.time()
+                    except ValueError:
+                        return False
+    return False
+
+
+class ReplicaRoutingMiddleware:
+    """Picks the read connection per request and sets the read-your-writes cookie."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not REPLICA_CONFIGURED:
+            return await self.app(scope, receive, send)
+
+        if scope["method"] in ("GET", "HEAD"):
+            if _wants_primary(scope):
+                return await self.app(scope, receive, send)
+            token = _read_target.set(REPLICA)
+            try:
+                return await self.app(scope, receive, send)
+            except (DBConnectionError, OSError) as exc:
+                # Don't wait for the next health check to stop using a dead replica
+                _mark_unhealthy(f"{type(exc).__name__}: {exc}")
+                raise
+            finally:
+                _read_target.reset(token)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = f"{RYW_COOKIE}={time.time() + RYW_SECONDS:.0f}; Max-Age={RYW_SECONDS}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
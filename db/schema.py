@@ -0,0 +1,103 @@
+# db/schema.py
+import logging
+import os
+from pathlib import Path
+
+from tortoise import Tortoise, connections
+
+logger = logging.getLogger(__name__)
+
+APP = "models"
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations" / APP
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def latest_migration():
+    """File name of the newest aerich migration shipped with the code."""
+    versions = [p.name for p in MIGRATIONS_DIR.glob("*_*.py") if p.name.split("_", 1)[0].isdigit()]
+    return max(versions, key=lambda name: int(name.split("_", 1)[0]), default=None)
+
+
+async def applied_migration():
+    """Version recorded by `aerich upgrade`, or None if aerich never ran here."""
+    from aerich.models import Aerich
+    from tortoise.exceptions import OperationalError
+
+    try:
+        row = await Aerich.filter(app=APP).order_by("-id").first()
+    except OperationalError:
+        return None
+    return row.version if row else None
+
+
+async def migration_status():
+    expected, applied = latest_migration(), await applied_migration()
+    return {"expected": expected, "applied": applied, "up_to_date": expected == applied}
+
+
+async def verify_schema_version(mode=None):
+    """Startup check: one indexed SELECT instead of introspecting every table.
+
+    SCHEMA_CHECK=strict (default) refuses to start when the database is not at
+    the newest migration, `warn` only logs, `off` skips the query.
+    """
+    mode = (mode or os.getenv("SCHEMA_CHECK", "strict")).lower()
+    if mode == "off":
+        return None
+    status = await migration_status()
+    if not status["up_to_date"]:
+        message = (
+            f"Database schema is at {status['applied'] or 'no aerich version'}, code expects "
+            f"{status['expected']}; run `aerich upgrade` (or `python -m scripts.check_schema` for details)"
+        )
+        if mode == "strict":
+            raise SchemaVersionError(message)
+        logger.warning(message)
+    return status
+
+
+async def _live_columns(conn, table):
+    """{column: nullable} for `table`, or None if it does not exist."""
+    if conn.schema_generator.DIALECT == "sqlite":
+        rows = await conn.execute_query_dict(f'PRAGMA table_info("{table}")')
+        return {row["name"]: not row["notnull"] and not row["pk"] for row in rows} or None
+    rows = await conn.execute_query_dict(
+        "SELECT column_name, is_nullable FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = $1",
+        [table],
+    )
+    return {row["column_name"]: row["is_nullable"] == "YES" for row in rows} or None
+
+
+async def diff_schema():
+    """Compare every registered model with the live tables.
+
+    Returns a list of problems, each a dict with `table`, `issue` and, where it
+    applies, `column`. An empty list means models and database agree.
+    """
+    conn = connections.get("default")
+    problems = []
+    for model in Tortoise.apps[APP].values():
+        meta = model._meta
+        live = await _live_columns(conn, meta.db_table)
+        if live is None:
+            problems.append({"table": meta.db_table, "issue": "missing table"})
+            continue
+
+        expected = {}
+        for name, column in meta.fields_db_projection.items():
+            field = meta.fields_map[name]
+            expected[column] = bool(field.null) and not field.pk
+
+        for column, nullable in expected.items():
+            if column not in live:
+                problems.append({"table": meta.db_table, "column": column, "issue": "missing column"})
+            elif live[column] != nullable:
+                issue = "nullable in database" if live[column] else "NOT NULL in database"
+                problems.append({"table": meta.db_table, "column": column, "issue": issue})
+        for column in live.keys() - expected.keys():
+            problems.append({"table": meta.db_table, "column": column, "issue": "not in model"})
+    return problems
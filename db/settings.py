@@ -1,11 +1,56 @@
 import os
 from dotenv import load_dotenv
+from tortoise.backends.base.config_generator import expand_db_url
 
 load_dotenv(dotenv_path=".env")
 
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _connection(url):
+    if not url:
+        return url
+    if url.startswith("sqlite"):
+        # Local dev: stock SQLite client plus the query timings shown at /metrics
+        connection = expand_db_url(url)
+        connection["engine"] = "db.backend_sqlite"
+        return connection
+    if not url.startswith(("postgres", "asyncpg")):
+        return url
+
+    connection = expand_db_url(url)
+    connection["engine"] = "db.backend"  # ✅ asyncpg + pool wait/in-use stats
+
+    # Share the server-side connection budget between all worker processes
+    credentials = connection["credentials"]
+    workers = _env_int("WEB_CONCURRENCY", 1)
+    budget = _env_int("DB_MAX_CONNECTIONS", 80)
+    maxsize = int(credentials.get("maxsize") or _env_int("DB_POOL_MAX_SIZE", max(2, budget // workers)))
+    minsize = int(credentials.get("minsize") or _env_int("DB_POOL_MIN_SIZE", max(1, maxsize // 4)))
+
+    settings = {
+        "minsize": min(minsize, maxsize),
+        "maxsize": maxsize,
+        # Prepared statements cached per connection; set 0 behind PgBouncer (transaction mode)
+        "statement_cache_size": _env_int("DB_STATEMENT_CACHE_SIZE", 512),
+        "command_timeout": float(os.getenv("DB_COMMAND_TIMEOUT", "30")),
+        # Recycle idle connections, and every connection after this many queries
+        "max_inactive_connection_lifetime": float(os.getenv("DB_MAX_INACTIVE_CONNECTION_LIFETIME", "300")),
+        "max_queries": _env_int("DB_MAX_QUERIES", 50000),
+    }
+    for key, value in settings.items():
+        # Anything else given explicitly in the URL query string wins
+        credentials.setdefault(key, value)
+    credentials.update(minsize=settings["minsize"], maxsize=maxsize)
+    return connection
+
+
 TORTOISE_ORM = {
     "connections": {
-        "default": os.getenv("DATABASE_URL"),
+        "default": _connection(os.getenv("DATABASE_URL")),
     },
     "apps": {
         "models": {
@@ -14,6 +59,9 @@ TORTOISE_ORM = {
             "models.iqama",
             "models.portfolio",  # ✅ Portfolio summary
             "models.account", # ✅ Account details
+            "models.authorization",  # ✅ Spending-limit authorizations (idempotency keys)
+            "models.idempotency",  # ✅ Idempotency-Key replays for customer mutations
+            "models.notification",  # ✅ Iqama expiry reminders (work items)
             "models.card",  # ✅ Card Details
             "models.transaction",  # ✅ transaction summary
             "models.transaction_history",  # ✅ Transaction history
@@ -29,3 +77,23 @@ TORTOISE_ORM = {
     "use_tz": False,
     "timezone": "UTC",  # This is still needed even if use_tz=False
 }
+
+# asyncpg.connect() arguments; the rest of the credentials only make sense for a pool
+_CONNECT_KEYS = ("host", "port", "user", "password", "database", "ssl", "direct_tls", "server_settings")
+
+
+def asyncpg_connect_kwargs(name="default"):
+    """Arguments for a standalone asyncpg connection (LISTEN, advisory locks) outside the pool.
+
+    The same credentials Tortoise connects with, query string options (ssl=...) included.
+    """
+    credentials = TORTOISE_ORM["connections"][name]["credentials"]
+    kwargs = {key: credentials[key] for key in _CONNECT_KEYS if credentials.get(key) is not None}
+    kwargs["port"] = int(kwargs.get("port", 5432))
+    return kwargs
+
+
+# ✅ Optional read replica: read-only requests are routed to it (see db/router.py)
+if os.getenv("DATABASE_REPLICA_URL"):
+    TORTOISE_ORM["connections"]["replica"] = _connection(os.getenv("DATABASE_REPLICA_URL"))
+    TORTOISE_ORM["routers"] = ["db.router.ReplicaRouter"]
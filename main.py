@@ -1,5 +1,8 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from tortoise.contrib.fastapi import register_tortoise
+from tortoise import connections
+from tortoise.contrib.fastapi import RegisterTortoise
 from models.iqama import IqamaRecord
 from db.settings import TORTOISE_ORM
 from routes import customers  # ✅ Import your new router
@@ -18,11 +21,90 @@ from routes import card_details
 from routes import transaction_summary
 from routes import transactions 
 from routes import international_transactions
+from routes import metrics
+from utils.partitions import run_partition_job
+from utils.funnel import run_funnel_job
+from utils.sweeper import run_sweeper_job
+from utils.idempotency import IdempotencyMiddleware, run_idempotency_cleanup_job
+from utils.age import age_on, run_age_job
+from utils.expiry import run_expiry_notification_job
+from utils.invalidation import bus as invalidation_bus
+from utils.leader import leader
+from db.schema import verify_schema_version
+from db.router import REPLICA_CONFIGURED, ReplicaRoutingMiddleware, check_replica, run_replica_health_job
+from utils.query_trace import QueryTraceMiddleware
+from utils.logging_setup import setup_logging
+from utils.compression import CompressionMiddleware
+from utils.responses import FastJSONResponse
+from utils.metrics import MetricsMiddleware, flush as flush_metrics, run_flush_job as run_metrics_flush_job
+import asyncio
 
 load_dotenv(dotenv_path=".env")
-print("Using DB:", os.getenv("DATABASE_URL"))
+setup_logging()  # ✅ JSON logs via a background thread; never blocks the event loop
+logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# ✅ Tables come from `aerich upgrade`; at boot only check the migration version
+GENERATE_SCHEMAS = os.getenv("GENERATE_SCHEMAS", "").lower() in ("1", "true", "yes")
+
+# ✅ Everything that touches the DB happens here, once per worker, not at import
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ✅ Theme routes are built here: their schemas are generated on first use, not at import
+    theme_settings.include_routes(app)
+    async with RegisterTortoise(
+        app,
+        config=TORTOISE_ORM,
+        generate_schemas=GENERATE_SCHEMAS,  # set GENERATE_SCHEMAS=1 for a throwaway local DB
+        add_exception_handlers=True,
+    ):
+        logger.info("Connected to %s database (pid %s)", connections.get("default").capabilities.dialect, os.getpid())
+        if not GENERATE_SCHEMAS:  # local dev / SQLite creates tables itself
+            await verify_schema_version()
+
+        # Cross-worker cache invalidation (LISTEN/NOTIFY on Postgres)
+        await invalidation_bus.start()
+        # One worker (advisory lock on Postgres) runs the sweeper, age refresh and expiry reminders
+        await leader.start()
+        # Keep monthly transaction partitions created ahead of time
+        partition_job = asyncio.create_task(run_partition_job())
+        # Share this worker's counters with the others for /metrics
+        metrics_job = asyncio.create_task(run_metrics_flush_job())
+        # Admin funnel stats recomputed off the request path while the dashboard is open
+        funnel_job = asyncio.create_task(run_funnel_job())
+        # Archive onboarding sessions abandoned for SWEEP_AFTER_DAYS, in small batches (only once SWEEP_MODE is set)
+        sweeper_job = asyncio.create_task(run_sweeper_job())
+        # Drop Idempotency-Key responses past their replay window
+        idempotency_job = asyncio.create_task(run_idempotency_cleanup_job())
+        # Stored ages follow birthdays (job leader only; one UPDATE per table, changed rows only)
+        age_job = asyncio.create_task(run_age_job())
+        # Pending reminders for iqamas expiring within EXPIRY_NOTIFY_DAYS, a chunk per INSERT (job leader only)
+        expiry_job = asyncio.create_task(run_expiry_notification_job())
+        # Reads go to the replica only while it answers and keeps up
+        replica_job = None
+        if REPLICA_CONFIGURED:
+            await check_replica()
+            replica_job = asyncio.create_task(run_replica_health_job())
+        try:
+            yield
+        finally:
+            partition_job.cancel()
+            metrics_job.cancel()
+            funnel_job.cancel()
+            sweeper_job.cancel()
+            idempotency_job.cancel()
+            age_job.cancel()
+            expiry_job.cancel()
+            if replica_job:
+                replica_job.cancel()
+            flush_metrics(final=True)
+            await leader.stop()
+            await invalidation_bus.stop()
+
+# ✅ orjson renders every JSON body (dates, times and Decimals included)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# ✅ Retries carrying an Idempotency-Key get the stored response (inside CORS, so replays keep its headers)
+app.add_middleware(IdempotencyMiddleware)
 
 # ✅ Step 1.2: Define allowed origins and add the middleware
 # This should be placed right after `app = FastAPI()`
@@ -44,12 +126,21 @@ app.add_middleware(
     # ... rest of the middleware config ...
 )
 
+# ✅ Per-route request counts, latency histograms and DB time (served at /metrics)
+app.add_middleware(MetricsMiddleware)
+# ✅ Logs slow queries with EXPLAIN plans and repeated statements (N+1) per request
+app.add_middleware(QueryTraceMiddleware)
+# ✅ GET/HEAD read from the replica (DATABASE_REPLICA_URL) unless the client just wrote
+app.add_middleware(ReplicaRoutingMiddleware)
+# ✅ gzip/brotli by Accept-Encoding for bodies over COMPRESS_MIN_BYTES, streams included
+app.add_middleware(CompressionMiddleware)
+
 # ... (the rest of your main.py file) ...
 
 # ✅ Include customers router
 app.include_router(customers.router, prefix="/customers", tags=["Customers"])
 app.include_router(admin.router, prefix="/admin", tags=["Admin"])
-app.include_router(theme_settings.router)
+# Theme settings routes are added in the lifespan (theme_settings.include_routes)
 app.include_router(absher.router, prefix="/admin", tags=["Absher"])
 app.include_router(iqama.router, prefix="/iqama")
 app.include_router(mpin.router)
@@ -59,6 +150,7 @@ app.include_router(card_details.router, prefix="/api")
 app.include_router(transaction_summary.router, prefix="/api")
 app.include_router(transactions.router, prefix="/api")
 app.include_router(international_transactions.router, prefix="/api")
+app.include_router(metrics.router)
 
 @app.get("/")
 async def root():
@@ -91,12 +183,5 @@ async def get_iqama_details(iqama_id: str):
     record = await IqamaRecord.get_or_none(iqama_id=iqama_id)
     if not record:
         raise HTTPException(status_code=404, detail="Iqama ID not found")
+    record.age = age_on(record.date_of_birth)  # the stored column lags birthdays
     return record
-
-# ✅ Register Tortoise ORM
-register_tortoise(
-    app,
-    config=TORTOISE_ORM,
-    generate_schemas=True,  # ✅ Change this to True temporarily,
-    add_exception_handlers=True,
-)
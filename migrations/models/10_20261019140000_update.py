@@ -0,0 +1,12 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Admin age filters are translated to date_of_birth ranges (utils/age.py)
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_onboarded_customers_dob" ON "onboarded_customers" ("date_of_birth");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_onboarded_customers_dob";"""
@@ -0,0 +1,28 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Expiring-iqama report/export walk (expiry_date, iqama_id) in order; the
+    # notification job writes one work item per iqama expiry (utils/expiry.py)
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_onboarded_customers_expiry" ON "onboarded_customers" ("expiry_date", "iqama_id");
+        CREATE INDEX IF NOT EXISTS "idx_iqama_records_expiry" ON "iqama_records" ("expiry_date");
+        CREATE TABLE IF NOT EXISTS "iqama_expiry_notifications" (
+    "id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "iqama_id" VARCHAR(10) NOT NULL,
+    "expiry_date" DATE NOT NULL,
+    "mobile_number" VARCHAR(15),
+    "status" VARCHAR(20) NOT NULL DEFAULT 'pending',
+    "created_at" TIMESTAMPTZ NOT NULL,
+    "sent_at" TIMESTAMPTZ,
+    CONSTRAINT "uid_iqama_expir_iqama_i_expiry" UNIQUE ("iqama_id", "expiry_date")
+);
+        CREATE INDEX IF NOT EXISTS "idx_iqama_expiry_notifications_pending" ON "iqama_expiry_notifications" ("id")
+            WHERE "status" = 'pending';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "iqama_expiry_notifications";
+        DROP INDEX IF EXISTS "idx_iqama_records_expiry";
+        DROP INDEX IF EXISTS "idx_onboarded_customers_expiry";"""
@@ -0,0 +1,12 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Nothing reads iqama_records by expiry_date; the reminders walk onboarded_customers
+    return """
+        DROP INDEX IF EXISTS "idx_iqama_records_expiry";"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_iqama_records_expiry" ON "iqama_records" ("expiry_date");"""
@@ -0,0 +1,13 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_transaction_history_reference" ON "transaction_history" ("Reference Number");
+        CREATE INDEX IF NOT EXISTS "idx_international_transaction_history_reference" ON "international_transaction_history" ("Reference Number");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_transaction_history_reference";
+        DROP INDEX IF EXISTS "idx_international_transaction_history_reference";"""
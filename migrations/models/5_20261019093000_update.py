@@ -0,0 +1,91 @@
+from tortoise import BaseDBAsyncClient
+
+ENSURE_PARTITIONS_FN = """
+        CREATE OR REPLACE FUNCTION "ensure_monthly_partitions"(parent regclass, from_month date, to_month date)
+        RETURNS integer AS $$
+        DECLARE
+            month_start date := date_trunc('month', from_month)::date;
+            month_end date;
+            part_name text;
+            default_name text := parent::text || '_default';
+            created integer := 0;
+        BEGIN
+            -- Serialise concurrent callers (every worker runs the maintenance job)
+            PERFORM pg_advisory_xact_lock(hashtext(parent::text));
+            WHILE month_start <= to_month LOOP
+                month_end := (month_start + interval '1 month')::date;
+                part_name := parent::text || '_p' || to_char(month_start, 'YYYYMM');
+                IF to_regclass(part_name) IS NULL THEN
+                    -- Build the partition detached, pull any rows that landed in the
+                    -- DEFAULT partition for this month, then attach it
+                    EXECUTE format('CREATE TABLE %I (LIKE %s INCLUDING DEFAULTS)', part_name, parent);
+                    IF to_regclass(default_name) IS NOT NULL THEN
+                        EXECUTE format(
+                            'WITH moved AS (DELETE FROM %I WHERE "Transaction Date" >= %L AND "Transaction Date" < %L RETURNING *) '
+                            'INSERT INTO %I SELECT * FROM moved',
+                            default_name, month_start, month_end, part_name);
+                    END IF;
+                    EXECUTE format('ALTER TABLE %s ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                                   parent, part_name, month_start, month_end);
+                    created := created + 1;
+                END IF;
+                month_start := month_end;
+            END LOOP;
+            RETURN created;
+        END
+        $$ LANGUAGE plpgsql;"""
+
+
+def _partition(table: str, pk: str) -> str:
+    # The serial sequence keeps its (possibly truncated) name, so look it up
+    # rather than spelling it out, and hand it over to the new table.
+    return f"""
+        DROP INDEX IF EXISTS "idx_{table}_reference";
+        ALTER TABLE "{table}" RENAME TO "{table}_unpartitioned";
+        ALTER TABLE "{table}_unpartitioned" RENAME CONSTRAINT "{table}_pkey" TO "{table}_unpartitioned_pkey";
+        CREATE TABLE "{table}" (LIKE "{table}_unpartitioned" INCLUDING DEFAULTS, CONSTRAINT "{table}_pkey" PRIMARY KEY ("{pk}", "Transaction Date")) PARTITION BY RANGE ("Transaction Date");
+        DO $$ BEGIN
+            EXECUTE format('ALTER SEQUENCE %s OWNED BY "{table}"."{pk}"', pg_get_serial_sequence('"{table}_unpartitioned"', '{pk}'));
+        END $$;
+        CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT;
+        SELECT "ensure_monthly_partitions"(
+            '"{table}"',
+            COALESCE((SELECT MIN("Transaction Date") FROM "{table}_unpartitioned"), CURRENT_DATE),
+            (CURRENT_DATE + interval '3 months')::date
+        );
+        INSERT INTO "{table}" SELECT * FROM "{table}_unpartitioned";
+        DROP TABLE "{table}_unpartitioned";
+        CREATE INDEX "idx_{table}_account_date" ON "{table}" ("account_number", "Transaction Date");
+        CREATE INDEX "idx_{table}_reference" ON "{table}" ("Reference Number");"""
+
+
+def _unpartition(table: str, pk: str) -> str:
+    return f"""
+        ALTER TABLE "{table}" RENAME TO "{table}_partitioned";
+        ALTER TABLE "{table}_partitioned" RENAME CONSTRAINT "{table}_pkey" TO "{table}_partitioned_pkey";
+        DROP INDEX IF EXISTS "idx_{table}_account_date";
+        DROP INDEX IF EXISTS "idx_{table}_reference";
+        CREATE TABLE "{table}" (LIKE "{table}_partitioned" INCLUDING DEFAULTS, CONSTRAINT "{table}_pkey" PRIMARY KEY ("{pk}"));
+        DO $$ BEGIN
+            EXECUTE format('ALTER SEQUENCE %s OWNED BY "{table}"."{pk}"', pg_get_serial_sequence('"{table}_partitioned"', '{pk}'));
+        END $$;
+        INSERT INTO "{table}" SELECT * FROM "{table}_partitioned";
+        DROP TABLE "{table}_partitioned";
+        CREATE INDEX "idx_{table}_reference" ON "{table}" ("Reference Number");"""
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return (
+        ENSURE_PARTITIONS_FN
+        + _partition("transaction_history", "transaction_id")
+        + _partition("international_transaction_history", "international_transaction_id")
+    )
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return (
+        _unpartition("transaction_history", "transaction_id")
+        + _unpartition("international_transaction_history", "international_transaction_id")
+        + """
+        DROP FUNCTION IF EXISTS "ensure_monthly_partitions"(regclass, date, date);"""
+    )
@@ -0,0 +1,19 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "account_authorizations" (
+    "idempotency_key" VARCHAR(64) NOT NULL PRIMARY KEY,
+    "account_number" VARCHAR(20) NOT NULL,
+    "amount" INT NOT NULL,
+    "approved" BOOL,
+    "utilised_limit" INT,
+    "spending_limit" INT,
+    "created_at" TIMESTAMPTZ NOT NULL
+);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "account_authorizations";"""
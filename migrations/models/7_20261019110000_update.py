@@ -0,0 +1,13 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Partial onboardings only: admin listing/purge filter and sort on updated_at
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_onboarded_customers_partial_updated" ON "onboarded_customers" ("updated_at", "iqama_id")
+            WHERE "status" <> 'Account Successfully Created';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_onboarded_customers_partial_updated";"""
@@ -0,0 +1,17 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Abandoned onboarding sessions moved here by utils/sweeper.py. No PK/unique
+    # constraints: the same iqama can be archived more than once. A column added
+    # to onboarded_customers later must be added here too.
+    return """
+        CREATE TABLE IF NOT EXISTS "onboarded_customers_archive" (LIKE "onboarded_customers" INCLUDING DEFAULTS);
+        ALTER TABLE "onboarded_customers_archive" ADD COLUMN IF NOT EXISTS "archived_at" TIMESTAMPTZ NOT NULL DEFAULT now();
+        CREATE INDEX IF NOT EXISTS "idx_onboarded_customers_archive_iqama" ON "onboarded_customers_archive" ("iqama_id");
+        CREATE INDEX IF NOT EXISTS "idx_onboarded_customers_archive_archived_at" ON "onboarded_customers_archive" ("archived_at");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "onboarded_customers_archive";"""
@@ -0,0 +1,20 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # Stored responses for Idempotency-Key replays (utils/idempotency.py)
+    return """
+        CREATE TABLE IF NOT EXISTS "idempotent_requests" (
+    "idempotency_key" VARCHAR(64) NOT NULL PRIMARY KEY,
+    "request_hash" BYTEA NOT NULL,
+    "status_code" SMALLINT,
+    "content_type" VARCHAR(100),
+    "body" BYTEA,
+    "expires_at" TIMESTAMPTZ NOT NULL
+);
+        CREATE INDEX IF NOT EXISTS "idx_idempotent_expires_at" ON "idempotent_requests" ("expires_at");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "idempotent_requests";"""
@@ -0,0 +1,13 @@
+from tortoise import fields, models
+
+class AccountAuthorization(models.Model):
+    idempotency_key = fields.CharField(pk=True, max_length=64)
+    account_number = fields.CharField(max_length=20)
+    amount = fields.IntField()
+    approved = fields.BooleanField(null=True)  # null until the limit check has run
+    utilised_limit = fields.IntField(null=True)
+    spending_limit = fields.IntField(null=True)
+    created_at = fields.DatetimeField()
+
+    class Meta:
+        table = "account_authorizations"
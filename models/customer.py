@@ -2,6 +2,8 @@ from tortoise import fields, models
 from datetime import datetime
 from tortoise import timezone
 
+from models.indexes import ColumnIndex
+
 class OnboardedCustomer(models.Model):
     iqama_id = fields.CharField(pk=True, max_length=10)
     full_name = fields.CharField(max_length=100, null=True)
@@ -66,3 +68,10 @@ class OnboardedCustomer(models.Model):
 
     class Meta:
         table = "onboarded_customers"
+        # Migrations 7, 10 and 11
+        indexes = (
+            ColumnIndex(fields=("updated_at", "iqama_id"), name="idx_onboarded_customers_partial_updated",
+                        where="\"status\" <> 'Account Successfully Created'"),  # partial onboardings only
+            ColumnIndex(fields=("date_of_birth",), name="idx_onboarded_customers_dob"),
+            ColumnIndex(fields=("expiry_date", "iqama_id"), name="idx_onboarded_customers_expiry"),
+        )
@@ -0,0 +1,16 @@
+from tortoise import fields, models
+
+from models.indexes import ColumnIndex
+
+class IdempotentRequest(models.Model):
+    idempotency_key = fields.CharField(pk=True, max_length=64)  # sha256 hex of caller + client key
+    request_hash = fields.BinaryField()  # sha256 of method, path, query, device_id header and body
+    status_code = fields.SmallIntField(null=True)  # null while the first request is still running
+    content_type = fields.CharField(max_length=100, null=True)
+    body = fields.BinaryField(null=True)
+    expires_at = fields.DatetimeField()
+
+    class Meta:
+        table = "idempotent_requests"
+        # Migration 9
+        indexes = (ColumnIndex(fields=("expires_at",), name="idx_idempotent_expires_at"),)
@@ -0,0 +1,29 @@
+# models/indexes.py
+"""Indexes declared on the models, under the names their migrations use.
+
+Every index a migration creates is also in its model's Meta.indexes, so a
+GENERATE_SCHEMAS database and aerich's model diff agree with production.
+Not a models module itself: it is not listed in TORTOISE_ORM.
+"""
+from typing import Optional, Sequence
+
+from tortoise.indexes import Index
+
+
+class ColumnIndex(Index):
+    """A named index on model fields, with an optional WHERE for partial indexes.
+
+    tortoise's Index writes field names as they are, and its PartialIndex only
+    takes `column = value` conditions. This one writes each field's column
+    (source_field, e.g. "Transaction Date") and any condition.
+    """
+
+    def __init__(self, *, fields: Sequence[str], name: str, where: Optional[str] = None):
+        super().__init__(fields=tuple(fields), name=name)
+        if where:
+            self.extra = f" WHERE {where}"
+
+    def get_sql(self, schema_generator, model, safe: bool) -> str:
+        columns = [model._meta.fields_map[f].source_field or f for f in self.fields]
+        return schema_generator._get_index_sql(model, columns, safe, index_name=self.name,
+                                               index_type=self.INDEX_TYPE, extra=self.extra)
@@ -1,9 +1,17 @@
 # models/international_transaction_history.py
 from tortoise import fields, models
 
+from models.indexes import ColumnIndex
+
 class InternationalTransactionHistory(models.Model):
     class Meta:
         table = "international_transaction_history"
+        # Migrations 4-5. Not expressible here: the monthly partitions and their
+        # (id, "Transaction Date") primary key
+        indexes = (
+            ColumnIndex(fields=("account_number", "transaction_date"), name="idx_international_transaction_history_account_date"),
+            ColumnIndex(fields=("reference_number",), name="idx_international_transaction_history_reference"),
+        )
 
     international_transaction_id = fields.BigIntField(
         pk=True, source_field="international_transaction_id"
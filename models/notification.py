@@ -0,0 +1,19 @@
+from tortoise import fields, models
+
+from models.indexes import ColumnIndex
+
+class IqamaExpiryNotification(models.Model):
+    id = fields.BigIntField(pk=True)
+    iqama_id = fields.CharField(max_length=10)
+    expiry_date = fields.DateField()
+    mobile_number = fields.CharField(max_length=15, null=True)
+    status = fields.CharField(max_length=20, default="pending")  # pending -> sent / failed (by the sender)
+    created_at = fields.DatetimeField()
+    sent_at = fields.DatetimeField(null=True)
+
+    class Meta:
+        table = "iqama_expiry_notifications"
+        unique_together = ("iqama_id", "expiry_date")  # one reminder per iqama expiry
+        # Migration 11: the sender's queue of pending reminders
+        indexes = (ColumnIndex(fields=("id",), name="idx_iqama_expiry_notifications_pending",
+                               where="\"status\" = 'pending'"),)
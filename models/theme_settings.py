@@ -1,5 +1,4 @@
 from tortoise import fields, models
-from tortoise.contrib.pydantic import pydantic_model_creator
 
 class ThemeSettings(models.Model):
     id = fields.IntField(pk=True)
@@ -16,5 +15,19 @@ class ThemeSettings(models.Model):
     class Meta:
         table = "themesettings"  # 👈 Explicitly bind to the correct table name
 
-ThemeSettings_Pydantic = pydantic_model_creator(ThemeSettings, name="ThemeSettings")
-ThemeSettingsIn_Pydantic = pydantic_model_creator(ThemeSettings, name="ThemeSettingsIn", exclude_readonly=True)
+# Pydantic schemas are built on first access, not at import, so workers import
+# without tortoise.contrib.pydantic (see scripts/import_profile.py). The theme
+# routes are added in the lifespan for the same reason (routes/theme_settings.py).
+_PYDANTIC = {
+    "ThemeSettings_Pydantic": dict(name="ThemeSettings"),
+    "ThemeSettingsIn_Pydantic": dict(name="ThemeSettingsIn", exclude_readonly=True),
+}
+
+def __getattr__(name):
+    if name not in _PYDANTIC:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from tortoise.contrib.pydantic import pydantic_model_creator
+
+    model = pydantic_model_creator(ThemeSettings, **_PYDANTIC[name])
+    globals()[name] = model
+    return model
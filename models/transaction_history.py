@@ -1,9 +1,17 @@
 # models/transaction_history.py
 from tortoise import fields, models
 
+from models.indexes import ColumnIndex
+
 class TransactionHistory(models.Model):
     class Meta:
         table = "transaction_history"
+        # Migrations 4-5. Not expressible here: the monthly partitions and their
+        # (id, "Transaction Date") primary key
+        indexes = (
+            ColumnIndex(fields=("account_number", "transaction_date"), name="idx_transaction_history_account_date"),
+            ColumnIndex(fields=("reference_number",), name="idx_transaction_history_reference"),
+        )
 
     transaction_id = fields.BigIntField(pk=True, source_field="transaction_id")
     account_number = fields.BigIntField(source_field="account_number")
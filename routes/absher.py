@@ -1,17 +1,54 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from tortoise import connections
 from models.absher import AbsherRecord
 from models.iqama import IqamaRecord
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List
+from utils.responses import dumps
+from utils.sql import for_dialect
 
 router = APIRouter()
 
+FLAGS = ("pep_flag", "tax_employer_flag", "disability_flag", "high_risk_flag")
+MAX_BATCH = 10_000
+MAX_LOOKUP = 1_000
+
 class AbsherCreateRequest(BaseModel):
-    iqama_id: str
-    pep_flag: str
-    tax_employer_flag: str
-    disability_flag: str
-    high_risk_flag: str
+    iqama_id: str = Field(max_length=10)
+    pep_flag: str = Field(max_length=3)
+    tax_employer_flag: str = Field(max_length=3)
+    disability_flag: str = Field(max_length=3)
+    high_risk_flag: str = Field(max_length=3)
+
+class AbsherBatchRequest(BaseModel):
+    records: List[AbsherCreateRequest] = Field(min_length=1, max_length=MAX_BATCH)
+
+# One statement per batch. The join drops iqamas that don't exist (instead of
+# failing the whole batch on the foreign key), so no iqama rows are pre-loaded.
+UPSERT_SQL = {
+    "postgres": """
+        INSERT INTO absher_records (iqama_id, pep_flag, tax_employer_flag, disability_flag, high_risk_flag)
+        SELECT u.* FROM unnest($1::varchar[], $2::varchar[], $3::varchar[], $4::varchar[], $5::varchar[])
+            AS u(iqama_id, pep_flag, tax_employer_flag, disability_flag, high_risk_flag)
+        JOIN iqama_records i ON i.iqama_id = u.iqama_id
+        ON CONFLICT (iqama_id) DO UPDATE SET
+            pep_flag = EXCLUDED.pep_flag, tax_employer_flag = EXCLUDED.tax_employer_flag,
+            disability_flag = EXCLUDED.disability_flag, high_risk_flag = EXCLUDED.high_risk_flag
+        RETURNING iqama_id
+    """,
+    # Local dev: the same statement over a JSON array of rows
+    "sqlite": """
+        INSERT INTO absher_records (iqama_id, pep_flag, tax_employer_flag, disability_flag, high_risk_flag)
+        SELECT j.value ->> 0, j.value ->> 1, j.value ->> 2, j.value ->> 3, j.value ->> 4
+        FROM json_each($1) j
+        JOIN iqama_records i ON i.iqama_id = j.value ->> 0
+        WHERE true
+        ON CONFLICT (iqama_id) DO UPDATE SET
+            pep_flag = excluded.pep_flag, tax_employer_flag = excluded.tax_employer_flag,
+            disability_flag = excluded.disability_flag, high_risk_flag = excluded.high_risk_flag
+        RETURNING iqama_id
+    """,
+}
 
 @router.post("/absher")
 async def create_absher_record(data: AbsherCreateRequest):
@@ -28,9 +65,38 @@ async def create_absher_record(data: AbsherCreateRequest):
     )
     return {"message": "Absher record created", "id": record.id}
 
+@router.post("/absher/batch")
+async def upsert_absher_batch(data: AbsherBatchRequest):
+    # A file can list an iqama twice; ON CONFLICT can't touch a row twice, the last one wins
+    rows = {r.iqama_id: tuple(getattr(r, f) for f in FLAGS) for r in data.records}
+    conn = connections.get("default")
+    if conn.capabilities.dialect == "postgres":
+        params = [list(rows), *(list(column) for column in zip(*rows.values()))]
+    else:
+        params = [dumps([(iqama_id, *flags) for iqama_id, flags in rows.items()]).decode()]
+    written = await conn.execute_query_dict(for_dialect(conn, UPSERT_SQL[conn.capabilities.dialect]), params)
+    found = {row["iqama_id"] for row in written}
+    return {
+        "received": len(data.records),
+        "upserted": len(found),
+        "unknown_iqama_ids": [iqama_id for iqama_id in rows if iqama_id not in found],
+    }
+
+@router.get("/absher")
+async def get_absher_records(ids: List[str] = Query(..., description="Iqama ids, comma separated and/or repeated")):
+    wanted = list(dict.fromkeys(i.strip() for value in ids for i in value.split(",") if i.strip()))
+    if len(wanted) > MAX_LOOKUP:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_LOOKUP} ids per request")
+    records = await AbsherRecord.filter(iqama_id__in=wanted).values("iqama_id", *FLAGS)
+    found = {record.pop("iqama_id"): record for record in records}
+    return {
+        "records": found,
+        "missing": [iqama_id for iqama_id in wanted if iqama_id not in found],
+    }
+
 @router.get("/{iqama_id}")
 async def get_absher_record(iqama_id: str):
-    record = await AbsherRecord.get_or_none(iqama__iqama_id=iqama_id)
+    record = await AbsherRecord.get_or_none(iqama_id=iqama_id)
     if not record:
         raise HTTPException(status_code=404, detail="Absher record not found")
     return {
@@ -42,7 +108,7 @@ async def get_absher_record(iqama_id: str):
 
 @router.put("/absher/{iqama_id}")
 async def update_absher_record(iqama_id: str, data: AbsherCreateRequest):
-    record = await AbsherRecord.get_or_none(iqama__iqama_id=iqama_id)
+    record = await AbsherRecord.get_or_none(iqama_id=iqama_id)
     if not record:
         raise HTTPException(status_code=404, detail="Absher record not found")
 
@@ -1,16 +1,98 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Header
+from pydantic import BaseModel, Field
+from typing import Optional
+from tortoise import Tortoise, timezone
+from tortoise.transactions import in_transaction
 from models.account import AccountDetails
+from utils.sql import for_dialect
+from utils.cache import ResponseCache, cached_response
 
 router = APIRouter()
 
+# Balances and limits move with every authorization, so keep this one short
+account_cache = ResponseCache("account_details", ttl=30, maxsize=10_000)
+
 class UpdateNicknameRequest(BaseModel):
     nickname: str
 
 class UpdateCreationDateRequest(BaseModel):
     creation_date: str  # Format: YYYY-MM-DD
 
+INT4_MAX = 2_147_483_647  # limits and amounts are INTEGER columns
+
+class AuthorizeRequest(BaseModel):
+    amount: int = Field(gt=0, le=INT4_MAX)
+
+class AuthorizeResponse(BaseModel):
+    account_number: str
+    amount: int
+    approved: bool
+    utilised_limit: int
+    spending_limit: int
+    replayed: bool = False
+
+# Check-and-increment in one statement: the row lock taken by the UPDATE
+# serialises concurrent authorizations, so the limit can never be overshot.
+# The check subtracts rather than adds, so it cannot overflow INTEGER.
+AUTHORIZE_SQL = """
+    UPDATE account_details
+    SET utilised_limit = utilised_limit + $2
+    WHERE account_number = $1 AND $2 <= spending_limit - utilised_limit
+    RETURNING utilised_limit, spending_limit
+"""
+
+CLAIM_KEY_SQL = """
+    INSERT INTO account_authorizations (idempotency_key, account_number, amount, created_at)
+    VALUES ($1, $2, $3, $4)
+    ON CONFLICT (idempotency_key) DO NOTHING
+    RETURNING idempotency_key
+"""
+
+RECORD_RESULT_SQL = """
+    UPDATE account_authorizations
+    SET approved = $2, utilised_limit = $3, spending_limit = $4
+    WHERE idempotency_key = $1
+"""
+
+LIMITS_SQL = "SELECT utilised_limit, spending_limit FROM account_details WHERE account_number = $1"
+
+REPLAY_SQL = """
+    SELECT account_number, amount, approved, utilised_limit, spending_limit
+    FROM account_authorizations WHERE idempotency_key = $1
+"""
+
+async def authorize_spend(conn, account_number: str, amount: int) -> AuthorizeResponse:
+    rows = await conn.execute_query_dict(for_dialect(conn, AUTHORIZE_SQL), [account_number, amount])
+    if rows:
+        return AuthorizeResponse(account_number=account_number, amount=amount, approved=True, **rows[0])
+
+    limits = await conn.execute_query_dict(for_dialect(conn, LIMITS_SQL), [account_number])
+    if not limits:
+        raise HTTPException(status_code=404, detail="Account not found")
+    return AuthorizeResponse(account_number=account_number, amount=amount, approved=False, **limits[0])
+
+async def authorize_idempotent(account_number: str, amount: int, key: str) -> AuthorizeResponse:
+    async with in_transaction("default") as conn:
+        # A concurrent request with the same key blocks on this insert until the
+        # first one commits, then falls through to the replay below.
+        claimed = await conn.execute_query_dict(
+            for_dialect(conn, CLAIM_KEY_SQL), [key, account_number, amount, timezone.now()]
+        )
+        if claimed:
+            result = await authorize_spend(conn, account_number, amount)
+            await conn.execute_query(
+                for_dialect(conn, RECORD_RESULT_SQL),
+                [key, result.approved, result.utilised_limit, result.spending_limit],
+            )
+            return result
+
+        previous = (await conn.execute_query_dict(for_dialect(conn, REPLAY_SQL), [key]))[0]
+        if previous["account_number"] != account_number or previous["amount"] != amount:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+        return AuthorizeResponse(replayed=True, **previous)
+
 @router.get("/account-details/{account_number}")
+@cached_response(account_cache, "account_number")
 async def get_account_details(account_number: str):
     account = await AccountDetails.get_or_none(account_number=account_number)
     if not account:
@@ -24,6 +106,7 @@ async def update_nickname(account_number: str, data: UpdateNicknameRequest):
         raise HTTPException(status_code=404, detail="Account not found")
     account.account_nickname = data.nickname
     await account.save()
+    await account_cache.invalidate(account_number)
     return {"message": "Nickname updated successfully"}
 
 @router.put("/account-details/{account_number}/creation-date")
@@ -33,4 +116,19 @@ async def update_creation_date(account_number: str, data: UpdateCreationDateRequ
         raise HTTPException(status_code=404, detail="Account not found")
     account.account_creation_date = data.creation_date
     await account.save()
+    await account_cache.invalidate(account_number)
     return {"message": "Account creation date updated successfully"}
+
+@router.post("/accounts/{account_number}/authorize", response_model=AuthorizeResponse)
+async def authorize(
+    account_number: str,
+    data: AuthorizeRequest,
+    idempotency_key: Optional[str] = Header(None, max_length=64),
+):
+    if idempotency_key:
+        result = await authorize_idempotent(account_number, data.amount, idempotency_key)
+    else:
+        result = await authorize_spend(Tortoise.get_connection("default"), account_number, data.amount)
+    if result.approved and not result.replayed:
+        await account_cache.invalidate(account_number)
+    return result
@@ -1,34 +1,189 @@
-from fastapi import APIRouter, HTTPException
+from datetime import timedelta
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from tortoise import timezone
 from models.customer import OnboardedCustomer
+from utils.cache import CACHES
+from utils.invalidation import bus
+from db.backend import POOL_STATS
+from db.router import REPLICA_CONFIGURED, replica_state
+from utils.funnel import REFRESH_SECONDS as FUNNEL_REFRESH_SECONDS, funnel_body
+from utils.sweeper import sweeper_state
+from utils.leader import leader
+from utils.device_registry import device_registry
+from utils.kyc import kyc_profiles
+from utils.age import filter_by_age
+from utils import expiry
 
 router = APIRouter()
 
-# 1. Get successfully onboarded customers
+COMPLETED = "Account Successfully Created"  # set by the final onboarding step
+PARTIAL_FIELDS = ("iqama_id", "full_name", "mobile_number", "status", "current_step",
+                  "device_id", "created_at", "updated_at")
+# No secrets, device ids or identity documents in the completed listing
+COMPLETED_FIELDS = ("iqama_id", "full_name", "mobile_number", "status", "created_at", "updated_at")
+
+
+def _partials(older_than_days=None):
+    query = OnboardedCustomer.exclude(status=COMPLETED)
+    if older_than_days is not None:
+        query = query.filter(updated_at__lt=timezone.now() - timedelta(days=older_than_days))
+    return query
+
+
+class UnbindDevicesRequest(BaseModel):
+    iqama_ids: List[str] = Field(..., min_length=1, max_length=1000)
+
+KYC_MAX_IDS = 500
+
+# 1. Get successfully onboarded customers, one page at a time
 @router.get("/customers/completed")
-async def get_completed_customers():
-    return await CustomerRecord.filter(status="completed").all()
+async def get_completed_customers(
+    min_age: Optional[int] = Query(None, ge=0),
+    max_age: Optional[int] = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    # Age filters become date_of_birth bounds (indexed), never the stored age
+    query = filter_by_age(OnboardedCustomer.filter(status=COMPLETED), min_age, max_age)
+    items = await query.order_by("created_at", "iqama_id").offset(offset).limit(limit).values(*COMPLETED_FIELDS)
+    return {"total": await query.count(), "limit": limit, "offset": offset, "items": items}
 
-# 2. Get partially onboarded customers
+# 2. Get partially onboarded customers, one page at a time
 @router.get("/customers/partial")
-async def get_partial_customers():
-    return await CustomerRecord.exclude(status="completed").all()
+async def get_partial_customers(
+    older_than_days: Optional[int] = Query(None, ge=0, description="Only those with no activity for this many days"),
+    min_age: Optional[int] = Query(None, ge=0),
+    max_age: Optional[int] = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    query = filter_by_age(_partials(older_than_days), min_age, max_age)
+    items = await query.order_by("updated_at", "iqama_id").offset(offset).limit(limit).values(*PARTIAL_FIELDS)
+    return {"total": await query.count(), "limit": limit, "offset": offset, "items": items}
+
+# 3. Purge partial onboardings with no activity for N days (one DELETE ... WHERE)
+@router.delete("/customers/partial")
+async def purge_partial_customers(
+    older_than_days: int = Query(..., ge=1),
+    dry_run: bool = Query(False, description="Only count what would be deleted"),
+):
+    query = _partials(older_than_days)
+    if dry_run:
+        return {"dry_run": True, "matched": await query.count()}
+    deleted = await query.delete()
+    if deleted:
+        await device_registry.invalidate()  # too many ids for one notification
+    return {"dry_run": False, "deleted": deleted}
 
-# 3. Delete partially onboarded customer by Iqama ID
+# 4. Delete partially onboarded customer by Iqama ID
 @router.delete("/customers/partial/{iqama_id}")
 async def delete_partial_customer(iqama_id: str):
-    record = await CustomerRecord.get_or_none(iqama_id=iqama_id)
-    if not record or record.status == "completed":
+    deleted = await _partials().filter(iqama_id=iqama_id).delete()
+    if not deleted:
         raise HTTPException(status_code=404, detail="Partial customer not found or already completed")
-    await record.delete()
+    await device_registry.invalidate(iqama_id)
     return {"message": "Partial customer deleted"}
 
-# 4. Remove device bindings for a customer
+# 5. Remove device bindings for a list of customers (one UPDATE ... WHERE)
+@router.post("/customers/unbind-devices")
+async def unbind_devices(
+    data: UnbindDevicesRequest,
+    dry_run: bool = Query(False, description="Only count the bindings that would be removed"),
+):
+    query = OnboardedCustomer.filter(iqama_id__in=set(data.iqama_ids), device_id__isnull=False)
+    if dry_run:
+        return {"dry_run": True, "requested": len(data.iqama_ids), "matched": await query.count()}
+    unbound = await query.update(device_id=None, device_type=None, updated_at=timezone.now())
+    if unbound:
+        await device_registry.invalidate()  # too many ids for one notification
+    return {"dry_run": False, "requested": len(data.iqama_ids), "unbound": unbound}
+
+# 6. Remove device bindings for a customer
 @router.put("/customers/unbind-device/{iqama_id}")
 async def unbind_device(iqama_id: str):
-    record = await CustomerRecord.get_or_none(iqama_id=iqama_id)
-    if not record:
+    updated = await OnboardedCustomer.filter(iqama_id=iqama_id).update(
+        device_id=None, device_type=None, updated_at=timezone.now()
+    )
+    if not updated:
         raise HTTPException(status_code=404, detail="Customer not found")
-    record.device_id = None
-    record.device_type = None
-    await record.save()
+    await device_registry.invalidate(iqama_id)
     return {"message": "Device unbound from customer"}
+
+# 7. Read-cache hit ratios for this worker, and whether other workers' invalidations reach it
+@router.get("/cache/stats")
+async def get_cache_stats():
+    return {**{name: cache.stats() for name, cache in CACHES.items()}, "invalidation_bus": bus.stats()}
+
+# 8. Connection pool gauges for this worker (Postgres only)
+@router.get("/db/pool")
+async def get_pool_stats():
+    return {name: stats.snapshot() for name, stats in POOL_STATS.items()}
+
+# 9. Read-replica routing state for this worker
+@router.get("/db/replica")
+async def get_replica_state():
+    return {"configured": REPLICA_CONFIGURED, **replica_state}
+
+# 10. Onboarding funnel: counts per step/status, daily completion, drop-off
+@router.get("/stats/funnel")
+async def get_funnel_stats():
+    # Served from memory; utils.funnel refreshes it in the background
+    return Response(content=await funnel_body(), media_type="application/json",
+                    headers={"Cache-Control": f"private, max-age={int(FUNNEL_REFRESH_SECONDS)}"})
+
+# 11. Stale onboarding sweeper: last run and totals for this worker, and whether it is the one sweeping
+@router.get("/sweeper")
+async def get_sweeper_state():
+    return {**sweeper_state, "leader": leader.stats()}
+
+# 12. KYC profiles for many customers: iqama, onboarding and Absher flags (one joined query)
+@router.get("/kyc")
+async def get_kyc_profiles(ids: List[str] = Query(..., description="Iqama ids, comma separated and/or repeated")):
+    wanted = list(dict.fromkeys(i.strip() for value in ids for i in value.split(",") if i.strip()))
+    if len(wanted) > KYC_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {KYC_MAX_IDS} ids per request")
+    profiles = await kyc_profiles(wanted)
+    return {"profiles": profiles, "missing": [i for i in wanted if i not in profiles]}
+
+# 13. KYC profile for one customer
+@router.get("/kyc/{iqama_id}")
+async def get_kyc_profile(iqama_id: str):
+    profile = (await kyc_profiles([iqama_id])).get(iqama_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Iqama ID not found")
+    return profile
+
+# 14. Customers whose iqama expires within N days, one keyset page at a time
+@router.get("/expiring-iqamas")
+async def get_expiring_iqamas(
+    within_days: int = Query(30, ge=0, le=3650),
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="next_cursor from the previous page"),
+):
+    try:
+        cursor = expiry.parse_cursor(after)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    items = await expiry.page(within_days, cursor, limit)
+    return {
+        "within_days": within_days,
+        "items": items,
+        "next_cursor": expiry.format_cursor(items[-1]) if len(items) == limit else None,
+    }
+
+# 15. Same list as CSV, streamed page by page
+@router.get("/expiring-iqamas/export")
+async def export_expiring_iqamas(within_days: int = Query(30, ge=0, le=3650)):
+    return StreamingResponse(
+        expiry.csv_chunks(within_days), media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="expiring_iqamas_{within_days}d.csv"'},
+    )
+
+# 16. Iqama expiry reminder job: last run and totals for this worker, whether it is the one
+#     enqueuing, and the reminder queue by status
+@router.get("/expiring-iqamas/notifications")
+async def get_expiry_notification_state():
+    return {**expiry.notification_state, "leader": leader.stats(), "queue": await expiry.queue_summary()}
@@ -1,9 +1,13 @@
 from fastapi import APIRouter, HTTPException
 from models.card import CardDetails
+from utils.cache import ResponseCache, cached_response
 
 router = APIRouter()
 
+card_cache = ResponseCache("card_details", ttl=300, maxsize=10_000)
+
 @router.get("/card-details/{account_number}")
+@cached_response(card_cache, "account_number")
 async def get_card_details(account_number: int):
     record = await CardDetails.get_or_none(account_number=account_number)
     if not record:
@@ -4,6 +4,11 @@ from models.iqama import IqamaRecord
 from reference_utils import generate_dep_reference_number
 from datetime import datetime, date
 from tortoise import timezone
+from db.router import read_from_primary
+from utils.responses import FastJSONResponse
+from utils.device_registry import BINDING_FIELDS, device_registry
+from utils import hijri
+from utils.age import age_on
 from utils.security import hash_mpin
 from utils.security import verify_password
 from pydantic import BaseModel
@@ -73,6 +78,7 @@ async def start_customer_onboarding(data: StartOnboardingRequest):
     if existing:
         if existing.status == "Account Successfully Created":
             raise HTTPException(status_code=400, detail="Iqama already onboarded")
+        previous_device_id = existing.device_id
 
         # ✅ Invalidate old device if needed
         resumed_on_new_device = False
@@ -91,6 +97,8 @@ async def start_customer_onboarding(data: StartOnboardingRequest):
         existing.current_step = data.current_step or "nafath"
         existing.updated_at = timezone.now()
         await existing.save()
+        # The old device loses the binding in every worker's registry
+        await device_registry.invalidate(existing.iqama_id, previous_device_id, data.device_id)
 
         return {
             "resumed_on_new_device": resumed_on_new_device,
@@ -112,14 +120,13 @@ async def start_customer_onboarding(data: StartOnboardingRequest):
         arabic_name=iqama.arabic_name,
         mobile_number=iqama.mobile_number,
         date_of_birth=strip_tz(iqama.date_of_birth),
-        date_of_birth_hijri=str(iqama.dob_hijri) if iqama.dob_hijri else None,
+        # Canonical YYYY-MM-DD, only when the iqama records one: a converted date
+        # can be a day off the official calendar (hijri.matches() handles a missing one)
+        date_of_birth_hijri=hijri.normalize(iqama.dob_hijri),
         expiry_date=strip_tz(iqama.expiry_date),
-        expiry_date_hijri=iqama.expiry_date_hijri,
+        expiry_date_hijri=hijri.normalize(iqama.expiry_date_hijri),
         issue_date=strip_tz(iqama.issue_date),
-        age=(
-            date.today().year - iqama.date_of_birth.year
-            - ((date.today().month, date.today().day) < (iqama.date_of_birth.month, iqama.date_of_birth.day))
-        ) if iqama.date_of_birth else None,
+        age=age_on(iqama.date_of_birth),  # refreshed by utils.age.run_age_job
         gender=iqama.gender,
         nationality=iqama.nationality,
         building_number=iqama.building_number,
@@ -135,6 +142,7 @@ async def start_customer_onboarding(data: StartOnboardingRequest):
         status="in_progress",
         current_step=data.current_step or "nafath"
     )
+    await device_registry.invalidate(record.iqama_id, data.device_id)
 
     return {
         "resumed_on_new_device": False,
@@ -194,7 +202,8 @@ async def validate_reset_request(data: IqamaDOBValidationRequest):
         if user.date_of_birth.strftime("%d %B %Y") != data.dob:
             raise HTTPException(status_code=400, detail="Your ID/Iqama Number and Date of Birth does not match")
     elif data.calendar_type == "hijri":
-        if user.date_of_birth_hijri != data.dob:
+        # Compares dates, not strings: "12 Jumada al-Awwal 1410" matches "1410-05-12"
+        if not hijri.matches(data.dob, user.date_of_birth_hijri, user.date_of_birth):
             raise HTTPException(status_code=400, detail="Your ID/Iqama Number and Date of Birth does not match")
     else:
         raise HTTPException(status_code=400, detail="Invalid calendar type")
@@ -204,7 +213,8 @@ async def validate_reset_request(data: IqamaDOBValidationRequest):
 # ⬇️ GET /customers/onboarded
 @router.get("/onboarded")
 async def get_onboarded_customers():
-    return await OnboardedCustomer.all().order_by("-created_at").values(
+    # Can be thousands of rows: render straight with orjson, skipping jsonable_encoder
+    return FastJSONResponse(await OnboardedCustomer.all().order_by("-created_at").values(
         "full_name",
         "iqama_id",
         "mobile_number",
@@ -213,14 +223,14 @@ async def get_onboarded_customers():
         "created_at",
         "status",
         "current_step"
-    )
+    ))
 
 # ⬇️ GET /customers/device/{device_id}
 @router.get("/device/{device_id}")
+@read_from_primary  # device binding is a security check; never answer from a lagging replica
 async def get_customer_by_device(device_id: str):
-    customer = await OnboardedCustomer.filter(
-        device_id=device_id
-    ).first()
+    # Called on every app resume: answered from the binding registry, not the table
+    customer = await device_registry.for_device(device_id)
 
     if not customer:
         raise HTTPException(status_code=404, detail="No onboarding record found")
@@ -251,11 +261,13 @@ async def update_device_info(data: DeviceUpdateRequest):
     if not user:
         raise HTTPException(status_code=404, detail="Customer not found")
 
+    previous_device_id = user.device_id
     user.device_id = data.device_id
     user.device_type = data.device_type
     user.location = data.location
     user.updated_at = timezone.now()
     await user.save()
+    await device_registry.invalidate(user.iqama_id, previous_device_id, data.device_id)
 
     return {
         "message": "Device information updated",
@@ -283,7 +295,7 @@ async def get_customer(iqama_id: str):
         "expiry_date": record.expiry_date,
         "expiry_date_hijri": record.expiry_date_hijri,
         "issue_date": record.issue_date,
-        "age": record.age,
+        "age": age_on(record.date_of_birth),
         "gender": record.gender,
         "nationality": record.nationality,
         "building_number": record.building_number,
@@ -345,7 +357,7 @@ async def get_customer_by_mobile(mobile_number: str):
         "expiry_date": record.expiry_date,
         "expiry_date_hijri": record.expiry_date_hijri,
         "issue_date": record.issue_date,
-        "age": record.age,
+        "age": age_on(record.date_of_birth),
         "gender": record.gender,
         "nationality": record.nationality,
         "building_number": record.building_number,
@@ -470,28 +482,35 @@ async def update_expiry_date(data: ExpiryDateUpdateRequest):
 
     record.expiry_date = data.expiry_date
     if data.expiry_date_hijri:
-        record.expiry_date_hijri = data.expiry_date_hijri
+        try:
+            record.expiry_date_hijri = hijri.normalize(data.expiry_date_hijri)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
 
     record.updated_at = timezone.now()
     await record.save()
 
     return {"message": "Expiry date updated successfully"}
 
+# Columns PUT /customers/{iqama_id} may set (not the primary key)
+UPDATABLE_FIELDS = set(OnboardedCustomer._meta.fields_db_projection) - {OnboardedCustomer._meta.pk_attr}
+
 # ⬇️ PUT /customers/{iqama_id}
 @router.put("/{iqama_id}")
 async def update_customer(iqama_id: str, request: Request):
-    record = await OnboardedCustomer.get_or_none(iqama_id=iqama_id)
-    if not record:
+    # Binding check from memory; the row itself is never read
+    binding = await device_registry.for_iqama(iqama_id)
+    if not binding:
         raise HTTPException(status_code=404, detail="Customer not found")
 
     device_id_header = request.headers.get('device_id')
-    if record.device_id and device_id_header and record.device_id != device_id_header:
+    if binding.device_id and device_id_header and binding.device_id != device_id_header:
         raise HTTPException(status_code=403, detail="Onboarding has been resumed on another device. This session is no longer valid.")
         # ✅ Don't skip the update logic — allow update
 
 
     update_data = await request.json()
-    updated_fields_list = []
+    changes = {}
 
     from re import sub
 
@@ -508,26 +527,35 @@ async def update_customer(iqama_id: str, request: Request):
     ]
 
     for field, value in update_data.items():
-        if hasattr(record, field):
+        if field in UPDATABLE_FIELDS:
             if field in float_fields:
-                setattr(record, field, clean_amount(value))
+                changes[field] = clean_amount(value)
             elif field == "mpin" and value:
                 from utils.security import hash_mpin
-                setattr(record, field, hash_mpin(value))
+                changes[field] = hash_mpin(value)
 
             elif field == "password" and value:
                 from utils.security import hash_password
-                setattr(record, field, hash_password(value))
+                changes[field] = hash_password(value)
+            elif field in ("date_of_birth_hijri", "expiry_date_hijri"):
+                try:
+                    changes[field] = hijri.normalize(value)
+                except ValueError as exc:
+                    raise HTTPException(status_code=400, detail=str(exc))
             else:
-                setattr(record, field, value)
-            updated_fields_list.append(field)
+                changes[field] = value
 
 
-    if not updated_fields_list:
+    if not changes:
         raise HTTPException(status_code=400, detail="No valid fields provided for update.")
 
-    record.updated_at = timezone.now()
-    await record.save()
+    updated_fields_list = list(changes)
+    changes["updated_at"] = timezone.now()
+    if not await OnboardedCustomer.filter(iqama_id=iqama_id).update(**changes):
+        raise HTTPException(status_code=404, detail="Customer not found")
+    if changes.keys() & BINDING_FIELDS:
+        # device_id/current_step/status changed: drop the cached binding everywhere
+        await device_registry.invalidate(iqama_id, binding.device_id, changes.get("device_id"))
 
     return {"message": "Customer record updated", "updated_fields": updated_fields_list}
 
@@ -539,6 +567,7 @@ async def delete_customer(iqama_id: str):
         raise HTTPException(status_code=404, detail="Customer not found")
 
     await record.delete()
+    await device_registry.invalidate(iqama_id, record.device_id)
     return {"message": "Customer and associated device binding removed"}
 
 # ⬇️ GET /customers/{iqama_id}/credentials  (safe: no plaintext)
@@ -5,8 +5,9 @@ from datetime import date, time
 from decimal import Decimal
 from pydantic import BaseModel, ConfigDict
 from tortoise.expressions import Q
-from tortoise import Tortoise
+from db.router import read_connection
 from models.international_transaction_history import InternationalTransactionHistory
+from utils.partitions import date_clauses
 
 router = APIRouter(tags=["International Transactions"])
 
@@ -33,14 +34,16 @@ class IntlTxnListOut(BaseModel):
     total: int
     limit: int
     offset: int
+    from_date: Optional[date] = None  # null: that end of the range is open
+    to_date: Optional[date] = None
     items: List[IntlTxnOut]
 
 # ---------- Endpoints ----------
 @router.get("/international-transactions", response_model=IntlTxnListOut)
 async def list_international_transactions(
     account_number: Optional[int] = Query(None, description="Filter by account_number"),
-    from_date: Optional[date] = Query(None, description="Inclusive start date"),
-    to_date: Optional[date] = Query(None, description="Inclusive end date"),
+    from_date: Optional[date] = Query(None, description="Inclusive start date; without one the history is unbounded"),
+    to_date: Optional[date] = Query(None, description="Inclusive end date; give both to scan only those months"),
     currency: Optional[str] = Query(None, description="Exact currency code, e.g., USD"),
     merchant: Optional[str] = Query(None, description="Case-insensitive contains"),
     txn_type: Optional[str] = Query(None, description="Transaction type contains (ILIKE)"),
@@ -48,13 +51,15 @@ async def list_international_transactions(
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
 ):
+    # No default window: without dates this is the whole history. Given dates
+    # limit the scan to the monthly partitions they cover.
     q = Q()
-    if account_number is not None:
-        q &= Q(account_number=account_number)
     if from_date is not None:
         q &= Q(transaction_date__gte=from_date)
     if to_date is not None:
         q &= Q(transaction_date__lte=to_date)
+    if account_number is not None:
+        q &= Q(account_number=account_number)
     if currency:
         q &= Q(currency=currency)
     if merchant:
@@ -75,15 +80,21 @@ async def list_international_transactions(
     )
 
     items = [IntlTxnOut.model_validate(r) for r in rows]
-    return IntlTxnListOut(total=total, limit=limit, offset=offset, items=items)
+    return IntlTxnListOut(
+        total=total, limit=limit, offset=offset, from_date=from_date, to_date=to_date, items=items
+    )
 
 
 @router.get("/international-transactions/{international_transaction_id}",
             response_model=IntlTxnOut)
-async def get_international_transaction(international_transaction_id: int):
-    row = await InternationalTransactionHistory.get_or_none(
-        international_transaction_id=international_transaction_id
-    )
+async def get_international_transaction(
+    international_transaction_id: int,
+    transaction_date: Optional[date] = Query(None, description="Optional; lets the lookup skip other months"),
+):
+    q = Q(international_transaction_id=international_transaction_id)
+    if transaction_date is not None:
+        q &= Q(transaction_date=transaction_date)
+    row = await InternationalTransactionHistory.get_or_none(q)
     if not row:
         raise HTTPException(status_code=404, detail="International transaction not found")
     return IntlTxnOut.model_validate(row)
@@ -114,29 +125,23 @@ async def export_international_transactions_csv(
             "Currency"                   AS currency,
             "Currency Amount"            AS currency_amount
         FROM international_transaction_history
-        WHERE account_number = $1
-          {{from_clause}}
-          {{to_clause}}
+        WHERE account_number = $1{{date_clause}}
           {{currency_clause}}
         ORDER BY "Transaction Date" DESC, "Time of transaction" DESC
     """
 
-    params: List = [account_number]
-    from_clause = to_clause = currency_clause = ""
+    # Full history unless dates are given; with them only those months' partitions are read
+    date_clause, date_params = date_clauses(from_date, to_date, 2)
+    params: List = [account_number, *date_params]
+    currency_clause = ""
 
-    if from_date:
-        from_clause = "AND \"Transaction Date\" >= $" + str(len(params) + 1)
-        params.append(from_date)
-    if to_date:
-        to_clause = "AND \"Transaction Date\" <= $" + str(len(params) + 1)
-        params.append(to_date)
     if currency:
         currency_clause = "AND \"Currency\" = $" + str(len(params) + 1)
         params.append(currency)
 
-    sql = sql.format(from_clause=from_clause, to_clause=to_clause, currency_clause=currency_clause)
+    sql = sql.format(date_clause=date_clause, currency_clause=currency_clause)
 
-    rows = await Tortoise.get_connection("default").execute_query_dict(sql, params)
+    rows = await read_connection().execute_query_dict(sql, params)
 
     # Build CSV in-memory
     import io, csv
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from models.iqama import IqamaRecord
 from models.customer import OnboardedCustomer
-from datetime import date
+from utils.age import age_on
 import logging
 
 router = APIRouter()
@@ -23,12 +23,10 @@ async def validate_iqama(payload: dict):
     if existing and existing.status == "Account Successfully Created":
         raise HTTPException(status_code=400, detail="Iqama already onboarded")
 
-    today = date.today()
-    dob = iqama.date_of_birth
-    age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+    age = age_on(iqama.date_of_birth)
 
-    logger.info(f"IQAMA VALIDATION: id={iqama_id}, expiry={iqama.expiry_date}, issue={iqama.issue_date}, age={age}")
-    print(f"[DEBUG] Expiry Date: {iqama.expiry_date}, Today: {today}, Age: {age}")
+    logger.info("Iqama validated", extra={"iqama_id": iqama_id, "age": age})
+    logger.debug("Iqama dates", extra={"expiry_date": str(iqama.expiry_date), "issue_date": str(iqama.issue_date)})
 
     return {
         "full_name": iqama.full_name,
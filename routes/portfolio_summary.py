@@ -1,9 +1,13 @@
 from fastapi import APIRouter, HTTPException
 from models.portfolio import PortfolioSummary
+from utils.cache import ResponseCache, cached_response
 
 router = APIRouter()
 
+portfolio_cache = ResponseCache("portfolio_summary", ttl=60, maxsize=10_000)
+
 @router.get("/portfolio-summary/{iqama_id}")
+@cached_response(portfolio_cache, "iqama_id")
 async def get_portfolio_summary(iqama_id: int):
     record = await PortfolioSummary.get_or_none(iqama_id=iqama_id)
     if not record:
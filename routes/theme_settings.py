@@ -1,23 +1,80 @@
-from fastapi import APIRouter, HTTPException
-from models.theme_settings import ThemeSettings, ThemeSettings_Pydantic, ThemeSettingsIn_Pydantic
-
-router = APIRouter()
-
-@router.get("/theme-settings", response_model=ThemeSettings_Pydantic)
-async def get_theme_settings():
-    settings = await ThemeSettings.all().order_by("-updated_at").first()
-    if not settings:
-        raise HTTPException(status_code=404, detail="No theme settings found")
-    return await ThemeSettings_Pydantic.from_tortoise_orm(settings)
-
-@router.post("/theme-settings", response_model=ThemeSettings_Pydantic)
-async def set_theme_settings(settings: ThemeSettingsIn_Pydantic):
-    existing = await ThemeSettings.all().order_by("-updated_at").first()
-    if existing:
-        for field, value in settings.dict().items():
-            setattr(existing, field, value)
-        await existing.save()
-        return await ThemeSettings_Pydantic.from_tortoise_orm(existing)
-    else:
-        obj = await ThemeSettings.create(**settings.dict())
-        return await ThemeSettings_Pydantic.from_tortoise_orm(obj)
+import asyncio
+import hashlib
+import os
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response
+from models import theme_settings as theme_models
+from models.theme_settings import ThemeSettings
+from utils.invalidation import bus
+
+THEME_CHANNEL = "theme_settings"
+THEME_MAX_AGE = int(os.getenv("THEME_CACHE_MAX_AGE", "86400"))
+
+# Serialized payload + ETag of the current theme, shared by every request in
+# this worker. `generation` is bumped on invalidation so a load that raced
+# with a write never stores the stale row.
+_theme = {"body": None, "etag": None, "generation": 0}
+_theme_lock = asyncio.Lock()
+
+def _invalidate_theme(_payload=None):
+    _theme["body"] = _theme["etag"] = None
+    _theme["generation"] += 1
+
+bus.subscribe(THEME_CHANNEL, _invalidate_theme)
+
+async def _current_theme():
+    body, etag = _theme["body"], _theme["etag"]
+    if body is not None:
+        return body, etag
+    async with _theme_lock:
+        if _theme["body"] is not None:
+            return _theme["body"], _theme["etag"]
+        generation = _theme["generation"]
+        settings = await ThemeSettings.all().order_by("-updated_at").first()
+        if not settings:
+            raise HTTPException(status_code=404, detail="No theme settings found")
+        body = theme_models.ThemeSettings_Pydantic.model_validate(settings).model_dump_json().encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        if generation == _theme["generation"]:
+            _theme["body"], _theme["etag"] = body, etag
+        return body, etag
+
+def build_router() -> APIRouter:
+    """The theme endpoints. Built when the app starts (`include_routes`), not at
+    import: their schemas come from pydantic_model_creator on first use."""
+    from models.theme_settings import ThemeSettings_Pydantic, ThemeSettingsIn_Pydantic
+
+    router = APIRouter()
+
+    # Served from the cached body; response_model documents it in /openapi.json
+    @router.get("/theme-settings", response_model=ThemeSettings_Pydantic)
+    async def get_theme_settings(request: Request):
+        body, etag = await _current_theme()
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={THEME_MAX_AGE}"}
+        client_etags = request.headers.get("if-none-match", "")
+        if etag in (tag.strip().removeprefix("W/") for tag in client_etags.split(",")):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    @router.post("/theme-settings", response_model=ThemeSettings_Pydantic)
+    async def set_theme_settings(settings: ThemeSettingsIn_Pydantic):
+        existing = await ThemeSettings.all().order_by("-updated_at").first()
+        if existing:
+            for field, value in settings.model_dump().items():
+                setattr(existing, field, value)
+            await existing.save()
+            result = ThemeSettings_Pydantic.model_validate(existing)
+        else:
+            obj = await ThemeSettings.create(**settings.model_dump())
+            result = ThemeSettings_Pydantic.model_validate(obj)
+
+        # Drop the cached theme here and in every other worker
+        await bus.publish(THEME_CHANNEL)
+        return result
+
+    return router
+
+def include_routes(app: FastAPI) -> None:
+    # Once per app: the lifespan runs again each time a test client starts it
+    if not getattr(app.state, "theme_routes", False):
+        app.include_router(build_router())
+        app.state.theme_routes = True
@@ -1,9 +1,13 @@
 from fastapi import APIRouter, HTTPException
 from models.transaction import TransactionSummary
+from utils.cache import ResponseCache, cached_response
 
 router = APIRouter()
 
+transaction_summary_cache = ResponseCache("transaction_summary", ttl=60, maxsize=10_000)
+
 @router.get("/transaction-summary/{account_number}")
+@cached_response(transaction_summary_cache, "account_number")
 async def get_transaction_summary(account_number: int):
     record = await TransactionSummary.get_or_none(account_number=account_number)
     if not record:
@@ -1,12 +1,13 @@
 # routes/transactions.py
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Optional, List
 from datetime import date, time
 from decimal import Decimal
 from pydantic import BaseModel, ConfigDict
 from tortoise.expressions import Q
-from tortoise import Tortoise
+from db.router import read_connection
 from models.transaction_history import TransactionHistory
+from utils.partitions import date_clauses
 
 
 router = APIRouter(tags=["Transactions"])
@@ -32,6 +33,8 @@ class TransactionListOut(BaseModel):
     total: int
     limit: int
     offset: int
+    from_date: Optional[date] = None  # null: that end of the range is open
+    to_date: Optional[date] = None
     items: List[TransactionOut]
 
 class DailySummaryOut(BaseModel):
@@ -39,12 +42,20 @@ class DailySummaryOut(BaseModel):
     txn_count: int
     total_amount: Decimal
 
+class IngestResultOut(BaseModel):
+    table: str
+    received: int
+    inserted: int
+    skipped: int
+    accounts: int
+    method: str
+
 # ---------- Endpoints ----------
 @router.get("/transactions", response_model=TransactionListOut)
 async def list_transactions(
     account_number: Optional[int] = Query(None, description="Filter by account_number"),
-    from_date: Optional[date] = Query(None, description="Inclusive start date"),
-    to_date: Optional[date] = Query(None, description="Inclusive end date"),
+    from_date: Optional[date] = Query(None, description="Inclusive start date; without one the history is unbounded"),
+    to_date: Optional[date] = Query(None, description="Inclusive end date; give both to scan only those months"),
     merchant: Optional[str] = Query(None, description="Case-insensitive contains"),
     txn_type: Optional[str] = Query(None, description="Transaction type contains (ILIKE)"),
     reference_search: Optional[str] = Query(None, description="Search in reference number (ILIKE)"),
@@ -52,13 +63,15 @@ async def list_transactions(
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
 ):
+    # No default window: without dates this is the whole history. Given dates
+    # limit the scan to the monthly partitions they cover.
     q = Q()
-    if account_number is not None:
-        q &= Q(account_number=account_number)
     if from_date is not None:
         q &= Q(transaction_date__gte=from_date)
     if to_date is not None:
         q &= Q(transaction_date__lte=to_date)
+    if account_number is not None:
+        q &= Q(account_number=account_number)
     if merchant:
         q &= Q(merchant__icontains=merchant)
     if txn_type:
@@ -79,12 +92,20 @@ async def list_transactions(
     )
 
     items = [TransactionOut.model_validate(r) for r in rows]
-    return TransactionListOut(total=total, limit=limit, offset=offset, items=items)
+    return TransactionListOut(
+        total=total, limit=limit, offset=offset, from_date=from_date, to_date=to_date, items=items
+    )
 
 
 @router.get("/transactions/{transaction_id}", response_model=TransactionOut)
-async def get_transaction(transaction_id: int):
-    row = await TransactionHistory.get_or_none(transaction_id=transaction_id)
+async def get_transaction(
+    transaction_id: int,
+    transaction_date: Optional[date] = Query(None, description="Optional; lets the lookup skip other months"),
+):
+    q = Q(transaction_id=transaction_id)
+    if transaction_date is not None:
+        q &= Q(transaction_date=transaction_date)
+    row = await TransactionHistory.get_or_none(q)
     if not row:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return TransactionOut.model_validate(row)
@@ -97,30 +118,43 @@ async def account_daily_summary(
     from_date: Optional[date] = Query(None),
     to_date: Optional[date] = Query(None),
 ):
-    # Pure SQL for clarity (quotes needed for spaced column names)
-    sql = """
+    # Pure SQL for clarity (quotes needed for spaced column names).
+    # Only the bounds given are applied; with both, the planner prunes partitions.
+    date_sql, date_params = date_clauses(from_date, to_date, 2)
+    sql = f"""
         SELECT "Transaction Date" AS day,
                COUNT(*) AS txn_count,
                SUM("Transaction amount") AS total_amount
         FROM transaction_history
-        WHERE account_number = $1
-          {from_clause}
-          {to_clause}
+        WHERE account_number = $1{date_sql}
         GROUP BY day
         ORDER BY day DESC
     """
-    params: List = [account_number]
-    from_clause = ""
-    to_clause = ""
-
-    if from_date:
-        from_clause = "AND \"Transaction Date\" >= $2"
-        params.append(from_date)
-    if to_date:
-        # if both provided, to_date becomes $3; otherwise $2
-        to_clause = f"AND \"Transaction Date\" <= ${len(params)+1}"
-        params.append(to_date)
-
-    sql = sql.format(from_clause=from_clause, to_clause=to_clause)
-    rows = await Tortoise.get_connection("default").execute_query_dict(sql, params)
+    params: List = [account_number, *date_params]
+    rows = await read_connection().execute_query_dict(sql, params)
     return [DailySummaryOut(**r) for r in rows]
+
+
+@router.post("/transactions/ingest", response_model=IngestResultOut)
+async def ingest_transactions(
+    request: Request,
+    table: str = Query("domestic", pattern="^(domestic|international)$"),
+):
+    """Load NDJSON or CSV rows. Invalid input is rejected whole (422), before anything is written.
+
+    Rows whose id or reference number already exist are skipped, so a batch
+    that failed part way can simply be sent again.
+    """
+    # Imported here: only ingest clients need the parsers, not every worker at boot
+    from utils.ingest import SCHEMAS, IngestError, parse_batch, ingest_rows
+
+    # Body is NDJSON (default) or CSV, picked from the Content-Type header
+    fmt = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    schema = SCHEMAS[table]
+    try:
+        rows = parse_batch(await request.body(), fmt, schema)
+    except IngestError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors)
+
+    result = await ingest_rows(schema, rows)
+    return IngestResultOut(table=schema.table, **result)
@@ -0,0 +1,88 @@
+# scripts/backfill_hijri.py
+"""Rewrite onboarded_customers' Hijri dates in the canonical YYYY-MM-DD form.
+
+    python -m scripts.backfill_hijri --dry-run
+    python -m scripts.backfill_hijri --batch-size 5000
+
+Walks the table in primary-key order, one page at a time. Recorded values are
+normalized; missing ones stay missing, since a date converted from the
+Gregorian one can be a day off and would then be checked as if recorded.
+Each page's changed rows are written with one UPDATE. Values that can't be
+parsed are left as they are and counted.
+updated_at is not touched, so the stale-session sweeper is unaffected.
+"""
+import argparse
+import json
+import time
+
+from tortoise import Tortoise, connections, run_async
+
+from db.settings import TORTOISE_ORM
+from models.customer import OnboardedCustomer
+from utils import hijri
+from utils.responses import dumps
+from utils.sql import for_dialect
+
+UPDATE_SQL = {
+    "postgres": """
+        UPDATE onboarded_customers c
+        SET date_of_birth_hijri = u.dob_hijri, expiry_date_hijri = u.expiry_hijri
+        FROM unnest($1::varchar[], $2::varchar[], $3::varchar[]) AS u(iqama_id, dob_hijri, expiry_hijri)
+        WHERE c.iqama_id = u.iqama_id
+    """,
+    "sqlite": """
+        UPDATE onboarded_customers AS c
+        SET date_of_birth_hijri = j.value ->> 1, expiry_date_hijri = j.value ->> 2
+        FROM json_each($1) j
+        WHERE c.iqama_id = j.value ->> 0
+    """,
+}
+
+
+def _fixed(recorded, counts):
+    if recorded is None or not str(recorded).strip():
+        return recorded
+    try:
+        return hijri.normalize(recorded)
+    except ValueError:
+        counts["unparseable"] += 1
+        return recorded
+
+
+async def main(args):
+    await Tortoise.init(config=TORTOISE_ORM)
+    conn = connections.get("default")
+    dialect = conn.capabilities.dialect
+    counts = {"rows": 0, "changed": 0, "unparseable": 0}
+    started = time.perf_counter()
+    last = ""
+    while True:
+        rows = await OnboardedCustomer.filter(iqama_id__gt=last).order_by("iqama_id").limit(args.batch_size).values(
+            "iqama_id", "date_of_birth_hijri", "expiry_date_hijri"
+        )
+        if not rows:
+            break
+        last = rows[-1]["iqama_id"]
+        changed = []
+        for row in rows:
+            new = (_fixed(row["date_of_birth_hijri"], counts), _fixed(row["expiry_date_hijri"], counts))
+            if new != (row["date_of_birth_hijri"], row["expiry_date_hijri"]):
+                changed.append((row["iqama_id"], *new))
+        counts["rows"] += len(rows)
+        counts["changed"] += len(changed)
+        if changed and not args.dry_run:
+            if dialect == "postgres":
+                params = [list(column) for column in zip(*changed)]
+            else:
+                params = [dumps(changed).decode()]
+            await conn.execute_query(for_dialect(conn, UPDATE_SQL[dialect]), params)
+
+    counts.update(dry_run=args.dry_run, seconds=round(time.perf_counter() - started, 3))
+    print(json.dumps(counts))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would change")
+    run_async(main(parser.parse_args()))
@@ -0,0 +1,28 @@
+# scripts/check_schema.py
+"""Check the live database against the models and the shipped migrations.
+
+    python -m scripts.check_schema
+
+Prints a JSON report and exits non-zero when a migration is pending or a
+table/column differs from the models (run `aerich upgrade`, or write a
+migration for the difference).
+"""
+import json
+import sys
+
+from tortoise import Tortoise, run_async
+
+from db.schema import diff_schema, migration_status
+from db.settings import TORTOISE_ORM
+
+
+async def main():
+    await Tortoise.init(config=TORTOISE_ORM)
+    report = {"migrations": await migration_status(), "differences": await diff_schema()}
+    print(json.dumps(report, indent=2))
+    if not report["migrations"]["up_to_date"] or report["differences"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_async(main())
@@ -0,0 +1,74 @@
+# scripts/import_profile.py
+"""Where a worker's import time goes.
+
+    python -m scripts.import_profile            # profile `import main`
+    python -m scripts.import_profile --top 15 --module routes.customers
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter
+(after one warm-up run, so bytecode is already compiled) and prints JSON:
+the total, the slowest modules by self time, the app's own modules
+(routes/models/utils/db) and cumulative time per top-level package.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+APP_PACKAGES = ("main", "routes", "models", "utils", "db", "reference_utils")
+
+
+def importtime(module: str) -> list:
+    """[(module, self_us, cumulative_us, depth)] in import order."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env={**os.environ, "SCHEMA_CHECK": "off"}, capture_output=True, text=True, check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def report(rows: list, module: str, top: int) -> dict:
+    # Children are printed before their parent: keep only the block ending at `module`
+    end = next(i for i, row in enumerate(rows) if row[0] == module and row[3] == 0)
+    start = max((i for i in range(end) if rows[i][3] == 0), default=-1) + 1
+    rows = rows[start:end + 1]
+    total = rows[-1][2]
+    packages = {}
+    for name, _, cumulative, depth in rows:
+        if depth == 1:  # imported directly by the profiled module
+            package = name.split(".", 1)[0]
+            packages[package] = packages.get(package, 0) + cumulative
+    ms = lambda us: round(us / 1000, 1)
+    return {
+        "module": module,
+        "total_ms": ms(total),
+        "slowest_self": [
+            {"module": name, "self_ms": ms(self_us), "cumulative_ms": ms(cum)}
+            for name, self_us, cum, _ in sorted(rows, key=lambda r: -r[1])[:top]
+        ],
+        "app_modules": [
+            {"module": name, "self_ms": ms(self_us), "cumulative_ms": ms(cum)}
+            for name, self_us, cum, _ in sorted(rows, key=lambda r: -r[2])
+            if name.split(".", 1)[0] in APP_PACKAGES
+        ][:top],
+        "by_package_ms": {name: ms(us) for name, us in sorted(packages.items(), key=lambda p: -p[1])[:top]},
+    }
+
+
+def main(args):
+    importtime(args.module)  # warm-up: compile bytecode, fill the OS page cache
+    print(json.dumps(report(importtime(args.module), args.module, args.top), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=20)
+    main(parser.parse_args())
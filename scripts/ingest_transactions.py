@@ -0,0 +1,48 @@
+# scripts/ingest_transactions.py
+"""Load NDJSON/CSV transaction batches into the history tables.
+
+    python -m scripts.ingest_transactions batch.ndjson --table domestic
+    python -m scripts.ingest_transactions intl.csv --table international
+"""
+import argparse
+import json
+import sys
+import time
+
+from tortoise import Tortoise, run_async
+
+from db.settings import TORTOISE_ORM
+from utils.ingest import SCHEMAS, IngestError, parse_batch, ingest_rows
+
+
+async def main(args):
+    await Tortoise.init(config=TORTOISE_ORM)
+    schema = SCHEMAS[args.table]
+    for path in args.files:
+        fmt = args.format or ("csv" if path.endswith(".csv") else "ndjson")
+        with open(path, "rb") as fh:
+            payload = fh.read()
+
+        started = time.perf_counter()
+        try:
+            rows = parse_batch(payload, fmt, schema)
+        except IngestError as exc:
+            print(json.dumps({"file": path, "errors": exc.errors}), file=sys.stderr)
+            sys.exit(1)
+        result = await ingest_rows(schema, rows)
+        elapsed = time.perf_counter() - started
+
+        result.update(
+            file=path,
+            seconds=round(elapsed, 3),
+            rows_per_second=round(result["received"] / elapsed) if elapsed else None,
+        )
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--table", choices=sorted(SCHEMAS), default="domestic")
+    parser.add_argument("--format", choices=["ndjson", "csv"])
+    run_async(main(parser.parse_args()))
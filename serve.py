@@ -0,0 +1,77 @@
+# serve.py
+"""Production entrypoint: `python serve.py` (see Procfile).
+
+Workers default to the CPUs this process may run on; override with
+WEB_CONCURRENCY. uvloop/httptools are used when installed. On SIGTERM
+uvicorn stops accepting connections and lets in-flight requests finish for
+up to GRACEFUL_TIMEOUT seconds before the lifespan closes the DB pool.
+
+X-Forwarded-For/-Proto are only believed from FORWARDED_ALLOW_IPS (default
+127.0.0.1, a proxy on the same host). Behind a load balancer, set it to the
+balancer's addresses or subnet, e.g. FORWARDED_ALLOW_IPS=10.0.0.0/16. Never
+set it to "*" while clients can reach the app directly: they could then pick
+the IP and scheme that logs and metrics record.
+"""
+import glob
+import importlib.util
+import logging
+import os
+import tempfile
+
+import uvicorn
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=".env")
+logger = logging.getLogger("serve")
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))  # respects container CPU pinning
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _installed(module):
+    return importlib.util.find_spec(module) is not None
+
+
+def main():
+    workers = int(os.getenv("WEB_CONCURRENCY") or _cpu_count())
+    # db.settings splits DB_MAX_CONNECTIONS by this, so every worker must see it
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+
+    # Workers dump metrics here so /metrics can sum them; start from zero each boot
+    metrics_dir = os.getenv("METRICS_DIR") or tempfile.mkdtemp(prefix="banking-metrics-")
+    os.environ["METRICS_DIR"] = metrics_dir
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, "*.json")):
+        os.remove(path)
+
+    loop = "uvloop" if _installed("uvloop") else "asyncio"
+    http = "httptools" if _installed("httptools") else "h11"
+
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Starting %s worker(s), loop=%s, http=%s", workers, loop, http)
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=workers,
+        loop=loop,
+        http=http,
+        # Longer than the load balancer's idle timeout, so it closes first
+        timeout_keep_alive=int(os.getenv("KEEPALIVE_TIMEOUT", "75")),
+        backlog=int(os.getenv("BACKLOG", "2048")),
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+        # Recycle workers now and then so slow leaks never pile up
+        limit_max_requests=int(os.getenv("MAX_REQUESTS", "0")) or None,
+        # Client IP/scheme from X-Forwarded-* only when the peer is a trusted proxy
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        access_log=os.getenv("ACCESS_LOG", "true").lower() == "true",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# tests/test_age.py
+import asyncio
+from datetime import date
+
+import pytest
+
+from models.customer import OnboardedCustomer
+from models.iqama import IqamaRecord
+from utils import age
+from utils.leader import leader
+
+TODAY = date(2026, 3, 15)
+
+
+@pytest.mark.parametrize("dob, expected", [
+    (date(2008, 3, 15), 18),  # birthday today
+    (date(2008, 3, 16), 17),  # birthday tomorrow
+    (date(2008, 3, 14), 18),
+    (None, None),
+])
+def test_age_on(dob, expected):
+    assert age.age_on(dob, TODAY) == expected
+
+
+def test_leap_day_birthday_counts_from_1_march():
+    assert age.age_on(date(2008, 2, 29), date(2026, 2, 28)) == 17
+    assert age.age_on(date(2008, 2, 29), date(2026, 3, 1)) == 18
+    assert age.age_on(date(2008, 2, 29), date(2028, 2, 29)) == 20
+
+
+@pytest.mark.parametrize("today", [TODAY, date(2026, 2, 28), date(2028, 2, 29), date(2026, 12, 31)])
+def test_dob_range_agrees_with_age_on(today):
+    earliest, latest = age.dob_range(18, 25, today)
+    # Exactly the days where age_on gives 18..25, for every day around both edges
+    for dob in (latest, earliest):
+        for shift in range(-3, 4):
+            day = date.fromordinal(dob.toordinal() + shift)
+            inside = earliest < day <= latest
+            assert inside == (18 <= age.age_on(day, today) <= 25), (today, day)
+
+
+def test_dob_range_open_ends():
+    assert age.dob_range(today=TODAY) == (None, None)
+    assert age.dob_range(min_age=18, today=TODAY) == (None, date(2008, 3, 15))
+    assert age.dob_range(max_age=25, today=TODAY) == (date(2000, 3, 15), None)
+
+
+def _seed(client, dobs):
+    async def seed():
+        for n, dob in enumerate(dobs):
+            await OnboardedCustomer.create(iqama_id=f"20000000{n:02d}", dep_reference_number=f"DEP00000{n:02d}",
+                                           date_of_birth=dob, age=0)
+    client.portal.call(seed)
+
+
+def test_filter_by_age(client):
+    _seed(client, [date(2008, 3, 15), date(2008, 3, 16), date(2000, 3, 16), date(2000, 3, 15)])
+
+    async def ids():
+        query = age.filter_by_age(OnboardedCustomer.all(), 18, 25, TODAY)
+        return sorted(await query.values_list("iqama_id", flat=True))
+
+    assert client.portal.call(ids) == ["2000000000", "2000000002"]
+
+
+def test_refresh_writes_changed_rows_only(client):
+    _seed(client, [date(2008, 3, 15), date(2008, 3, 16)])
+
+    assert client.portal.call(age.refresh_ages, TODAY)["onboarded_customers"] == 2
+    assert client.portal.call(age.refresh_ages, TODAY)["onboarded_customers"] == 0
+
+    async def ages():
+        return sorted(await OnboardedCustomer.all().values_list("age", flat=True))
+
+    assert client.portal.call(ages) == [17, 18]
+
+
+def test_job_skips_refresh_outside_the_leader(client, monkeypatch):
+    _seed(client, [date(2008, 3, 15)])
+    monkeypatch.setattr(leader, "is_leader", False)
+
+    async def one_round():
+        job = asyncio.create_task(age.run_age_job(interval=3600))
+        await asyncio.sleep(0.05)  # the first round runs straight away
+        job.cancel()
+
+    client.portal.call(one_round)
+    assert client.portal.call(lambda: OnboardedCustomer.filter(age=0).count()) == 1
+
+
+@pytest.mark.query_budget(1, route="GET /admin/kyc/{iqama_id}")
+def test_kyc_age_comes_from_date_of_birth(client):
+    dob = date(1990, 1, 1)
+
+    async def seed():
+        await IqamaRecord.create(iqama_id="2000000001", mobile_number="0500000001", full_name="A",
+                                 date_of_birth=dob, gender="M", nationality="X", age=3)
+
+    client.portal.call(seed)
+    profile = client.get("/admin/kyc/2000000001").json()
+    assert profile["iqama"]["age"] == age.age_on(dob)
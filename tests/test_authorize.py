@@ -0,0 +1,87 @@
+# tests/test_authorize.py
+import asyncio
+
+import pytest
+
+from models.account import AccountDetails
+from models.authorization import AccountAuthorization
+from routes.account_details import INT4_MAX, authorize_idempotent
+
+ACCOUNT = "SA0000000001"
+
+
+@pytest.fixture
+def account(client):
+    client.portal.call(lambda: AccountDetails.create(
+        account_number=ACCOUNT, iban_number="SA00", account_balance=0, account_type="Current", status="Active",
+        spending_limit=100, utilised_limit=0, account_holder_name="Test", swift_code="X", account_currency="SAR",
+    ))
+    return ACCOUNT
+
+
+def _utilised(client):
+    return client.portal.call(lambda: AccountDetails.get(account_number=ACCOUNT).values_list("utilised_limit", flat=True))
+
+
+def _authorize(client, amount, key=None):
+    headers = {"Idempotency-Key": key} if key else {}
+    return client.post(f"/api/accounts/{ACCOUNT}/authorize", json={"amount": amount}, headers=headers)
+
+
+@pytest.mark.query_budget(1, route="POST /api/accounts/{account_number}/authorize")  # one UPDATE ... RETURNING
+def test_approved_within_limit(client, account):
+    response = _authorize(client, 60)
+
+    assert response.status_code == 200
+    assert response.json()["approved"] is True
+    assert response.json()["utilised_limit"] == 60
+
+
+@pytest.mark.query_budget(2, route="POST /api/accounts/{account_number}/authorize")  # plus the limits read
+def test_declined_over_limit_leaves_it_unchanged(client, account):
+    _authorize(client, 60)
+    response = _authorize(client, 41)
+
+    assert response.json()["approved"] is False
+    assert _utilised(client) == 60
+
+
+def test_unknown_account_is_404(client):
+    assert client.post("/api/accounts/NOPE/authorize", json={"amount": 1}).status_code == 404
+
+
+@pytest.mark.parametrize("amount", [0, INT4_MAX + 1])
+def test_amount_out_of_range_is_422(client, account, amount):
+    assert _authorize(client, amount).status_code == 422
+
+
+def test_largest_amount_is_declined_not_overflowed(client, account):
+    response = _authorize(client, INT4_MAX)
+
+    assert response.status_code == 200
+    assert response.json()["approved"] is False
+
+
+def test_concurrent_double_spend_approves_once(client, account):
+    async def both():
+        return await asyncio.gather(*(authorize_idempotent(ACCOUNT, 70, key) for key in ("k1", "k2")))
+
+    results = client.portal.call(both)
+
+    assert sorted(r.approved for r in results) == [False, True]
+    assert _utilised(client) == 70
+
+
+def test_replay_returns_the_first_result(client, account):
+    first = _authorize(client, 30, key="pay-1")
+    retry = _authorize(client, 30, key="pay-1")
+
+    assert retry.json() == {**first.json(), "replayed": True}
+    assert _utilised(client) == 30
+    assert client.portal.call(AccountAuthorization.all().count) == 1
+
+
+def test_same_key_different_amount_is_422(client, account):
+    _authorize(client, 30, key="pay-1")
+
+    assert _authorize(client, 31, key="pay-1").status_code == 422
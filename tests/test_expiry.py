@@ -0,0 +1,90 @@
+# tests/test_expiry.py
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from models.customer import OnboardedCustomer
+from utils import expiry
+from utils.leader import leader
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def expiring(client):
+    # Ties on expiry_date so pages have to split between rows of the same day
+    days = [0, 1, 1, 1, 2, 5, 5, 30, 31, -1]
+
+    async def seed():
+        for n, offset in enumerate(days):
+            await OnboardedCustomer.create(iqama_id=f"20000000{n:02d}", dep_reference_number=f"DEP00000{n:02d}",
+                                           mobile_number=f"05000000{n:02d}", expiry_date=TODAY + timedelta(days=offset))
+
+    client.portal.call(seed)
+    # Expected order within 30 days: (expiry_date, iqama_id); the -1 and +31 days are outside
+    return [f"20000000{n:02d}" for n in range(8)]
+
+
+def test_parse_cursor():
+    assert expiry.parse_cursor(None) is None
+    assert expiry.parse_cursor("2026-11-02,2123456789") == (date(2026, 11, 2), "2123456789")
+    assert expiry.format_cursor({"expiry_date": date(2026, 11, 2), "iqama_id": "2123456789"}) == "2026-11-02,2123456789"
+    for bad in ("2026-11-02", "yesterday,2123456789"):
+        with pytest.raises(ValueError):
+            expiry.parse_cursor(bad)
+
+
+@pytest.mark.parametrize("chunk", [1, 2, 3, 8, 100])
+def test_pages_walk_every_row_once_in_order(client, expiring, chunk):
+    async def walk():
+        return [[row["iqama_id"] for row in rows] async for rows in expiry.pages(30, chunk=chunk)]
+
+    walked = client.portal.call(walk)
+    assert [i for rows in walked for i in rows] == expiring
+    assert all(len(rows) == chunk for rows in walked[:-1])
+
+
+@pytest.mark.query_budget(1, route="GET /admin/expiring-iqamas")
+def test_endpoint_pages_by_cursor(client, expiring):
+    seen, after = [], None
+    while True:
+        params = {"within_days": 30, "limit": 3, **({"after": after} if after else {})}
+        body = client.get("/admin/expiring-iqamas", params=params).json()
+        seen += [item["iqama_id"] for item in body["items"]]
+        after = body["next_cursor"]
+        if after is None:
+            break
+    assert seen == expiring
+    assert client.get("/admin/expiring-iqamas", params={"after": "nope"}).status_code == 400
+
+
+def test_export_streams_the_same_rows(client, expiring, monkeypatch):
+    monkeypatch.setattr(expiry, "CHUNK", 3)
+    lines = client.get("/admin/expiring-iqamas/export", params={"within_days": 30}).text.splitlines()
+    assert lines[0].startswith("iqama_id,")
+    assert [line.split(",")[0] for line in lines[1:]] == expiring
+
+
+@pytest.mark.query_budget(1, route="GET /admin/expiring-iqamas/notifications")
+def test_enqueue_once_per_expiry(client, expiring):
+    first = client.portal.call(expiry.enqueue_notifications, 30, 3)
+    again = client.portal.call(expiry.enqueue_notifications, 30, 3)
+
+    assert (first["scanned"], first["enqueued"]) == (8, 8)
+    assert (again["scanned"], again["enqueued"]) == (8, 0)
+    body = client.get("/admin/expiring-iqamas/notifications").json()
+    assert body["queue"]["pending"]["count"] == 8
+    assert body["leader"]["is_leader"] is True
+
+
+def test_job_skips_outside_the_leader(client, expiring, monkeypatch):
+    monkeypatch.setattr(leader, "is_leader", False)
+
+    async def one_round():
+        job = asyncio.create_task(expiry.run_expiry_notification_job(interval=3600))
+        await asyncio.sleep(0.05)  # the first round runs straight away
+        job.cancel()
+
+    client.portal.call(one_round)
+    assert client.get("/admin/expiring-iqamas/notifications").json()["queue"] == {}
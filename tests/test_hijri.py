@@ -0,0 +1,82 @@
+# tests/test_hijri.py
+from datetime import date, timedelta
+
+import pytest
+
+from models.customer import OnboardedCustomer
+from utils import hijri
+
+DOB = date(1989, 12, 11)  # 1410-05-12 in the tabular calendar
+
+
+@pytest.mark.parametrize("text", [
+    "1410-05-12", "1410/5/12", "12/05/1410", "12-5-1410 AH", "12 Jumada al-Awwal 1410",
+    "12 jumada I, 1410", "١٢ جمادى الأولى ١٤١٠هـ", "١٢/٠٥/١٤١٠",
+])
+def test_parse_accepts_every_shape(text):
+    assert hijri.parse(text) == (1410, 5, 12)
+    assert hijri.normalize(text) == "1410-05-12"
+
+
+@pytest.mark.parametrize("text", ["", "12/05/10", "1410-13-01", "1410-05-31", "12 Ramadhaan 1410", "yesterday"])
+def test_parse_rejects(text):
+    with pytest.raises(ValueError):
+        hijri.parse(text)
+
+
+def test_normalize_keeps_missing_values_missing():
+    assert hijri.normalize(None) is None
+    assert hijri.normalize("  ") is None
+    assert hijri.normalize(date(1410, 5, 12)) == "1410-05-12"  # iqama_records' DATE column
+
+
+def test_conversion_round_trips():
+    assert hijri.to_hijri(DOB) == (1410, 5, 12)
+    day = date(1900, 1, 1)
+    while day < date(2100, 1, 1):
+        assert hijri.to_gregorian(hijri.to_hijri(day)) == day
+        day += timedelta(days=97)
+
+
+def test_conversion_range():
+    with pytest.raises(ValueError):
+        hijri.to_hijri(date(1800, 1, 1))
+    with pytest.raises(ValueError):
+        hijri.to_gregorian("1200-01-01")
+
+
+def test_matches_recorded_date_exactly():
+    assert hijri.matches("12 Jumada al-Awwal 1410", "1410-05-12")
+    assert hijri.matches("12/05/1410", "1410-05-12", DOB)
+    # A recorded date other than the conversion is official: no tolerance
+    assert hijri.matches("13 Jumada al-Awwal 1410", "1410-05-13", DOB)
+    assert not hijri.matches("1410-05-12", "1410-05-13", DOB)
+    assert not hijri.matches("not a date", "1410-05-13", DOB)
+
+
+def test_matches_conversion_within_a_day():
+    # Nothing recorded (or a legacy stored conversion): Umm al-Qura may be a day either side
+    for recorded in (None, "1410-05-12"):
+        assert hijri.matches("1410-05-11", recorded, DOB)
+        assert hijri.matches("1410-05-13", recorded, DOB)
+        assert not hijri.matches("1410-05-14", recorded, DOB)
+    assert not hijri.matches("1410-05-12", None)
+
+
+def test_matches_thirtieth_of_a_short_tabular_month():
+    last = hijri.to_gregorian("1410-06-29")
+    assert hijri.to_hijri(last + timedelta(days=1)) == (1410, 7, 1)  # 29-day month here
+    assert hijri.matches("30 Jumada al-Thani 1410", None, last + timedelta(days=1))
+    with pytest.raises(ValueError):
+        hijri.to_gregorian("1410-06-30")
+
+
+def test_reset_validation_without_recorded_hijri(client):
+    async def seed():
+        await OnboardedCustomer.create(iqama_id="2000000001", dep_reference_number="DEP0000001",
+                                       status="Account Successfully Created", date_of_birth=DOB)
+
+    client.portal.call(seed)
+    body = {"iqama_id": "2000000001", "calendar_type": "hijri"}
+    assert client.post("/customers/validate-reset-request", json={**body, "dob": "13/05/1410"}).status_code == 200
+    assert client.post("/customers/validate-reset-request", json={**body, "dob": "15/05/1410"}).status_code == 400
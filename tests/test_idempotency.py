@@ -0,0 +1,65 @@
+# tests/test_idempotency.py
+import pytest
+
+from models.customer import OnboardedCustomer
+from utils import idempotency
+
+IQAMA_ID = "2123456789"
+
+
+@pytest.fixture
+def customer(client):
+    client.portal.call(lambda: OnboardedCustomer.create(
+        iqama_id=IQAMA_ID, dep_reference_number="DEP0000001", device_id="device-1", current_step="address",
+    ))
+    return IQAMA_ID
+
+
+def _put(client, body, device="device-1", key="key-1"):
+    return client.put(f"/customers/{IQAMA_ID}", json=body, headers={"device_id": device, "Idempotency-Key": key})
+
+
+def test_retry_gets_the_stored_response(client, customer):
+    first = _put(client, {"city": "Riyadh"})
+    retry = _put(client, {"city": "Riyadh"})
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+
+
+def test_same_key_different_body_is_rejected(client, customer):
+    assert _put(client, {"city": "Riyadh"}).status_code == 200
+    assert _put(client, {"city": "Jeddah"}).status_code == 422
+
+
+def test_key_from_another_device_is_not_replayed(client, customer):
+    assert _put(client, {"city": "Riyadh"}).status_code == 200
+
+    other = _put(client, {"city": "Riyadh"}, device="device-2")
+
+    # Runs the route, so the device binding check answers
+    assert other.status_code == 403
+    assert "idempotent-replayed" not in other.headers
+
+
+def test_credential_checks_are_never_replayed(client, customer):
+    headers = {"Idempotency-Key": "login-1"}
+    body = {"iqama_id": IQAMA_ID, "password": "wrong"}
+
+    for _ in range(2):
+        response = client.post("/customers/verify-password", json=body, headers=headers)
+        assert response.status_code == 404  # no password set yet
+        assert "idempotent-replayed" not in response.headers
+
+
+def test_oversized_response_is_marked_done(client, customer, monkeypatch):
+    monkeypatch.setattr(idempotency, "MAX_BODY_BYTES", 8)
+
+    assert _put(client, {"city": "Riyadh"}).status_code == 200
+    retry = _put(client, {"city": "Riyadh"})
+
+    assert retry.status_code == 200
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == {"detail": idempotency.NOT_KEPT}
@@ -0,0 +1,106 @@
+# tests/test_ingest.py
+import json
+from datetime import date, time
+from decimal import Decimal
+
+import pytest
+
+from utils.ingest import SCHEMAS, TIME_ZONE, IngestError, ingest_rows, parse_batch
+
+SCHEMA = SCHEMAS["domestic"]
+
+
+def _row(reference, account=1000001, **overrides):
+    row = {
+        "account_number": account,
+        "transaction_type": "Debit",
+        "transaction_date": "2026-01-31",
+        "transaction_amount": "12.50",
+        "time_of_transaction": "10:15:00",
+        "reference_number": reference,
+    }
+    row.update(overrides)
+    return row
+
+
+def _ndjson(*rows):
+    return "\n".join(json.dumps(r) for r in rows).encode()
+
+
+def _value(row, field):
+    return row[SCHEMA.fields.index(field)]
+
+
+def test_ndjson_rows_are_converted():
+    (row,) = parse_batch(_ndjson(_row("R1", available_balance=99.1)), "ndjson", SCHEMA)
+
+    assert _value(row, "account_number") == 1000001
+    assert _value(row, "transaction_date") == date(2026, 1, 31)
+    assert _value(row, "transaction_amount") == Decimal("12.50")
+    assert _value(row, "available_balance") == Decimal("99.1")  # float keeps its printed digits
+    assert _value(row, "transaction_id") is None
+
+
+def test_naive_times_get_the_ingest_offset():
+    rows = parse_batch(_ndjson(_row("R1"), _row("R2", time_of_transaction="10:15:00+03:00")), "ndjson", SCHEMA)
+
+    assert _value(rows[0], "time_of_transaction") == time(10, 15, tzinfo=TIME_ZONE)
+    assert _value(rows[1], "time_of_transaction").utcoffset().total_seconds() == 3 * 3600
+
+
+def test_csv_accepts_column_names():
+    payload = b"account_number,Transaction type,Transaction Date,Transaction amount,Reference Number\n" \
+              b"1000001,Credit,2026-02-01,5.00,R1\n"
+
+    (row,) = parse_batch(payload, "csv", SCHEMA)
+
+    assert _value(row, "transaction_type") == "Credit"
+    assert _value(row, "reference_number") == "R1"
+    assert _value(row, "time_of_transaction") is None  # empty optional column
+
+
+@pytest.mark.parametrize("row, field, error", [
+    (_row("R1", transaction_date=""), "transaction_date", "field required"),
+    (_row("R1", transaction_amount="abc"), "transaction_amount", None),
+    (_row("R1", transaction_date="31/01/2026"), "transaction_date", None),
+])
+def test_invalid_rows_are_reported_with_line_and_field(row, field, error):
+    with pytest.raises(IngestError) as exc:
+        parse_batch(_ndjson(_row("R0"), row), "ndjson", SCHEMA)
+
+    (reported,) = exc.value.errors
+    assert (reported["line"], reported["field"]) == (2, field)
+    assert error is None or reported["error"] == error
+
+
+def test_malformed_ndjson_names_the_line():
+    with pytest.raises(IngestError) as exc:
+        parse_batch(_ndjson(_row("R1")) + b"\n{not json", "ndjson", SCHEMA)
+
+    assert "line 2" in exc.value.errors[0]["error"]
+
+
+def test_non_object_line_is_rejected():
+    with pytest.raises(IngestError) as exc:
+        parse_batch(b"[1, 2]", "ndjson", SCHEMA)
+
+    assert exc.value.errors[0]["error"] == "expected an object"
+
+
+def test_duplicates_are_skipped_in_the_batch_and_on_reload(client):
+    rows = parse_batch(_ndjson(_row("R1"), _row("R1"), _row("R2", account=1000002)), "ndjson", SCHEMA)
+
+    first = client.portal.call(ingest_rows, SCHEMA, rows)
+    again = client.portal.call(ingest_rows, SCHEMA, rows + parse_batch(_ndjson(_row("R3")), "ndjson", SCHEMA))
+
+    assert (first["received"], first["inserted"], first["skipped"], first["accounts"]) == (3, 2, 1, 2)
+    # Only R3 is new: accounts counts the rows written, not the rows sent
+    assert (again["inserted"], again["skipped"], again["accounts"]) == (1, 3, 1)
+
+
+def test_ingest_endpoint_stores_the_time(client):
+    response = client.post("/api/transactions/ingest", content=_ndjson(_row("R1")),
+                           headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 1
@@ -0,0 +1,32 @@
+# tests/test_query_budget.py
+import pytest
+
+from models.customer import OnboardedCustomer
+from utils.device_registry import device_registry
+
+DEVICE_ROUTE = "GET /customers/device/{device_id}"
+
+
+@pytest.fixture
+def onboarding(client):
+    client.portal.call(lambda: OnboardedCustomer.create(
+        iqama_id="2123456789", dep_reference_number="DEP0000001", device_id="device-1", current_step="password",
+    ))
+    yield "2123456789", "device-1"
+    client.portal.call(device_registry.invalidate)
+
+
+@pytest.mark.query_budget(0, route=DEVICE_ROUTE)
+def test_device_lookup_answered_from_registry(client, onboarding):
+    iqama_id, device_id = onboarding
+    client.portal.call(device_registry.for_device, device_id)  # warm, outside any request
+
+    response = client.get(f"/customers/device/{device_id}")
+
+    assert response.status_code == 200
+    assert response.json()["iqama_id"] == iqama_id
+
+
+@pytest.mark.query_budget(1, route=DEVICE_ROUTE)
+def test_device_lookup_miss_is_one_query(client, onboarding):
+    assert client.get("/customers/device/unknown-device").status_code == 404
@@ -0,0 +1,37 @@
+# tests/test_schema.py
+from tortoise import connections
+
+# Every index the migrations leave in place, except those on tables without a
+# model (onboarded_customers_archive, migration 8)
+MIGRATION_INDEXES = {
+    "idx_transaction_history_account_date": ("transaction_history", ["account_number", "Transaction Date"]),
+    "idx_transaction_history_reference": ("transaction_history", ["Reference Number"]),
+    "idx_international_transaction_history_account_date": (
+        "international_transaction_history", ["account_number", "Transaction Date"]),
+    "idx_international_transaction_history_reference": ("international_transaction_history", ["Reference Number"]),
+    "idx_onboarded_customers_partial_updated": ("onboarded_customers", ["updated_at", "iqama_id"]),
+    "idx_idempotent_expires_at": ("idempotent_requests", ["expires_at"]),
+    "idx_onboarded_customers_dob": ("onboarded_customers", ["date_of_birth"]),
+    "idx_onboarded_customers_expiry": ("onboarded_customers", ["expiry_date", "iqama_id"]),
+    "idx_iqama_expiry_notifications_pending": ("iqama_expiry_notifications", ["id"]),
+}
+
+
+def test_generated_schema_has_the_migration_indexes(client):
+    async def indexes():
+        conn = connections.get("default")
+        _, rows = await conn.execute_query(
+            "SELECT name, tbl_name, sql FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")
+        found = {}
+        for name, table, sql in rows:
+            _, info = await conn.execute_query(f'PRAGMA index_info("{name}")')
+            found[name] = (table, [column for _, _, column in info], sql)
+        return found
+
+    found = client.portal.call(indexes)
+
+    assert {name: found[name][:2] for name in MIGRATION_INDEXES if name in found} == MIGRATION_INDEXES
+    assert "idx_iqama_records_expiry" not in found  # dropped by migration 12
+    assert found["idx_onboarded_customers_partial_updated"][2].endswith(
+        "WHERE \"status\" <> 'Account Successfully Created'")
+    assert found["idx_iqama_expiry_notifications_pending"][2].endswith("WHERE \"status\" = 'pending'")
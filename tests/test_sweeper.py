@@ -0,0 +1,57 @@
+# tests/test_sweeper.py
+from datetime import timedelta
+
+import pytest
+from tortoise import connections, timezone
+
+from models.customer import OnboardedCustomer
+from utils import sweeper
+
+
+@pytest.fixture
+def sessions(client):
+    old = timezone.now() - timedelta(days=sweeper.AFTER_DAYS + 1)
+
+    async def seed():
+        await OnboardedCustomer.create(iqama_id="2000000001", dep_reference_number="DEP0000001", updated_at=old)
+        await OnboardedCustomer.create(iqama_id="2000000002", dep_reference_number="DEP0000002")
+        await OnboardedCustomer.create(iqama_id="2000000003", dep_reference_number="DEP0000003", updated_at=old,
+                                       status="Account Successfully Created")
+
+    client.portal.call(seed)
+
+
+def _remaining(client):
+    async def ids():
+        return sorted(await OnboardedCustomer.all().values_list("iqama_id", flat=True))
+    return client.portal.call(ids)
+
+
+def test_job_does_nothing_when_off(client, sessions):
+    assert client.portal.call(sweeper.run_sweeper_job, 0, "off") is None  # returns instead of looping
+    assert len(_remaining(client)) == 3
+
+
+def test_dry_run_only_counts(client, sessions):
+    report = client.portal.call(sweeper.sweep, "dry-run")
+
+    assert report["would_sweep"] == 1
+    assert report["rows"] == 0
+    assert _remaining(client) == ["2000000001", "2000000002", "2000000003"]
+
+
+def test_archive_moves_stale_sessions_only(client, sessions):
+    report = client.portal.call(sweeper.sweep, "archive")
+
+    assert report["rows"] == 1
+    assert _remaining(client) == ["2000000002", "2000000003"]
+
+    async def archived():
+        _, rows = await connections.get("default").execute_query(f"SELECT iqama_id FROM {sweeper.ARCHIVE_TABLE}")
+        return [row["iqama_id"] for row in rows]
+    assert client.portal.call(archived) == ["2000000001"]
+
+
+def test_unknown_mode_is_rejected(client):
+    with pytest.raises(ValueError):
+        client.portal.call(sweeper.sweep, "off")
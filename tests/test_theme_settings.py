@@ -0,0 +1,42 @@
+# tests/test_theme_settings.py
+from fastapi.testclient import TestClient
+
+from main import app
+
+THEME = {"primary_color": "#ffffff", "secondary_color": "#000000", "background_color": "#111111",
+         "primary_font": "Inter", "secondary_font": "Cairo", "primary_font_size": "14px",
+         "secondary_font_size": "12px"}
+
+
+def test_save_then_read_with_etag(client):
+    assert client.get("/theme-settings").status_code == 404
+
+    saved = client.post("/theme-settings", json=THEME).json()
+    assert {k: saved[k] for k in THEME} == THEME
+    assert {"id", "created_at", "updated_at"} <= saved.keys()
+
+    first = client.get("/theme-settings")
+    assert first.json() == saved
+    assert client.get("/theme-settings", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    client.post("/theme-settings", json={**THEME, "primary_color": "#222222"})
+    assert client.get("/theme-settings").json()["primary_color"] == "#222222"
+
+
+def test_body_is_validated_against_the_model(client):
+    response = client.post("/theme-settings", json={**THEME, "primary_color": "#" * 11})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "primary_color"]
+
+
+def test_schemas_are_in_openapi(client):
+    schema = client.get("/openapi.json").json()
+    post = schema["paths"]["/theme-settings"]["post"]
+    assert post["requestBody"]["content"]["application/json"]["schema"] == {"$ref": "#/components/schemas/ThemeSettingsIn"}
+    assert set(schema["components"]["schemas"]["ThemeSettingsIn"]["properties"]) == set(THEME)
+
+
+def test_routes_are_added_once(client):
+    with TestClient(app):
+        pass
+    assert sorted(m for r in app.routes if getattr(r, "path", None) == "/theme-settings" for m in r.methods) == ["GET", "POST"]
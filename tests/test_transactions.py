@@ -0,0 +1,35 @@
+# tests/test_transactions.py
+import json
+
+import pytest
+
+
+@pytest.fixture
+def history(client):
+    rows = [
+        {"account_number": 1000001, "transaction_type": "Debit", "transaction_date": day,
+         "transaction_amount": "10.00", "reference_number": f"R{n}"}
+        for n, day in enumerate(["2019-03-01", "2026-01-15", "2026-02-20"])
+    ]
+    payload = "\n".join(json.dumps(r) for r in rows).encode()
+    assert client.post("/api/transactions/ingest", content=payload).json()["inserted"] == 3
+
+
+def test_no_dates_lists_the_whole_history(client, history):
+    body = client.get("/api/transactions", params={"account_number": 1000001}).json()
+
+    assert body["total"] == 3
+    assert (body["from_date"], body["to_date"]) == (None, None)
+
+
+def test_dates_bound_the_listing_and_are_echoed(client, history):
+    body = client.get("/api/transactions", params={"from_date": "2026-01-01", "to_date": "2026-01-31"}).json()
+
+    assert [item["reference_number"] for item in body["items"]] == ["R1"]
+    assert (body["from_date"], body["to_date"]) == ("2026-01-01", "2026-01-31")
+
+
+def test_open_ended_range(client, history):
+    body = client.get("/api/transactions", params={"from_date": "2026-01-01"}).json()
+
+    assert body["total"] == 2
@@ -0,0 +1,106 @@
+# utils/age.py
+"""Age from date_of_birth, never from a stored number.
+
+`age_on()` is the one Python definition. `dob_range()` turns an age range into
+date_of_birth bounds, so "customers aged 18-25" is a plain range predicate
+on the date_of_birth index instead of a per-row expression:
+
+    query = filter_by_age(OnboardedCustomer.all(), min_age=18, max_age=25)
+
+The `age` columns are kept for existing readers and reports; our own
+responses use `age_on()`. `run_age_job` is started in every worker but only
+the job leader (utils/leader.py) runs the refresh: one UPDATE per table.
+Only rows whose age actually changed (birthdays since the last run) are
+written, and updated_at is left alone.
+
+    AGE_REFRESH_INTERVAL_SECONDS=21600
+"""
+import asyncio
+import logging
+import os
+from datetime import date
+from typing import Optional, Tuple
+
+from tortoise import connections
+
+from utils.leader import leader
+from utils.sql import for_dialect
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL_SECONDS = float(os.getenv("AGE_REFRESH_INTERVAL_SECONDS", str(6 * 3600)))
+TABLES = ("onboarded_customers", "iqama_records")
+
+# Whole years between date_of_birth and $1, same rule as age_on()
+_AGE_SQL = {
+    "postgres": "date_part('year', age($1::date, date_of_birth))::int",
+    "sqlite": ("CAST(strftime('%Y', ?1) AS INTEGER) - CAST(strftime('%Y', date_of_birth) AS INTEGER)"
+               " - (strftime('%m-%d', ?1) < strftime('%m-%d', date_of_birth))"),
+}
+
+REFRESH_SQL = {
+    "postgres": """
+        UPDATE {table} SET age = {age}
+        WHERE date_of_birth IS NOT NULL AND age IS DISTINCT FROM {age}
+    """,
+    "sqlite": """
+        UPDATE {table} SET age = {age}
+        WHERE date_of_birth IS NOT NULL AND age IS NOT {age}
+    """,
+}
+
+
+def age_on(date_of_birth: Optional[date], today: Optional[date] = None) -> Optional[int]:
+    if date_of_birth is None:
+        return None
+    today = today or date.today()
+    return today.year - date_of_birth.year - ((today.month, today.day) < (date_of_birth.month, date_of_birth.day))
+
+
+def _years_before(today: date, years: int) -> date:
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:  # 29 February in a non-leap year
+        return today.replace(year=today.year - years, day=28)
+
+
+def dob_range(min_age: Optional[int] = None, max_age: Optional[int] = None,
+              today: Optional[date] = None) -> Tuple[Optional[date], Optional[date]]:
+    """(born after, born on or before) for min_age <= age <= max_age; None = unbounded."""
+    today = today or date.today()
+    latest = _years_before(today, min_age) if min_age is not None else None
+    earliest = _years_before(today, max_age + 1) if max_age is not None else None
+    return earliest, latest
+
+
+def filter_by_age(query, min_age: Optional[int] = None, max_age: Optional[int] = None, today: Optional[date] = None):
+    earliest, latest = dob_range(min_age, max_age, today)
+    if earliest is not None:
+        query = query.filter(date_of_birth__gt=earliest)
+    if latest is not None:
+        query = query.filter(date_of_birth__lte=latest)
+    return query
+
+
+async def refresh_ages(today: Optional[date] = None) -> dict:
+    """Rewrite stale `age` columns; returns rows changed per table."""
+    conn = connections.get("default")
+    dialect = conn.capabilities.dialect
+    today = today or date.today()
+    changed = {}
+    for table in TABLES:
+        # Stripped: the asyncpg client only returns a row count for text starting with UPDATE
+        sql = REFRESH_SQL[dialect].format(table=table, age=_AGE_SQL[dialect]).strip()
+        changed[table], _ = await conn.execute_query(for_dialect(conn, sql), [today.isoformat() if dialect == "sqlite" else today])
+    return changed
+
+
+async def run_age_job(interval: float = REFRESH_INTERVAL_SECONDS) -> None:
+    while True:
+        try:
+            changed = await refresh_ages() if leader.is_leader else {}
+            if any(changed.values()):
+                logger.info("Refreshed stored ages", extra=changed)
+        except Exception:
+            logger.exception("Age refresh failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,126 @@
+# utils/cache.py
+import asyncio
+import functools
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from utils.invalidation import bus
+
+# Every cache registers itself here so hit ratios can be reported in one place
+CACHES: Dict[str, "ResponseCache"] = {}
+
+
+class ResponseCache:
+    """TTL + LRU cache of serialized JSON response bodies, keyed by string.
+
+    Invalidations go through the cross-worker bus on channel ``cache_<name>``;
+    an empty payload clears the whole cache.
+    """
+
+    def __init__(self, name: str, ttl: float, maxsize: int):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.channel = f"cache_{name}"
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Bumped on every invalidation so a load that raced with a write is not stored
+        self._generation = 0
+        self.hits = self.misses = self.evictions = 0
+        CACHES[name] = self
+        bus.subscribe(self.channel, self._drop)
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, body: bytes) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _drop(self, key: Optional[str] = None) -> None:
+        self._generation += 1
+        if key:
+            self._entries.pop(key, None)
+        else:
+            self._entries.clear()
+
+    async def invalidate(self, key=None) -> None:
+        """Drop one key (or everything) here and in every other worker."""
+        await bus.publish(self.channel, "" if key is None else str(key))
+
+    async def get_or_load(self, key: str, load) -> bytes:
+        body = self.get(key)
+        if body is not None:
+            self.hits += 1
+            return body
+        self.misses += 1
+
+        # Collapse concurrent misses for the same key into one load
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            body = await load()
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        if generation == self._generation:
+            self.set(key, body)
+        future.set_result(body)
+        return body
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+def render_json(content) -> bytes:
+    # Same encoding FastAPI's default JSONResponse produces
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def cached_response(cache: ResponseCache, key_param: str):
+    """Serve a GET route from `cache`, keyed on one of its path parameters.
+
+    The wrapped route returns whatever it returned before; its encoded body is
+    cached and replayed as-is. HTTPExceptions (e.g. 404) are not cached.
+    """
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            async def load():
+                return render_json(await endpoint(**kwargs))
+
+            body = await cache.get_or_load(str(kwargs[key_param]), load)
+            return Response(content=body, media_type="application/json")
+        return wrapper
+    return decorator
@@ -0,0 +1,148 @@
+# utils/compression.py
+"""Accept-Encoding negotiated gzip / brotli for responses.
+
+    COMPRESS_MIN_BYTES=1024     smaller single-shot bodies are sent as is
+    COMPRESS_GZIP_LEVEL=6
+    COMPRESS_BROTLI_QUALITY=4   brotli's default (11) is far too slow per request
+
+Brotli is used when the `brotli` package is installed and the client
+prefers it; otherwise gzip. Streaming responses (more_body=True) are
+compressed incrementally and flushed per chunk, so a CSV export starts
+arriving before the last row is written. Already encoded responses and
+binary media types pass through untouched.
+"""
+import gzip
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+
+def choose_encoding(accept_encoding: str):
+    """Best of br/gzip the client accepts (q > 0), or None for identity."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+    offers = ["br", "gzip"] if brotli is not None else ["gzip"]
+    wildcard = accepted.get("*", 0.0)
+    best = max(offers, key=lambda coding: accepted.get(coding, wildcard))  # ties keep the first (br)
+    return best if accepted.get(best, wildcard) > 0 else None
+
+
+class _Encoder:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.flush()
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.finish() if self.encoding == "br" else self._obj.flush()
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept) if accept else None
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        encoder = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                content_type = b""
+                for name, value in headers:
+                    if name == b"content-encoding":
+                        passthrough = True
+                    elif name == b"content-type":
+                        content_type = value
+                if not content_type.decode("latin-1").startswith(COMPRESSIBLE):
+                    passthrough = True
+                if passthrough:
+                    return await send(message)
+                start = message  # held until we know the body size
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                return await send(message)
+
+            body, more = message.get("body", b""), message.get("more_body", False)
+            if encoder is None:
+                if not more and len(body) < self.minimum_size:
+                    start["headers"] = [*start["headers"], (b"vary", b"Accept-Encoding")]
+                    passthrough = True
+                    await send(start)
+                    return await send(message)
+
+                encoder = _Encoder(encoding)
+                start["headers"] = _encoded_headers(start["headers"], encoding)
+                if not more:
+                    data = compress(body, encoding)
+                    start["headers"].append((b"content-length", str(len(data)).encode()))
+                    await send(start)
+                    return await send({"type": "http.response.body", "body": data})
+                await send(start)
+
+            data = encoder.chunk(body) if body else b""
+            if not more:
+                data += encoder.finish()
+            if data or not more:
+                await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _encoded_headers(headers, encoding: str):
+    out = []
+    for name, value in headers:
+        if name == b"content-length":
+            continue  # set again for single-shot bodies, dropped for streams
+        if name == b"etag" and not value.startswith(b"W/"):
+            value = b"W/" + value  # the bytes differ from the identity representation
+        out.append((name, value))
+    out += [(b"content-encoding", encoding.encode()), (b"vary", b"Accept-Encoding")]
+    return out
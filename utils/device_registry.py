@@ -0,0 +1,176 @@
+# utils/device_registry.py
+"""In-process registry of device bindings (which onboarding a device belongs to).
+
+`GET /customers/device/{device_id}` and the binding check in
+`PUT /customers/{iqama_id}` read from here instead of onboarded_customers;
+only a miss (or an expired entry) queries the table, by primary key or by
+device_id. Entries are dropped through the invalidation bus, so every worker
+forgets a binding as soon as any worker changes it:
+
+    await device_registry.invalidate(iqama_id, old_device_id, new_device_id)
+
+The bus is Postgres LISTEN/NOTIFY in production and LocalInvalidationBus (same
+process) on SQLite and in tests. Between a write in one worker and the NOTIFY
+reaching another, that other worker can answer from the old binding for a few
+milliseconds; DEVICE_REGISTRY_TTL bounds staleness if a notification is lost.
+
+While the bus's listener is down (`bus.connected` is False), other workers'
+invalidations are not arriving, so entries are only trusted for
+DEVICE_REGISTRY_FALLBACK_TTL seconds. This covers the ones loaded before the
+drop too. With 0, every lookup goes to the table until the listener is back.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+
+from models.customer import OnboardedCustomer
+from utils.cache import CACHES
+from utils.invalidation import bus
+
+CHANNEL = "device_registry"
+TTL = float(os.getenv("DEVICE_REGISTRY_TTL", "300"))
+FALLBACK_TTL = float(os.getenv("DEVICE_REGISTRY_FALLBACK_TTL", "1"))
+MAXSIZE = int(os.getenv("DEVICE_REGISTRY_MAXSIZE", "100000"))
+
+_FIELDS = ("iqama_id", "device_id", "current_step", "status")
+# Writes touching any of these must call invalidate()
+BINDING_FIELDS = frozenset(_FIELDS[1:])
+
+
+class Binding(NamedTuple):
+    iqama_id: str
+    device_id: Optional[str]
+    current_step: Optional[str]
+    status: Optional[str]
+
+
+class DeviceRegistry:
+    def __init__(self, name: str = CHANNEL, ttl: float = TTL, maxsize: int = MAXSIZE, invalidation_bus=bus,
+                 fallback_ttl: float = FALLBACK_TTL):
+        self.name = name
+        self.ttl = ttl
+        self.fallback_ttl = fallback_ttl
+        self.maxsize = maxsize
+        self.bus = invalidation_bus
+        # iqama_id -> (loaded, Binding or None); device_id -> (loaded, iqama_id or None)
+        self._by_iqama: "OrderedDict[str, tuple]" = OrderedDict()
+        self._by_device: "OrderedDict[str, tuple]" = OrderedDict()
+        # Bumped on every invalidation; a load that started before one is not stored
+        self._version = 0
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self.hits = self.misses = self.evictions = 0
+        CACHES[name] = self
+        self.bus.subscribe(CHANNEL, self._drop)
+
+    # ---------- lookups ----------
+    async def for_iqama(self, iqama_id: str) -> Optional[Binding]:
+        entry = self._fresh(self._by_iqama, iqama_id)
+        if entry is not None:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return await self._load(("i", iqama_id))
+
+    async def for_device(self, device_id: str) -> Optional[Binding]:
+        entry = self._fresh(self._by_device, device_id)
+        if entry is not None:
+            iqama_id = entry[1]
+            binding = self._fresh(self._by_iqama, iqama_id) if iqama_id else (0, None)
+            if binding is not None and (binding[1] is None or binding[1].device_id == device_id):
+                self.hits += 1
+                return binding[1]
+        self.misses += 1
+        return await self._load(("d", device_id))
+
+    # ---------- invalidation ----------
+    async def invalidate(self, iqama_id: Optional[str] = None, *device_ids: Optional[str]) -> None:
+        """Forget an onboarding's binding (and any device ids involved) in every worker.
+
+        With no arguments everything is dropped (bulk admin deletes, the sweeper).
+        """
+        keys = ([f"i:{iqama_id}"] if iqama_id else []) + [f"d:{d}" for d in device_ids if d]
+        await self.bus.publish(CHANNEL, ",".join(keys))
+
+    def _drop(self, payload: Optional[str] = None) -> None:
+        self._version += 1
+        if not payload:
+            self._by_iqama.clear()
+            self._by_device.clear()
+            return
+        for key in payload.split(","):
+            kind, _, value = key.partition(":")
+            if kind == "i":
+                entry = self._by_iqama.pop(value, None)
+                if entry and entry[1] and entry[1].device_id:
+                    self._by_device.pop(entry[1].device_id, None)
+            else:
+                self._by_device.pop(value, None)
+
+    # ---------- internals ----------
+    def _fresh(self, entries: OrderedDict, key: str):
+        entry = entries.get(key)
+        # Checked on every lookup, so a listener going down also shortens entries already held
+        ttl = self.ttl if self.bus.connected else self.fallback_ttl
+        if entry is None or entry[0] + ttl <= time.monotonic():
+            return None
+        entries.move_to_end(key)
+        return entry
+
+    def _put(self, entries: OrderedDict, key: str, value, loaded: float) -> None:
+        entries[key] = (loaded, value)
+        entries.move_to_end(key)
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    async def _load(self, key: tuple) -> Optional[Binding]:
+        # Collapse concurrent misses (an app fleet resuming at once) into one query
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        version = self._version
+        try:
+            kind, value = key
+            query = OnboardedCustomer.filter(iqama_id=value) if kind == "i" else OnboardedCustomer.filter(device_id=value)
+            row = await query.first().values(*_FIELDS)
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        binding = Binding(**row) if row else None
+        if version == self._version:
+            loaded = time.monotonic()
+            if binding is not None:
+                self._put(self._by_iqama, binding.iqama_id, binding, loaded)
+                if binding.device_id:
+                    self._put(self._by_device, binding.device_id, binding.iqama_id, loaded)
+            elif kind == "i":
+                self._put(self._by_iqama, value, None, loaded)
+            else:
+                self._put(self._by_device, value, None, loaded)
+        future.set_result(binding)
+        return binding
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._by_iqama) + len(self._by_device),
+            "maxsize": self.maxsize * 2,
+            "ttl": self.ttl,
+            "fallback_ttl": self.fallback_ttl,
+            "bus_connected": self.bus.connected,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+device_registry = DeviceRegistry()
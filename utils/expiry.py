@@ -0,0 +1,163 @@
+# utils/expiry.py
+"""Onboarded customers whose iqama expires soon.
+
+Everything walks onboarded_customers in (expiry_date, iqama_id) order on the
+index of the same name (migration 11), one keyset page at a time, so no
+query ever scans the table and no caller holds more than one page:
+
+  * GET /admin/expiring-iqamas          one page plus the cursor of the next one
+  * GET /admin/expiring-iqamas/export   CSV streamed page by page
+  * run_expiry_notification_job         one pending row in iqama_expiry_notifications
+                                        per iqama expiry, written a page per INSERT;
+                                        started in every worker, runs in the job
+                                        leader only (utils/leader.py)
+
+    EXPIRY_NOTIFY_DAYS=30                 remind this many days ahead
+    EXPIRY_NOTIFY_CHUNK=1000              rows per page/INSERT
+    EXPIRY_NOTIFY_INTERVAL_SECONDS=3600
+"""
+import asyncio
+import csv
+import io
+import logging
+import os
+import time
+from datetime import date, timedelta
+from typing import AsyncIterator, List, Optional, Tuple
+
+from tortoise import connections, timezone
+from tortoise.expressions import Q
+from tortoise.functions import Count, Max
+
+from models.customer import OnboardedCustomer
+from models.notification import IqamaExpiryNotification
+from utils.leader import leader
+from utils.responses import dumps
+from utils.sql import for_dialect
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_DAYS = int(os.getenv("EXPIRY_NOTIFY_DAYS", "30"))
+CHUNK = int(os.getenv("EXPIRY_NOTIFY_CHUNK", "1000"))
+INTERVAL_SECONDS = float(os.getenv("EXPIRY_NOTIFY_INTERVAL_SECONDS", "3600"))
+
+FIELDS = ("iqama_id", "full_name", "mobile_number", "expiry_date", "expiry_date_hijri", "status")
+
+# Key of the last row of a page: (expiry_date, iqama_id)
+Cursor = Tuple[date, str]
+
+ENQUEUE_SQL = {
+    "postgres": """
+        INSERT INTO iqama_expiry_notifications (iqama_id, expiry_date, mobile_number, status, created_at)
+        SELECT u.iqama_id, u.expiry_date, u.mobile_number, 'pending', $4
+        FROM unnest($1::varchar[], $2::date[], $3::varchar[]) AS u(iqama_id, expiry_date, mobile_number)
+        ON CONFLICT (iqama_id, expiry_date) DO NOTHING
+        RETURNING id
+    """,
+    "sqlite": """
+        INSERT INTO iqama_expiry_notifications (iqama_id, expiry_date, mobile_number, status, created_at)
+        SELECT j.value ->> 0, j.value ->> 1, j.value ->> 2, 'pending', $2
+        FROM json_each($1) j
+        WHERE true
+        ON CONFLICT (iqama_id, expiry_date) DO NOTHING
+        RETURNING id
+    """,
+}
+
+# Last run and running totals for this worker, shown at /admin/expiring-iqamas/notifications
+# with the leader state and queue_summary(), which holds for the whole fleet
+notification_state = {"notify_days": NOTIFY_DAYS, "last_run": None, "runs": 0, "enqueued_total": 0}
+
+
+def parse_cursor(value: Optional[str]) -> Optional[Cursor]:
+    """Read a "2026-11-02,2123456789" cursor as (expiry_date, iqama_id); ValueError if malformed."""
+    if not value:
+        return None
+    day, _, iqama_id = value.partition(",")
+    if not iqama_id:
+        raise ValueError("cursor must be <expiry_date>,<iqama_id>")
+    return date.fromisoformat(day), iqama_id
+
+
+def format_cursor(row: dict) -> str:
+    return f"{row['expiry_date']},{row['iqama_id']}"
+
+
+async def page(within_days: int, after: Optional[Cursor] = None, limit: int = CHUNK,
+               fields=FIELDS, today: Optional[date] = None) -> List[dict]:
+    """Customers with today <= expiry_date <= today + within_days, the next `limit` after `after`."""
+    today = today or date.today()
+    query = OnboardedCustomer.filter(expiry_date__gte=today, expiry_date__lte=today + timedelta(days=within_days))
+    if after is not None:
+        query = query.filter(Q(expiry_date__gt=after[0]) | Q(expiry_date=after[0], iqama_id__gt=after[1]))
+    return await query.order_by("expiry_date", "iqama_id").limit(limit).values(*fields)
+
+
+async def pages(within_days: int, fields=FIELDS, chunk: int = CHUNK,
+                today: Optional[date] = None) -> AsyncIterator[List[dict]]:
+    today = today or date.today()  # fixed for the whole walk, even across midnight
+    after = None
+    while True:
+        rows = await page(within_days, after, chunk, fields, today)
+        if rows:
+            yield rows
+        if len(rows) < chunk:
+            return
+        after = (rows[-1]["expiry_date"], rows[-1]["iqama_id"])
+
+
+async def csv_chunks(within_days: int) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(FIELDS)
+    async for rows in pages(within_days):
+        writer.writerows([row[f] for f in FIELDS] for row in rows)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():  # header only: nothing was expiring
+        yield buf.getvalue().encode("utf-8")
+
+
+async def enqueue_notifications(notify_days: int = NOTIFY_DAYS, chunk: int = CHUNK) -> dict:
+    """Create a pending reminder for every iqama expiring within `notify_days` that has none yet."""
+    conn = connections.get("default")
+    dialect = conn.capabilities.dialect
+    started = time.perf_counter()
+    scanned = enqueued = 0
+    async for rows in pages(notify_days, ("iqama_id", "expiry_date", "mobile_number"), chunk):
+        now = timezone.now()
+        if dialect == "postgres":
+            params = [[r["iqama_id"] for r in rows], [r["expiry_date"] for r in rows],
+                      [r["mobile_number"] for r in rows], now]
+        else:
+            params = [dumps([(r["iqama_id"], r["expiry_date"], r["mobile_number"]) for r in rows]).decode(), now]
+        inserted = await conn.execute_query_dict(for_dialect(conn, ENQUEUE_SQL[dialect]), params)
+        scanned += len(rows)
+        enqueued += len(inserted)
+        await asyncio.sleep(0)  # let requests in between chunks
+
+    report = {"scanned": scanned, "enqueued": enqueued, "seconds": round(time.perf_counter() - started, 3),
+              "finished_at": timezone.now().isoformat()}
+    notification_state.update(last_run=report, runs=notification_state["runs"] + 1,
+                              enqueued_total=notification_state["enqueued_total"] + enqueued)
+    if enqueued:
+        logger.info("Queued iqama expiry reminders", extra={k: report[k] for k in ("scanned", "enqueued", "seconds")})
+    return report
+
+
+async def queue_summary() -> dict:
+    """status -> count and newest created_at, from iqama_expiry_notifications."""
+    rows = await (IqamaExpiryNotification.annotate(count=Count("id"), newest=Max("created_at"))
+                  .group_by("status").values("status", "count", "newest"))
+    return {row["status"]: {"count": row["count"], "newest_created_at": row["newest"]} for row in rows}
+
+
+async def run_expiry_notification_job(interval: float = INTERVAL_SECONDS) -> None:
+    while True:
+        try:
+            if leader.is_leader:
+                await enqueue_notifications()
+        except Exception:
+            logger.exception("Iqama expiry reminders failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,125 @@
+# utils/funnel.py
+"""Onboarding funnel numbers for the admin portal (GET /admin/stats/funnel).
+
+Computed from one GROUP BY over onboarded_customers (UTC start day x status x
+current step) and kept as a ready-to-send JSON body. While someone has asked
+for the stats in the last FUNNEL_IDLE_SECONDS, every worker recomputes them
+every FUNNEL_REFRESH_SECONDS in the background, so a dashboard refresh never
+queries the table; only the very first request in a worker waits for it.
+
+    FUNNEL_STEPS=nafath,address,completed   step order used for drop-off
+    FUNNEL_DAYS=30                          days in the daily series
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+from db.router import read_connection, replica_reads
+from utils.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+COMPLETED = "Account Successfully Created"
+STEPS = [step.strip() for step in os.getenv("FUNNEL_STEPS", "nafath,address,completed").split(",") if step.strip()]
+DAYS = int(os.getenv("FUNNEL_DAYS", "30"))
+REFRESH_SECONDS = float(os.getenv("FUNNEL_REFRESH_SECONDS", "30"))
+IDLE_SECONDS = float(os.getenv("FUNNEL_IDLE_SECONDS", "300"))
+
+FUNNEL_SQL = """
+    SELECT DATE(created_at) AS day, status, current_step, COUNT(*) AS customers
+    FROM onboarded_customers
+    GROUP BY 1, 2, 3
+"""
+
+# Last computed body, shared by every request in this worker
+_funnel = {"body": None, "computed_at": 0.0, "requested_at": 0.0}
+_funnel_lock = asyncio.Lock()
+
+
+def build(rows, today: date) -> dict:
+    """Turn (day, status, current_step, customers) groups into the response."""
+    by_status, by_step = Counter(), Counter()
+    started, completed = Counter(), Counter()
+    reached = [0] * len(STEPS)
+    position = {step: i for i, step in enumerate(STEPS)}
+    for row in rows:
+        n, status, step = row["customers"], row["status"], row["current_step"]
+        day = str(row["day"])[:10]
+        by_status[status] += n
+        by_step[step] += n
+        started[day] += n
+        if status == COMPLETED:
+            completed[day] += n
+            furthest = len(STEPS) - 1  # finished customers passed every step
+        else:
+            furthest = position.get(step, -1)
+        for i in range(furthest + 1):
+            reached[i] += n
+
+    funnel = []
+    for i, step in enumerate(STEPS):
+        nxt = reached[i + 1] if i + 1 < len(STEPS) else None
+        funnel.append({
+            "step": step,
+            "reached": reached[i],
+            "current": by_step.get(step, 0),
+            "drop_off": reached[i] - nxt if nxt is not None else None,
+            "drop_off_rate": round((reached[i] - nxt) / reached[i], 4) if nxt is not None and reached[i] else None,
+        })
+
+    daily = []
+    for offset in range(DAYS - 1, -1, -1):
+        day = (today - timedelta(days=offset)).isoformat()
+        daily.append({
+            "day": day,
+            "started": started.get(day, 0),
+            "completed": completed.get(day, 0),
+            "completion_rate": round(completed[day] / started[day], 4) if started.get(day) else None,
+        })
+
+    return {
+        "total": sum(by_status.values()),
+        "by_status": dict(by_status.most_common()),
+        "by_step": {str(step): n for step, n in by_step.most_common()},
+        "funnel": funnel,
+        "untracked_steps": {str(s): n for s, n in by_step.items() if s not in position},
+        "daily": daily,
+    }
+
+
+async def refresh() -> bytes:
+    started = time.perf_counter()
+    with replica_reads():
+        rows = await read_connection().execute_query_dict(FUNNEL_SQL)
+    now = datetime.now(timezone.utc)
+    stats = build(rows, now.date())
+    stats["computed_at"] = now.isoformat(timespec="seconds")
+    stats["query_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    body = dumps(stats)
+    _funnel.update(body=body, computed_at=time.monotonic())
+    return body
+
+
+async def funnel_body() -> bytes:
+    """Cached stats; computes them only when this worker has none yet."""
+    _funnel["requested_at"] = time.monotonic()
+    if _funnel["body"] is not None:
+        return _funnel["body"]
+    async with _funnel_lock:  # concurrent first requests share one query
+        return _funnel["body"] or await refresh()
+
+
+async def run_funnel_job(interval: float = REFRESH_SECONDS) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        # Nobody is looking at the dashboard: skip the query, drop the stale copy
+        if time.monotonic() - _funnel["requested_at"] > IDLE_SECONDS:
+            _funnel["body"] = None
+            continue
+        try:
+            await refresh()
+        except Exception:
+            logger.exception("Funnel stats refresh failed")
@@ -0,0 +1,176 @@
+# utils/hijri.py
+"""Hijri dates: parsing to one canonical form, and Gregorian <-> Hijri conversion.
+
+Hijri dates reach us in many shapes. Iqama records hold them in a DATE column
+(1410-05-12), onboarding stored `str()` of that, and users type
+"12 Jumada al-Awwal 1410", "12/05/1410" or Arabic ("١٢ جمادى الأولى ١٤١٠هـ").
+`normalize()` turns all of these into "YYYY-MM-DD", which is what
+onboarded_customers stores and what verification compares.
+
+Conversion uses two arrays, built on first use and covering years MIN_YEAR to
+MAX_YEAR:
+
+  * the first day (date ordinal) of every Hijri month;
+  * for every day in the range, the index of the month it falls in.
+
+Both directions are therefore a couple of array lookups. The months are
+computed from the arithmetical (tabular, civil epoch) Islamic calendar. This
+can differ from the official Umm al-Qura calendar by a day. Converted dates
+are therefore never stored as if they were recorded ones, and `matches()`
+allows a day either way whenever it has to rely on a conversion.
+"""
+import re
+import unicodedata
+from array import array
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple, Union
+
+MIN_YEAR, MAX_YEAR = 1300, 1600  # 1882 to 2174 CE
+_EPOCH = date(622, 7, 19).toordinal()  # 1 Muharram 1 AH (proleptic Gregorian)
+
+_MONTH_NAMES = (
+    ("Muharram", "محرم"),
+    ("Safar", "صفر"),
+    ("Rabi al-Awwal", "Rabi ul-Awwal", "Rabi I", "ربيع الأول"),
+    ("Rabi al-Thani", "Rabi al-Akhir", "Rabi ul-Thani", "Rabi ul-Akhir", "Rabi II", "ربيع الآخر", "ربيع الثاني"),
+    ("Jumada al-Awwal", "Jumada al-Ula", "Jumada ul-Awwal", "Jumada I", "جمادى الأولى", "جمادى الأول"),
+    ("Jumada al-Thani", "Jumada al-Akhirah", "Jumada ul-Thani", "Jumada ul-Akhir", "Jumada II",
+     "جمادى الآخرة", "جمادى الثانية", "جمادى الآخر"),
+    ("Rajab", "رجب"),
+    ("Shaban", "Sha'aban", "شعبان"),
+    ("Ramadan", "Ramadhan", "رمضان"),
+    ("Shawwal", "شوال"),
+    ("Dhu al-Qadah", "Dhul Qadah", "Dhu al-Qi'dah", "Thul Qadah", "ذو القعدة"),
+    ("Dhu al-Hijjah", "Dhul Hijjah", "Thul Hijjah", "ذو الحجة"),
+)
+
+_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "01234567890123456789")
+_ARABIC_LETTERS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ى": "ي", "ة": "ه", "ـ": None})
+_SUFFIX = re.compile(r"\s*(?:a\.?\s*h\.?|هـ|ه)\s*$", re.IGNORECASE)
+_NUMERIC = re.compile(r"^(\d{1,4})\s*[-/.]\s*(\d{1,2})\s*[-/.]\s*(\d{1,4})$")
+_NAMED = re.compile(r"^(\d{1,2})\s+(.+?)\s*,?\s+(\d{3,4})$")
+
+
+class HijriDate(NamedTuple):
+    year: int
+    month: int
+    day: int
+
+    def isoformat(self) -> str:
+        return f"{self.year:04d}-{self.month:02d}-{self.day:02d}"
+
+    def __str__(self) -> str:
+        return self.isoformat()
+
+
+def _month_key(name: str) -> str:
+    # Drops diacritics (Jumādā, Arabic harakat) and spelling variants of "al"
+    name = "".join(c for c in unicodedata.normalize("NFKD", name.lower()) if not unicodedata.combining(c))
+    name = name.translate(_ARABIC_LETTERS)
+    name = re.sub(r"[^a-z؀-ۿ]", "", name)
+    return name.replace("ul", "al")
+
+
+_MONTHS = {_month_key(alias): number for number, aliases in enumerate(_MONTH_NAMES, 1) for alias in aliases}
+
+
+@lru_cache(maxsize=None)
+def _tables() -> Tuple[array, array]:
+    month_start = array("l")
+    for year in range(MIN_YEAR, MAX_YEAR + 2):
+        year_start = _EPOCH + (year - 1) * 354 + (3 + 11 * year) // 30
+        for month in range(12):
+            month_start.append(year_start + (59 * month + 1) // 2)
+            if year > MAX_YEAR:
+                break  # one sentinel: end of the last month in range
+    month_of_day = array("H")
+    for index in range(len(month_start) - 1):
+        month_of_day.extend(array("H", [index]) * (month_start[index + 1] - month_start[index]))
+    return month_start, month_of_day
+
+
+def to_hijri(day: date) -> HijriDate:
+    month_start, month_of_day = _tables()
+    offset = day.toordinal() - month_start[0]
+    if not 0 <= offset < len(month_of_day):
+        raise ValueError(f"{day} is outside the Hijri years {MIN_YEAR}-{MAX_YEAR}")
+    index = month_of_day[offset]
+    return HijriDate(MIN_YEAR + index // 12, index % 12 + 1, day.toordinal() - month_start[index] + 1)
+
+
+def _ordinal(value: HijriDate, strict: bool = True) -> int:
+    year, month, day = value
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        raise ValueError(f"Hijri year {year} is outside {MIN_YEAR}-{MAX_YEAR}")
+    month_start, _ = _tables()
+    index = (year - MIN_YEAR) * 12 + month - 1
+    if strict and day > month_start[index + 1] - month_start[index]:
+        raise ValueError(f"{year}-{month:02d} has {month_start[index + 1] - month_start[index]} days")
+    return month_start[index] + day - 1
+
+
+def to_gregorian(value: Union[HijriDate, str]) -> date:
+    return date.fromordinal(_ordinal(parse(value) if isinstance(value, str) else value))
+
+
+def parse(value: Union[str, date]) -> HijriDate:
+    """Read a Hijri date written in any of the accepted shapes (ValueError if it isn't one)."""
+    if isinstance(value, date):  # iqama_records keeps Hijri Y-M-D in a DATE column
+        return HijriDate(value.year, value.month, value.day)
+    text = _SUFFIX.sub("", str(value).strip().translate(_DIGITS)).strip()
+    match = _NUMERIC.match(text)
+    if match:
+        first, month, last = match.groups()
+        if len(first) >= 3:
+            year, day = first, last
+        elif len(last) >= 3:
+            year, day = last, first
+        else:
+            raise ValueError(f"No year in Hijri date {value!r}")
+        year, month, day = int(year), int(month), int(day)
+    else:
+        match = _NAMED.match(text)
+        month = _MONTHS.get(_month_key(match.group(2))) if match else None
+        if month is None:
+            raise ValueError(f"Unrecognised Hijri date {value!r}")
+        day, year = int(match.group(1)), int(match.group(3))
+    # Month lengths differ between Umm al-Qura and the tabular calendar: allow 30 everywhere
+    if not (1 <= month <= 12 and 1 <= day <= 30 and year > 0):
+        raise ValueError(f"Invalid Hijri date {value!r}")
+    return HijriDate(year, month, day)
+
+
+def normalize(value: Union[str, date, None]) -> Optional[str]:
+    """Canonical "YYYY-MM-DD" for a Hijri date, None for empty values."""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    return parse(value).isoformat()
+
+
+def matches(typed: str, recorded: Union[str, date, None], gregorian: Optional[date] = None) -> bool:
+    """Whether a user-typed Hijri date is the customer's.
+
+    Checked exactly against a recorded date. With none recorded, it is checked
+    against `gregorian` converted, give or take a day. The same ±1 applies when
+    the recorded value is itself that conversion, as written for customers
+    onboarded before converted values stopped being stored.
+    """
+    if recorded and typed.strip() == str(recorded).strip():
+        return True  # also covers rows written before normalization
+    try:
+        entered = parse(typed)
+        expected = parse(recorded) if recorded else None
+    except ValueError:
+        return False
+    if entered == expected:
+        return True
+    if gregorian is None:
+        return False
+    try:
+        derived = expected is None or expected == to_hijri(gregorian)
+        # The tabular calendar can be a day off Umm al-Qura either way, and its
+        # 29-day months can have a 30th there: count days rather than compare fields
+        return derived and abs(_ordinal(entered, strict=False) - gregorian.toordinal()) <= 1
+    except ValueError:
+        return False
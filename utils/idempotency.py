@@ -0,0 +1,288 @@
+# utils/idempotency.py
+"""`Idempotency-Key` support for customer mutations.
+
+A POST/PUT/PATCH/DELETE under one of IDEMPOTENCY_PATHS that carries an
+`Idempotency-Key` header runs at most once per key. The key is claimed
+in idempotent_requests (migration 9) with one INSERT ... ON CONFLICT. The
+response is then stored, and a retry with the same key and the same request
+gets the stored response back with `Idempotent-Replayed: true`. Nothing
+is recomputed, including the bcrypt hash of a password or MPIN.
+
+  * The same key with a different method/query/body gets 422, as
+    /api/accounts/{n}/authorize already does.
+  * A duplicate that arrives while the first request is still running waits
+    for it. In the same worker it awaits the first request directly. Across
+    workers it polls for up to IDEMPOTENCY_WAIT_SECONDS, then gets 409.
+  * 5xx responses and exceptions release the key so the client can retry.
+  * A response over IDEMPOTENCY_MAX_BODY_BYTES is not stored, but the key is
+    still marked done with its status code. A retry gets that status and a
+    note instead of running the mutation again.
+
+Keys belong to a caller: the `device_id` header, the iqama_id in the JSON
+body and the path. The same key sent from another device is a new request,
+so route checks such as the device binding in PUT /customers/{iqama_id} run
+for it. Credential checks (IDEMPOTENCY_EXCLUDE_PATHS) are never stored or
+replayed.
+
+    IDEMPOTENCY_PATHS=/customers/       comma separated path prefixes
+    IDEMPOTENCY_EXCLUDE_PATHS=/customers/verify-password,/customers/validate-reset-request
+    IDEMPOTENCY_TTL_SECONDS=86400       how long a response can be replayed
+    IDEMPOTENCY_LEASE_SECONDS=60        a claim whose worker died is free again after this
+    IDEMPOTENCY_WAIT_SECONDS=10
+    IDEMPOTENCY_MAX_BODY_BYTES=65536    larger responses are not stored
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from datetime import timedelta
+from typing import Dict
+
+import orjson
+from tortoise import connections, timezone
+
+from utils.sql import for_dialect
+
+logger = logging.getLogger(__name__)
+
+HEADER = b"idempotency-key"
+DEVICE_HEADER = b"device_id"
+MAX_KEY_LENGTH = 64
+PATHS = tuple(p.strip() for p in os.getenv("IDEMPOTENCY_PATHS", "/customers/").split(",") if p.strip())
+EXCLUDE_PATHS = frozenset(p.strip() for p in os.getenv(
+    "IDEMPOTENCY_EXCLUDE_PATHS", "/customers/verify-password,/customers/validate-reset-request"
+).split(",") if p.strip())
+TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+MAX_BODY_BYTES = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", "65536"))
+POLL_SECONDS = 0.05
+CLEANUP_INTERVAL_SECONDS = float(os.getenv("IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS", "3600"))
+
+# Takes a free key, or one whose replay window (or lease) has run out
+CLAIM_SQL = """
+    INSERT INTO idempotent_requests (idempotency_key, request_hash, expires_at)
+    VALUES ($1, $2, $3)
+    ON CONFLICT (idempotency_key) DO UPDATE
+    SET request_hash = EXCLUDED.request_hash, status_code = NULL, content_type = NULL,
+        body = NULL, expires_at = EXCLUDED.expires_at
+    WHERE idempotent_requests.expires_at < $4
+    RETURNING idempotency_key
+"""
+
+LOOKUP_SQL = """
+    SELECT request_hash, status_code, content_type, body
+    FROM idempotent_requests WHERE idempotency_key = $1
+"""
+
+STORE_SQL = """
+    UPDATE idempotent_requests
+    SET status_code = $2, content_type = $3, body = $4, expires_at = $5
+    WHERE idempotency_key = $1
+"""
+
+RELEASE_SQL = "DELETE FROM idempotent_requests WHERE idempotency_key = $1 AND status_code IS NULL"
+
+CLEANUP_SQL = "DELETE FROM idempotent_requests WHERE expires_at < $1"
+
+# key -> future resolved when this worker's first request with that key finishes
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def _header(scope, name: bytes):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def _digest(parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest
+
+
+def _body_iqama_id(body: bytes) -> bytes:
+    try:
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return b""
+    value = data.get("iqama_id") if isinstance(data, dict) else None
+    return str(value).encode() if value is not None else b""
+
+
+def _scoped_key(scope, body: bytes, key: str) -> str:
+    """The stored key: the client's key within its caller (device, iqama_id, path)."""
+    caller = (_header(scope, DEVICE_HEADER) or b"", _body_iqama_id(body), scope["path"].encode())
+    return _digest((*caller, key.encode())).hexdigest()  # 64 characters, the column's length
+
+
+def _request_hash(scope, body: bytes) -> bytes:
+    return _digest((scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""),
+                    _header(scope, DEVICE_HEADER) or b"", body)).digest()
+
+
+NOT_KEPT = "Request already processed; its response was too large to keep"
+
+
+async def _send_json(send, status: int, detail: str, replayed: bool = False) -> None:
+    body = b'{"detail":"' + detail.encode() + b'"}'
+    await _send(send, status, b"application/json", body, replayed)
+
+
+async def _send(send, status: int, content_type, body: bytes, replayed: bool = True) -> None:
+    headers = [(b"content-length", str(len(body)).encode())]
+    if content_type:
+        headers.append((b"content-type", content_type))
+    if replayed:
+        headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def cleanup() -> int:
+    conn = connections.get("default")
+    rows, _ = await conn.execute_query(for_dialect(conn, CLEANUP_SQL), [timezone.now()])
+    return rows
+
+
+async def run_idempotency_cleanup_job(interval: float = CLEANUP_INTERVAL_SECONDS) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await cleanup()
+            if removed:
+                logger.info("Removed expired idempotency keys", extra={"rows": removed})
+        except Exception:
+            logger.exception("Idempotency key cleanup failed")
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app, paths=PATHS):
+        self.app = app
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH", "DELETE")
+                or not scope["path"].startswith(self.paths) or scope["path"] in EXCLUDE_PATHS):
+            return await self.app(scope, receive, send)
+        key = _header(scope, HEADER)
+        if key is None:
+            return await self.app(scope, receive, send)
+        key = key.decode("latin-1").strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return await _send_json(send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+        body = await _read_body(receive)
+        key = _scoped_key(scope, body, key)
+        request_hash = _request_hash(scope, body)
+        conn = connections.get("default")
+        deadline = time.monotonic() + WAIT_SECONDS
+        while True:
+            pending = _inflight.get(key)
+            if pending is not None:
+                # Same worker: wait for the first request, then read what it stored
+                try:
+                    await asyncio.wait_for(asyncio.shield(pending), max(deadline - time.monotonic(), 0))
+                except asyncio.TimeoutError:
+                    return await _send_json(send, 409, "A request with this Idempotency-Key is still in progress")
+                continue
+            # Registered before the claim so duplicates in this worker never query
+            future = asyncio.get_running_loop().create_future()
+            _inflight[key] = future
+            try:
+                now = timezone.now()
+                claimed = await conn.execute_query_dict(
+                    for_dialect(conn, CLAIM_SQL), [key, request_hash, now + timedelta(seconds=LEASE_SECONDS), now]
+                )
+            except BaseException:
+                _inflight.pop(key, None)
+                future.set_result(None)
+                raise
+            if claimed:
+                break
+            _inflight.pop(key, None)
+            future.set_result(None)
+            rows = await conn.execute_query_dict(for_dialect(conn, LOOKUP_SQL), [key])
+            if not rows:
+                continue  # released in between: claim it again
+            stored = rows[0]
+            if bytes(stored["request_hash"]) != request_hash:
+                return await _send_json(send, 422, "Idempotency-Key was already used for a different request")
+            if stored["status_code"] is not None:
+                if stored["body"] is None:  # done, but the response was over MAX_BODY_BYTES
+                    return await _send_json(send, stored["status_code"], NOT_KEPT, replayed=True)
+                content_type = stored["content_type"]
+                return await _send(send, stored["status_code"], content_type.encode() if content_type else None,
+                                   bytes(stored["body"] or b""))
+            if time.monotonic() >= deadline:
+                return await _send_json(send, 409, "A request with this Idempotency-Key is still in progress")
+            await asyncio.sleep(POLL_SECONDS)  # running in another worker
+
+        try:
+            await self._run(scope, body, receive, send, conn, key)
+        finally:
+            _inflight.pop(key, None)
+            future.set_result(None)
+
+    async def _run(self, scope, body, receive, send, conn, key) -> None:
+        sent = {"body": False}
+        response = {"status": None, "content_type": None, "chunks": [], "size": 0}
+
+        async def replay_receive():
+            if not sent["body"]:
+                sent["body"] = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["content_type"] = _header(message, b"content-type")
+            elif message["type"] == "http.response.body" and response["size"] <= MAX_BODY_BYTES:
+                chunk = message.get("body", b"")
+                response["chunks"].append(chunk)
+                response["size"] += len(chunk)
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture)
+        except BaseException:
+            await self._release(conn, key)
+            raise
+
+        status = response["status"]
+        if status is None or status >= 500:
+            return await self._release(conn, key)
+        content_type = response["content_type"]
+        if response["size"] > MAX_BODY_BYTES:
+            # The mutation has run: keep the claim as done, without the body
+            content_type, stored_body = None, None
+        else:
+            stored_body = b"".join(response["chunks"])
+        await conn.execute_query(for_dialect(conn, STORE_SQL), [
+            key, status, content_type.decode("latin-1") if content_type else None,
+            stored_body, timezone.now() + timedelta(seconds=TTL_SECONDS),
+        ])
+
+    @staticmethod
+    async def _release(conn, key) -> None:
+        try:
+            await conn.execute_query(for_dialect(conn, RELEASE_SQL), [key])
+        except Exception:
+            logger.exception("Could not release Idempotency-Key")  # the lease frees it later
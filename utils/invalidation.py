@@ -0,0 +1,147 @@
+# utils/invalidation.py
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv(dotenv_path=".env")
+logger = logging.getLogger(__name__)
+
+# Callback receives the published payload, or None when messages may have been
+# missed (e.g. after a reconnect) and everything on the channel should be dropped.
+Callback = Callable[[Optional[str]], None]
+
+
+class LocalInvalidationBus:
+    """In-process bus: single worker, SQLite and tests."""
+
+    # Nothing to lose in-process: every publish reaches every subscriber
+    connected = True
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[Callback]] = defaultdict(list)
+
+    def subscribe(self, channel: str, callback: Callback) -> None:
+        # Subscribe at import time; channels are LISTENed to when the bus starts
+        self._subscribers[channel].append(callback)
+
+    def _deliver(self, channel: str, payload: Optional[str]) -> None:
+        for callback in self._subscribers.get(channel, ()):
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception("Invalidation callback failed on %s", channel)
+
+    async def publish(self, channel: str, payload: str = "") -> None:
+        self._deliver(channel, payload)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "local", "connected": self.connected, "channels": sorted(self._subscribers)}
+
+
+class PostgresInvalidationBus(LocalInvalidationBus):
+    """Fans invalidations out to every worker with Postgres LISTEN/NOTIFY.
+
+    Publishing applies the change locally straight away and NOTIFYs the other
+    workers; each worker keeps one dedicated listener connection outside the
+    Tortoise pool. `connected` is False until that connection is up, and again
+    whenever it drops: other workers' invalidations are not arriving then.
+    """
+
+    def __init__(self, connect_kwargs: Dict[str, Any], reconnect_delay: float = 2.0):
+        super().__init__()
+        self.connect_kwargs = connect_kwargs
+        self.reconnect_delay = reconnect_delay
+        self._instance = uuid.uuid4().hex  # pids repeat across hosts
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.connected_since: Optional[float] = None
+        self.connects = 0
+        self.last_error: Optional[str] = None
+
+    async def publish(self, channel: str, payload: str = "") -> None:
+        from tortoise import connections
+
+        self._deliver(channel, payload)
+        conn = connections.get("default")
+        await conn.execute_query("SELECT pg_notify($1, $2)", [channel, f"{self._instance}:{payload}"])
+
+    def _on_notify(self, connection, pid, channel, message: str) -> None:
+        sender, _, payload = message.partition(":")
+        if sender != self._instance:  # already applied locally on publish
+            self._deliver(channel, payload)
+
+    async def _listen(self) -> None:
+        import asyncpg
+
+        while True:
+            listener = None
+            try:
+                listener = await asyncpg.connect(**self.connect_kwargs)
+                closed = asyncio.Event()
+                listener.add_termination_listener(lambda _conn: closed.set())
+                for channel in self._subscribers:
+                    await listener.add_listener(channel, self._on_notify)
+                self.connected, self.connected_since, self.last_error = True, time.time(), None
+                self.connects += 1
+                # Anything published while we were disconnected is lost
+                for channel in self._subscribers:
+                    self._deliver(channel, None)
+                await closed.wait()
+                self.last_error = "listener connection closed"
+            except asyncio.CancelledError:
+                self.connected = False
+                if listener is not None and not listener.is_closed():
+                    await listener.close()
+                raise
+            except Exception as exc:
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.warning("Invalidation listener disconnected; retrying", exc_info=True)
+            self.connected, self.connected_since = False, None
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "backend": "postgres",
+            "connected": self.connected,
+            "connected_since": self.connected_since,
+            "connects": self.connects,
+            "last_error": self.last_error,
+            "channels": sorted(self._subscribers),
+        }
+
+
+def _build_bus():
+    url = os.getenv("DATABASE_URL", "")
+    backend = os.getenv("INVALIDATION_BACKEND") or ("postgres" if url.startswith(("postgres", "asyncpg")) else "local")
+    if backend == "postgres":
+        from db.settings import asyncpg_connect_kwargs
+
+        return PostgresInvalidationBus(asyncpg_connect_kwargs())
+    return LocalInvalidationBus()
+
+
+bus = _build_bus()
@@ -0,0 +1,83 @@
+# utils/kyc.py
+"""KYC profile: iqama record, onboarding record and Absher flags in one query.
+
+Used by GET /admin/kyc/{iqama_id} and GET /admin/kyc?ids=...
+iqama_records drives the query, and the other two tables are LEFT JOINed on
+their primary keys (all three share iqama_id). A customer who never started
+onboarding, or who has no Absher screening yet, therefore still gets a profile
+with `onboarding` / `absher` set to null. Column lists come from the models,
+so new fields show up without touching the SQL. Only the customer's password
+and MPIN hashes are left out. `age` is worked out from date_of_birth rather
+than read from the stored column, which lags birthdays (utils/age.py).
+"""
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from db.router import read_connection
+from models.absher import AbsherRecord
+from models.customer import OnboardedCustomer
+from models.iqama import IqamaRecord
+from utils.age import age_on
+from utils.responses import dumps
+from utils.sql import for_dialect
+
+SECRET_FIELDS = {"password", "mpin"}
+
+# (section in the response, table alias, model)
+_SECTIONS = (("iqama", "i", IqamaRecord), ("onboarding", "c", OnboardedCustomer), ("absher", "a", AbsherRecord))
+
+_WHERE = {
+    "postgres": "= ANY($1::varchar[])",  # one statement text for any number of ids
+    "sqlite": "IN (SELECT value FROM json_each($1))",
+}
+
+
+@lru_cache(maxsize=None)
+def _layout() -> Tuple[Tuple[str, str, Tuple[str, ...]], ...]:
+    # Built on first use: the FK column (absher_records.iqama_id) only appears
+    # in the projection once Tortoise has initialised the models
+    return tuple(
+        (section, alias, tuple(c for f, c in model._meta.fields_db_projection.items() if f not in SECRET_FIELDS))
+        for section, alias, model in _SECTIONS
+    )
+
+
+@lru_cache(maxsize=None)
+def kyc_sql(dialect: str) -> str:
+    select = ",\n        ".join(
+        f'{alias}."{column}" AS "{alias}__{column}"' for _, alias, columns in _layout() for column in columns
+    )
+    return f"""
+    SELECT
+        {select}
+    FROM iqama_records i
+    LEFT JOIN onboarded_customers c ON c.iqama_id = i.iqama_id
+    LEFT JOIN absher_records a ON a.iqama_id = i.iqama_id
+    WHERE i.iqama_id {_WHERE[dialect]}
+"""
+
+
+def _profile(row: dict) -> dict:
+    profile = {}
+    for section, alias, columns in _layout():
+        values = {column: row[f"{alias}__{column}"] for column in columns}
+        if "age" in values:
+            dob = values.get("date_of_birth")
+            values["age"] = age_on(date.fromisoformat(dob) if isinstance(dob, str) else dob)  # SQLite: text
+        profile[section] = values if values["iqama_id"] is not None else None
+    return profile
+
+
+async def kyc_profiles(iqama_ids: List[str]) -> Dict[str, dict]:
+    """iqama_id -> profile, for the ids that have an iqama record."""
+    if not iqama_ids:
+        return {}
+    conn = read_connection()
+    dialect = conn.capabilities.dialect
+    if dialect == "postgres":
+        params = [list(iqama_ids)]
+    else:
+        params = [dumps(list(iqama_ids)).decode()]
+    rows = await conn.execute_query_dict(for_dialect(conn, kyc_sql(dialect)), params)
+    return {row["i__iqama_id"]: _profile(row) for row in rows}
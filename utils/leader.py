@@ -0,0 +1,109 @@
+# utils/leader.py
+"""Which worker runs the fleet-wide background jobs.
+
+Some jobs must run in one place only: the stale-session sweeper, the age
+refresh and the iqama expiry reminders. Every worker starts them, and each
+round they check `leader.is_leader` and skip the work unless it is set.
+
+On Postgres the leader is whichever worker holds a session-level advisory
+lock (LOCK_KEY). It holds the lock on one dedicated connection outside the
+Tortoise pool, built like the invalidation listener's connection. Workers
+without the lock retry every JOB_LEADER_RETRY_SECONDS. When the leader exits
+or its connection drops, Postgres releases the lock and another worker takes
+over on its next try. The connection must be direct, or go through PgBouncer
+in session mode; transaction mode loses session locks.
+
+SQLite (local dev, tests) runs a single process, which is always the leader.
+
+    JOB_LEADER_RETRY_SECONDS=30
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = 0x6f6e626a6f6273  # arbitrary, shared by every worker of this app
+RETRY_SECONDS = float(os.getenv("JOB_LEADER_RETRY_SECONDS", "30"))
+
+
+class LocalLeadership:
+    is_leader = True
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "local", "is_leader": self.is_leader}
+
+
+class PostgresLeadership:
+    def __init__(self, connect_kwargs: Dict[str, Any], retry_seconds: float = RETRY_SECONDS):
+        self.connect_kwargs = connect_kwargs
+        self.retry_seconds = retry_seconds
+        self.is_leader = False
+        self.leader_since: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _hold(self) -> None:
+        import asyncpg
+
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(**self.connect_kwargs)
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _conn: closed.set())
+                while not await conn.fetchval("SELECT pg_try_advisory_lock($1)", LOCK_KEY):
+                    await asyncio.sleep(self.retry_seconds)
+                self.is_leader, self.leader_since, self.last_error = True, time.time(), None
+                logger.info("This worker now runs the background jobs (pid %s)", os.getpid())
+                await closed.wait()
+                self.last_error = "lock connection closed"
+            except asyncio.CancelledError:
+                self.is_leader = False
+                if conn is not None and not conn.is_closed():
+                    await conn.close()  # releases the lock for the next worker
+                raise
+            except Exception as exc:
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.warning("Job leader lock lost; retrying", exc_info=True)
+            self.is_leader, self.leader_since = False, None
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+            await asyncio.sleep(self.retry_seconds)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._hold())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"backend": "postgres", "is_leader": self.is_leader, "leader_since": self.leader_since,
+                "last_error": self.last_error}
+
+
+def _build_leadership():
+    url = os.getenv("DATABASE_URL", "")
+    if url.startswith(("postgres", "asyncpg")):
+        from db.settings import asyncpg_connect_kwargs
+
+        return PostgresLeadership(asyncpg_connect_kwargs())
+    return LocalLeadership()
+
+
+leader = _build_leadership()
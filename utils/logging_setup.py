@@ -0,0 +1,155 @@
+# utils/logging_setup.py
+"""Logging that never writes on the event loop.
+
+`setup_logging()` puts a QueueHandler on the root logger. The request path
+only renders the message and enqueues it; a QueueListener thread does the
+JSON formatting, PII redaction and the actual write to stdout. DEBUG lines
+are sampled per call site so they can stay enabled under load.
+
+    LOG_LEVEL=INFO            root level
+    LOG_FORMAT=json|text      json for log shipping, text for a terminal
+    LOG_DEBUG_SAMPLE_RATE=0.01  share of DEBUG records kept, per call site
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import re
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Keys whose values are always masked when passed via `extra=`
+SENSITIVE_KEYS = {
+    "iqama_id", "mobile_number", "mobile", "additional_mobile_number", "password", "mpin",
+    "date_of_birth", "dob", "iban_number", "account_number", "full_name", "arabic_name",
+}
+
+# Iqama/national IDs, Saudi mobiles, IBANs, emails and card-like digit runs inside free text
+PII_PATTERNS = [
+    (re.compile(r"\bSA\d{22}\b"), "SA**IBAN**"),
+    (re.compile(r"(?<!\d)(?:\+?966|0)5\d{8}(?!\d)"), "05********"),
+    (re.compile(r"(?<!\d)[12]\d{9}(?!\d)"), "**********"),
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "***@***"),
+    (re.compile(r"(?<!\d)\d{13,19}(?!\d)"), "****CARD****"),
+]
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def redact(text: str) -> str:
+    for pattern, replacement in PII_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _extras(record: logging.LogRecord) -> dict:
+    extras = {}
+    for key, value in record.__dict__.items():
+        if key in _RESERVED or key.startswith("_"):
+            continue
+        if key in SENSITIVE_KEYS and value is not None:
+            value = "***"
+        elif isinstance(value, str):
+            value = redact(value)
+        extras[key] = value
+    return extras
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": redact(record.getMessage()),
+            "pid": record.process,
+        }
+        entry.update(_extras(record))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = redact(super().format(record))
+        extras = _extras(record)
+        return f"{text} {extras}" if extras else text
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps every n-th DEBUG record per call site; other levels pass untouched."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._seen = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        if not self.every:
+            return False
+        site = (record.pathname, record.lineno)
+        seen = self._seen.get(site, 0)
+        self._seen[site] = seen + 1
+        if seen % self.every:
+            return False
+        record.sampled = self.every  # one kept line stands for this many
+        return True
+
+
+class _LoopSafeQueueHandler(QueueHandler):
+    """Renders only the message on the caller's thread; formatting happens in the listener."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener = None
+
+
+def setup_logging() -> None:
+    """Route all logging (uvicorn's too) through one queue; safe to call twice."""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if os.getenv("LOG_FORMAT", "json") == "json" else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    handler = _LoopSafeQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush whatever is still queued (called at exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
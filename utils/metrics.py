@@ -0,0 +1,234 @@
+# utils/metrics.py
+"""Per-route request/latency/DB metrics, rendered in Prometheus text format.
+
+Each worker keeps plain in-memory counters (no locks: one event loop per
+worker). When METRICS_DIR is set (serve.py does this), every worker also
+dumps its counters to ``<METRICS_DIR>/<pid>.json`` every few seconds, and
+``/metrics`` sums all those files so any worker can answer a scrape for the
+whole server. Files of exited workers are kept so counters never go back.
+"""
+import asyncio
+import contextvars
+import glob
+import json
+import os
+from bisect import bisect_left
+from time import perf_counter
+from typing import Dict, Optional, Tuple
+
+# Upper bounds in seconds; one more slot at the end counts everything above (+Inf)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_DIR = os.getenv("METRICS_DIR")
+FLUSH_INTERVAL_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+UNMATCHED = "<unmatched>"  # 404s are grouped so random paths can't blow up label cardinality
+
+# [query count, seconds] of the request being served, set by MetricsMiddleware
+_request_db: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("request_db", default=None)
+
+
+class RouteStats:
+    __slots__ = ("requests", "errors", "seconds", "buckets", "db_queries", "db_seconds")
+
+    def __init__(self):
+        self.requests = self.errors = self.db_queries = 0
+        self.seconds = self.db_seconds = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds: float, error: bool, db_queries: int, db_seconds: float) -> None:
+        self.requests += 1
+        self.errors += error
+        self.seconds += seconds
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.db_queries += db_queries
+        self.db_seconds += db_seconds
+
+
+# (method, route template) -> stats
+ROUTES: Dict[Tuple[str, str], RouteStats] = {}
+# Every query this worker ran, including ones outside a request (background jobs)
+DB_TOTALS = [0, 0.0]
+
+
+def record_query(seconds: float) -> None:
+    """Called by the instrumented DB clients (db/backend.py) after each query."""
+    DB_TOTALS[0] += 1
+    DB_TOTALS[1] += seconds
+    current = _request_db.get()
+    if current is not None:
+        current[0] += 1
+        current[1] += seconds
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; labels requests by route template, not raw path."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500  # unless a response actually starts
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        db = [0, 0.0]
+        token = _request_db.set(db)
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - started
+            _request_db.reset(token)
+            route = scope.get("route")  # set by FastAPI once a route matched
+            key = (scope["method"], route.path if route is not None else UNMATCHED)
+            stats = ROUTES.get(key)
+            if stats is None:
+                stats = ROUTES[key] = RouteStats()
+            stats.observe(elapsed, status >= 500, db[0], db[1])
+
+
+def snapshot() -> dict:
+    from db.backend import POOL_STATS  # db.backend imports this module
+
+    return {
+        "pid": os.getpid(),
+        "routes": [
+            [method, path, s.requests, s.errors, s.seconds, s.buckets, s.db_queries, s.db_seconds]
+            for (method, path), s in ROUTES.items()
+        ],
+        "db": list(DB_TOTALS),
+        "pools": {name: stats.snapshot() for name, stats in POOL_STATS.items()},
+    }
+
+
+def flush(final: bool = False) -> None:
+    if not METRICS_DIR:
+        return
+    data = snapshot()
+    if final:
+        data["pools"] = {}  # this worker's connections are gone
+    path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+    with open(path + ".tmp", "w") as fh:
+        json.dump(data, fh)
+    os.replace(path + ".tmp", path)  # readers never see a half-written file
+
+
+async def run_flush_job() -> None:
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+        flush()
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect() -> list:
+    """This worker's live snapshot plus the last dump of every other worker."""
+    own = snapshot()
+    snapshots = [own]
+    if METRICS_DIR:
+        for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+            try:
+                with open(path) as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            if data["pid"] == own["pid"]:
+                continue
+            if not _alive(data["pid"]):
+                data["pools"] = {}  # gauges of a dead worker are meaningless
+            snapshots.append(data)
+    return snapshots
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus() -> str:
+    snapshots = collect()
+
+    routes: Dict[Tuple[str, str], list] = {}
+    db_queries, db_seconds = 0, 0.0
+    pools: Dict[str, dict] = {}
+    for data in snapshots:
+        for method, path, requests, errors, seconds, buckets, queries, q_seconds in data["routes"]:
+            total = routes.get((method, path))
+            if total is None:
+                routes[(method, path)] = [requests, errors, seconds, list(buckets), queries, q_seconds]
+                continue
+            total[0] += requests
+            total[1] += errors
+            total[2] += seconds
+            total[3] = [a + b for a, b in zip(total[3], buckets)]
+            total[4] += queries
+            total[5] += q_seconds
+        db_queries += data["db"][0]
+        db_seconds += data["db"][1]
+        for name, pool in data["pools"].items():
+            merged = pools.setdefault(name, dict.fromkeys(pool, 0))
+            for key, value in pool.items():
+                merged[key] = max(merged[key], value) if key == "wait_seconds_max" else merged[key] + value
+
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+
+    labels = {key: f'method="{_label(key[0])}",route="{_label(key[1])}"' for key in routes}
+    metric("http_requests_total", "counter", "Requests served, by route.",
+           [f"http_requests_total{{{labels[k]}}} {v[0]}" for k, v in routes.items()])
+    metric("http_request_errors_total", "counter", "Requests answered with a 5xx status.",
+           [f"http_request_errors_total{{{labels[k]}}} {v[1]}" for k, v in routes.items()])
+
+    histogram = []
+    for key, (requests, _, seconds, buckets, _, _) in routes.items():
+        cumulative = 0
+        for bound, count in zip(BUCKETS, buckets):
+            cumulative += count
+            histogram.append(f'http_request_duration_seconds_bucket{{{labels[key]},le="{bound}"}} {cumulative}')
+        histogram.append(f'http_request_duration_seconds_bucket{{{labels[key]},le="+Inf"}} {requests}')
+        histogram.append(f"http_request_duration_seconds_sum{{{labels[key]}}} {seconds:.6f}")
+        histogram.append(f"http_request_duration_seconds_count{{{labels[key]}}} {requests}")
+    metric("http_request_duration_seconds", "histogram", "Request latency, by route.", histogram)
+
+    metric("http_request_db_queries_total", "counter", "DB queries issued while serving each route.",
+           [f"http_request_db_queries_total{{{labels[k]}}} {v[4]}" for k, v in routes.items()])
+    metric("http_request_db_seconds_total", "counter", "Time spent in DB queries while serving each route.",
+           [f"http_request_db_seconds_total{{{labels[k]}}} {v[5]:.6f}" for k, v in routes.items()])
+    metric("db_queries_total", "counter", "All DB queries, including background jobs.",
+           [f"db_queries_total {db_queries}"])
+    metric("db_query_seconds_total", "counter", "Time spent in all DB queries.",
+           [f"db_query_seconds_total {db_seconds:.6f}"])
+
+    if pools:
+        def pool_samples(name, key, fmt="{}"):
+            return [f'{name}{{pool="{_label(p)}"}} {fmt.format(s[key])}' for p, s in pools.items()]
+
+        metric("db_pool_connections_in_use", "gauge", "Connections checked out of the pool.",
+               pool_samples("db_pool_connections_in_use", "in_use"))
+        metric("db_pool_connections_idle", "gauge", "Open connections waiting in the pool.",
+               pool_samples("db_pool_connections_idle", "idle"))
+        metric("db_pool_waiting", "gauge", "Callers waiting for a pool connection.",
+               pool_samples("db_pool_waiting", "waiting"))
+        metric("db_pool_acquires_total", "counter", "Connections handed out by the pool.",
+               pool_samples("db_pool_acquires_total", "acquires"))
+        metric("db_pool_wait_seconds_total", "counter", "Time spent waiting for a pool connection.",
+               pool_samples("db_pool_wait_seconds_total", "wait_seconds_total", "{:.6f}"))
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,68 @@
+# utils/partitions.py
+import asyncio
+import logging
+import os
+from datetime import date
+from typing import Optional, Tuple
+
+from tortoise import connections
+
+logger = logging.getLogger(__name__)
+
+# Tables converted to monthly RANGE partitions on "Transaction Date" (migration 5).
+# Their primary key became (id, "Transaction Date"), so the database no longer
+# enforces a unique id on its own: ids come from the serial sequence, and the
+# ingest path skips rows whose explicit id already exists in any partition.
+PARTITIONED_TABLES = ("transaction_history", "international_transaction_history")
+
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+PARTITION_JOB_INTERVAL_SECONDS = int(os.getenv("PARTITION_JOB_INTERVAL_SECONDS", str(6 * 3600)))
+
+
+def date_clauses(from_date: Optional[date], to_date: Optional[date], first_param: int) -> Tuple[str, list]:
+    """`AND "Transaction Date" ...` for whichever bounds were given, numbered from $first_param.
+
+    Missing bounds stay open, so a query without dates still covers the whole
+    history. Queries with dates are pruned to the partitions they cover.
+    """
+    sql, params = "", []
+    for value, op in ((from_date, ">="), (to_date, "<=")):
+        if value is not None:
+            params.append(value)
+            sql += f' AND "Transaction Date" {op} ${first_param + len(params) - 1}'
+    return sql, params
+
+
+async def ensure_partitions(months_ahead: int = PARTITION_MONTHS_AHEAD) -> int:
+    """Create any missing monthly partitions from this month up to `months_ahead`."""
+    conn = connections.get("default")
+    if conn.capabilities.dialect != "postgres":
+        return 0
+
+    created = 0
+    for table in PARTITIONED_TABLES:
+        rows = await conn.execute_query_dict(
+            """
+            SELECT ensure_monthly_partitions(
+                $1::regclass,
+                date_trunc('month', CURRENT_DATE)::date,
+                (CURRENT_DATE + make_interval(months => $2))::date
+            ) AS created
+            """,
+            [table, months_ahead],
+        )
+        created += rows[0]["created"]
+    if created:
+        logger.info("Created %s transaction history partition(s)", created)
+    return created
+
+
+async def run_partition_job(interval: int = PARTITION_JOB_INTERVAL_SECONDS) -> None:
+    # Every worker runs this; ensure_monthly_partitions() is idempotent and takes
+    # an advisory lock per table, so concurrent runs just find the work done.
+    while True:
+        try:
+            await ensure_partitions()
+        except Exception:
+            logger.exception("Partition maintenance failed")
+        await asyncio.sleep(interval)
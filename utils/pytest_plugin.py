@@ -0,0 +1,86 @@
+# utils/pytest_plugin.py
+"""pytest plugin: fail a test when a route goes over its DB query budget.
+
+Registered in the root conftest.py (`pytest_plugins = ["utils.pytest_plugin"]`);
+mark tests that drive the app through TestClient (see tests/test_query_budget.py):
+
+    @pytest.mark.query_budget(4)
+    def test_onboarding(client): ...
+
+    @pytest.mark.query_budget(2, route="POST /iqama/validate-iqama")
+    def test_validate(client): ...
+
+Every request made during the test (or only those to `route`) must issue at
+most that many queries. For code called directly rather than over HTTP:
+
+    with assert_max_queries(3):
+        await generate_dep_reference_number()
+"""
+from contextlib import contextmanager
+
+import pytest
+
+from utils import query_trace
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries, route=None): fail if a request (to `route`, e.g. "
+        "'GET /api/card-details/{account_number}') issues more than max_queries DB queries",
+    )
+
+
+def _describe(trace) -> str:
+    counts = {}
+    for sql, _ in trace.queries:
+        counts[sql] = counts.get(sql, 0) + 1
+    lines = [f"  {times}x {sql}" for sql, times in sorted(counts.items(), key=lambda kv: -kv[1])]
+    return "\n".join(lines)
+
+
+def _check(trace, budget: int) -> None:
+    if trace.count > budget:
+        pytest.fail(
+            f"{trace.route or 'block'} issued {trace.count} queries (budget {budget}):\n{_describe(trace)}",
+            pytrace=False,
+        )
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+
+    budget = marker.args[0] if marker.args else marker.kwargs["max_queries"]
+    route = marker.kwargs.get("route")
+    traces = []
+    query_trace.listeners.append(traces.append)
+    try:
+        result = yield
+    finally:
+        query_trace.listeners.remove(traces.append)
+
+    matched = [t for t in traces if route is None or t.route == route]
+    if route is not None and not matched:
+        pytest.fail(f"query_budget: no request to {route} was made", pytrace=False)
+    for trace in matched:
+        _check(trace, budget)
+    return result
+
+
+@contextmanager
+def assert_max_queries(budget: int):
+    with query_trace.record_queries() as trace:
+        yield trace
+    _check(trace, budget)
+
+
+@pytest.fixture
+def query_traces():
+    """Every finished request trace while the test runs, for ad-hoc assertions."""
+    traces = []
+    query_trace.listeners.append(traces.append)
+    yield traces
+    query_trace.listeners.remove(traces.append)
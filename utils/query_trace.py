@@ -0,0 +1,144 @@
+# utils/query_trace.py
+"""Per-request query recorder: slow statements (with EXPLAIN) and N+1 loops.
+
+The instrumented DB clients (db/backend.py) call `record()` after every
+query. Inside a request, QueryTraceMiddleware collects them; when the
+request ends, any statement text that ran REPEAT_THRESHOLD times or more is
+logged as a likely N+1 loop. Independently, any query slower than
+SLOW_QUERY_MS is logged with its plan (EXPLAIN without ANALYZE, so writes
+are never re-run), at most once per statement per EXPLAIN_COOLDOWN_SECONDS.
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from collections import Counter
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_MS", "200")) / 1000
+REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "3"))
+EXPLAIN_COOLDOWN_SECONDS = float(os.getenv("EXPLAIN_COOLDOWN_SECONDS", "600"))
+EXPLAIN_SLOW_QUERIES = os.getenv("EXPLAIN_SLOW_QUERIES", "true").lower() == "true"
+
+
+class QueryTrace:
+    __slots__ = ("scope", "queries")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.queries: List[tuple] = []  # (sql, seconds)
+
+    @property
+    def route(self) -> Optional[str]:
+        if self.scope is None:
+            return None
+        route = self.scope.get("route")  # set by FastAPI once a route matched
+        return f"{self.scope['method']} {route.path if route is not None else self.scope['path']}"
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def seconds(self) -> float:
+        return sum(seconds for _, seconds in self.queries)
+
+    def repeated(self, threshold: int = REPEAT_THRESHOLD) -> List[tuple]:
+        """[(sql, times)] for statements issued `threshold` times or more."""
+        counts = Counter(sql for sql, _ in self.queries)
+        return [(sql, n) for sql, n in counts.most_common() if n >= threshold]
+
+
+_current: contextvars.ContextVar[Optional[QueryTrace]] = contextvars.ContextVar("query_trace", default=None)
+
+# Called with every finished request trace (the pytest plugin hooks in here)
+listeners: List[Callable[[QueryTrace], None]] = []
+
+_explained: dict = {}  # sql -> monotonic time of the last EXPLAIN
+_explain_tasks: set = set()
+
+
+def record(client, query: str, values, seconds: float) -> None:
+    trace = _current.get()
+    if trace is not None:
+        trace.queries.append((query, seconds))
+    if seconds >= SLOW_QUERY_SECONDS:
+        _slow_query(client, query, values, seconds)
+
+
+def _slow_query(client, query: str, values, seconds: float) -> None:
+    if query.startswith("EXPLAIN"):  # our own plan lookups
+        return
+    route = getattr(_current.get(), "route", None) or "background"
+    verb = query.lstrip()[:7].split(None, 1)[0].upper() if query.strip() else ""
+    now = time.monotonic()
+    if (
+        not EXPLAIN_SLOW_QUERIES
+        or verb not in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+        or now - _explained.get(query, -EXPLAIN_COOLDOWN_SECONDS) < EXPLAIN_COOLDOWN_SECONDS
+    ):
+        logger.warning("Slow query (%.0f ms) in %s: %s", seconds * 1000, route, query)
+        return
+    _explained[query] = now
+    # Off the request path; keep a reference so the task isn't garbage collected
+    task = asyncio.get_running_loop().create_task(_explain(client, query, values, seconds, route))
+    _explain_tasks.add(task)
+    task.add_done_callback(_explain_tasks.discard)
+
+
+async def _explain(client, query: str, values, seconds: float, route) -> None:
+    from tortoise import connections
+
+    _current.set(None)  # the EXPLAIN itself belongs to no request
+    try:
+        # A transaction wrapper may already be released; use the pooled client
+        conn = connections.get(client.connection_name)
+        if conn.capabilities.dialect == "sqlite":
+            rows = await conn.execute_query_dict("EXPLAIN QUERY PLAN " + query, values)
+            plan = "\n".join(row["detail"] for row in rows)
+        else:
+            rows = await conn.execute_query_dict("EXPLAIN " + query, values)
+            plan = "\n".join(row["QUERY PLAN"] for row in rows)
+    except Exception as exc:
+        plan = f"<EXPLAIN failed: {exc}>"
+    logger.warning("Slow query (%.0f ms) in %s: %s\n%s", seconds * 1000, route, query, plan)
+
+
+def finish(trace: QueryTrace) -> None:
+    for sql, times in trace.repeated():
+        logger.warning("Possible N+1 in %s: statement ran %d times: %s", trace.route or "background", times, sql)
+    for listener in listeners:
+        listener(trace)
+
+
+class QueryTraceMiddleware:
+    """Pure ASGI middleware giving each HTTP request its own QueryTrace."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        trace = QueryTrace(scope)
+        token = _current.set(trace)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            finish(trace)
+
+
+class record_queries:
+    """Trace queries outside HTTP (scripts, tests): `with record_queries() as trace:`."""
+
+    def __enter__(self) -> QueryTrace:
+        self.trace = QueryTrace()
+        self._token = _current.set(self.trace)
+        return self.trace
+
+    def __exit__(self, *exc):
+        _current.reset(self._token)
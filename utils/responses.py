@@ -0,0 +1,36 @@
+# utils/responses.py
+"""orjson-based JSON responses.
+
+FastJSONResponse is the app's default_response_class, so every JSON body is
+rendered by orjson instead of json.dumps. It understands datetime, date,
+time and UUID natively and Decimal through `_default` (same int/float rule
+as FastAPI's encoder, so the wire format does not change).
+
+Routes that return plain dicts/rows still go through FastAPI's generic
+jsonable_encoder first; large ones should return FastJSONResponse(rows)
+directly to skip that pass entirely:
+
+    return FastJSONResponse(await OnboardedCustomer.all().values(...))
+"""
+from decimal import Decimal
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    return jsonable_encoder(obj)  # anything orjson doesn't know (sets, models, ...)
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,14 @@
+# utils/sql.py
+import re
+
+_PG_PARAM = re.compile(r"\$(\d+)")
+
+
+def for_dialect(conn, sql: str) -> str:
+    """Rewrite asyncpg-style ``$1`` placeholders as ``?1`` when running on SQLite.
+
+    Lets the raw SQL in routes run unchanged against a local SQLite database.
+    """
+    if conn.capabilities.dialect == "sqlite":
+        return _PG_PARAM.sub(r"?\1", sql)
+    return sql
@@ -0,0 +1,148 @@
+# utils/sweeper.py
+"""Moves abandoned onboarding sessions out of onboarded_customers.
+
+A session is stale when its status is one of STALE_STATUSES and it has not
+been touched (updated_at) for SWEEP_AFTER_DAYS. Nothing is swept until an
+operator sets SWEEP_MODE: the default is off, and dry-run only counts what
+would go. `run_sweeper_job` is started in every worker but sweeps only in the
+job leader (utils/leader.py). Each batch is a single statement that claims at
+most SWEEP_BATCH_SIZE rows with FOR UPDATE SKIP LOCKED, so runs that overlap
+during a leader hand-over take disjoint rows instead of waiting.
+
+    SWEEP_MODE=off|dry-run|archive|delete   archive copies rows to onboarded_customers_archive (migration 8)
+    SWEEP_AFTER_DAYS=30
+    SWEEP_BATCH_SIZE=500        rows per statement (bounds lock time and WAL per batch)
+    SWEEP_MAX_BATCHES=20        per run; the rest waits for the next run
+    SWEEP_INTERVAL_SECONDS=900
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import timedelta
+
+from tortoise import connections, timezone
+from tortoise.transactions import in_transaction
+
+from models.customer import OnboardedCustomer
+from utils.device_registry import device_registry
+from utils.leader import leader
+
+logger = logging.getLogger(__name__)
+
+STALE_STATUSES = ["in_progress", "Started on another device"]
+ARCHIVE_TABLE = "onboarded_customers_archive"
+
+MODES = ("off", "dry-run", "archive", "delete")
+MODE = os.getenv("SWEEP_MODE", "off").lower()
+AFTER_DAYS = int(os.getenv("SWEEP_AFTER_DAYS", "30"))
+BATCH_SIZE = int(os.getenv("SWEEP_BATCH_SIZE", "500"))
+MAX_BATCHES = int(os.getenv("SWEEP_MAX_BATCHES", "20"))
+INTERVAL_SECONDS = float(os.getenv("SWEEP_INTERVAL_SECONDS", "900"))
+
+# Last run and running totals for this worker, shown at /admin/sweeper with the leader state
+sweeper_state = {"mode": MODE, "last_run": None, "runs": 0, "rows_total": 0}
+
+
+def _columns() -> str:
+    return ", ".join(f'"{c}"' for c in OnboardedCustomer._meta.fields_db_projection.values())
+
+
+def _pg_batch_sql(mode: str) -> str:
+    claim = """
+        WITH stale AS (
+            SELECT iqama_id FROM onboarded_customers
+            WHERE status = ANY($1::text[]) AND updated_at < $2
+            ORDER BY updated_at
+            LIMIT $3
+            FOR UPDATE SKIP LOCKED
+        ), gone AS (
+            DELETE FROM onboarded_customers c USING stale
+            WHERE c.iqama_id = stale.iqama_id
+            RETURNING c.*
+        )"""
+    if mode == "delete":
+        return claim + " SELECT count(*) AS swept FROM gone"
+    columns = _columns()
+    return claim + f""", archived AS (
+            INSERT INTO {ARCHIVE_TABLE} ({columns}, archived_at)
+            SELECT {columns}, now() FROM gone
+            RETURNING 1
+        )
+        SELECT count(*) AS swept FROM archived"""
+
+
+async def _sqlite_batch(conn, mode: str, cutoff, limit: int) -> int:
+    # Local dev: no row locks in SQLite, a transaction per batch is enough
+    placeholders = ", ".join("?" for _ in STALE_STATUSES)
+    pick = (f"SELECT iqama_id FROM onboarded_customers WHERE status IN ({placeholders}) "
+            f"AND updated_at < ? ORDER BY updated_at LIMIT ?")
+    params = [*STALE_STATUSES, cutoff, limit]
+    async with in_transaction("default") as tx:
+        if mode == "archive":
+            columns = _columns()
+            await tx.execute_script(
+                f"CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} AS "
+                f"SELECT *, NULL AS archived_at FROM onboarded_customers WHERE 0"
+            )
+            await tx.execute_query(
+                f"INSERT INTO {ARCHIVE_TABLE} ({columns}, archived_at) "
+                f"SELECT {columns}, CURRENT_TIMESTAMP FROM onboarded_customers WHERE iqama_id IN ({pick})",
+                params,
+            )
+        rows, _ = await tx.execute_query(f"DELETE FROM onboarded_customers WHERE iqama_id IN ({pick})", params)
+    return rows
+
+
+async def sweep(mode: str = MODE, after_days: int = AFTER_DAYS,
+                batch_size: int = BATCH_SIZE, max_batches: int = MAX_BATCHES) -> dict:
+    """One run: batches until one comes back short or `max_batches` is reached."""
+    if mode not in MODES[1:]:
+        raise ValueError(f"SWEEP_MODE must be one of {', '.join(MODES[1:])}, not {mode!r}")
+    conn = connections.get("default")
+    cutoff = timezone.now() - timedelta(days=after_days)
+    started = time.perf_counter()
+    if mode == "dry-run":
+        stale = await OnboardedCustomer.filter(status__in=STALE_STATUSES, updated_at__lt=cutoff).count()
+        report = {"mode": mode, "rows": 0, "would_sweep": stale, "cutoff": cutoff.isoformat(),
+                  "seconds": round(time.perf_counter() - started, 3), "finished_at": timezone.now().isoformat()}
+        sweeper_state.update(last_run=report, runs=sweeper_state["runs"] + 1)
+        return report
+    rows = batches = 0
+    sql = _pg_batch_sql(mode) if conn.capabilities.dialect == "postgres" else None
+    while batches < max_batches:
+        if sql:
+            result = await conn.execute_query_dict(sql, [STALE_STATUSES, cutoff, batch_size])
+            swept = result[0]["swept"]
+        else:
+            swept = await _sqlite_batch(conn, mode, cutoff, batch_size)
+        rows += swept
+        batches += 1
+        if swept < batch_size:
+            break
+        await asyncio.sleep(0)  # let requests in between batches
+
+    report = {
+        "mode": mode, "rows": rows, "batches": batches, "cutoff": cutoff.isoformat(),
+        "seconds": round(time.perf_counter() - started, 3), "finished_at": timezone.now().isoformat(),
+        "more_pending": batches == max_batches and swept == batch_size,
+    }
+    sweeper_state.update(last_run=report, runs=sweeper_state["runs"] + 1,
+                         rows_total=sweeper_state["rows_total"] + rows)
+    if rows:
+        await device_registry.invalidate()  # swept sessions lose their device bindings
+        logger.info("Swept stale onboarding sessions", extra={k: report[k] for k in ("mode", "rows", "batches", "seconds")})
+    return report
+
+
+async def run_sweeper_job(interval: float = INTERVAL_SECONDS, mode: str = MODE) -> None:
+    if mode == "off":
+        logger.info("Onboarding sweeper is off; set SWEEP_MODE to dry-run, archive or delete")
+        return
+    while True:
+        try:
+            if leader.is_leader:
+                await sweep(mode)
+        except Exception:
+            logger.exception("Onboarding sweeper failed")
+        await asyncio.sleep(interval)